@@ -121,6 +121,9 @@ monitor_job() {
         case $JOB_STATUS in
             "Complete")
                 echo "✅ Job completed successfully!"
+                # Merge only once every shard has written its results
+                kubectl apply -f k8s-merge-shards-job.yaml
+                kubectl wait --for=condition=complete job/cobol-full-scale-merge --timeout=30m
                 break
                 ;;
             "Failed")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+MCQ Answer Extraction
+One extractor for every evaluator. Ranked strategies run against precompiled
+patterns and stop at the first that matches, so a one-letter reply costs a
+single anchored match and a long explanation is never uppercased or scanned
+into a list. Each result records which strategy produced it.
+"""
+import argparse
+import random
+import re
+import time
+from typing import Dict, NamedTuple, Optional
+
+LETTERS = 'ABCD'
+
+# "The answer is C", "Answer: (B)", "answer would be (d)", "Option A is correct"
+EXPLICIT_KEYWORDS = ('answer', 'option', 'choice')
+EXPLICIT_ANSWER = re.compile(
+    r"(?i:\b(?:answer|option|choice)\s*(?:is|would\s+be|will\s+be|[:=\-]))\s*"
+    r"(?i:(?:option|choice)\s+)?(?:\**\(?([ABCD])\)?\**|\(([abcd])\))(?![\w'])"
+    r"|(?i:\b(?:option|choice)\s+)\(?([ABCD])\)?\s+(?i:is\s+(?:the\s+)?(?:correct|right|best))")
+# The reply opens with the letter: "B", "B.", "(B)", "**B**", "B) MOVE ...", "B - because ..."
+LEADING_LETTER = re.compile(r"\s*(?:\*\*)?\(?([ABCD])(?:\)|\*\*|[.:,]|[ \t]*(?:\n|\Z)|\s+[-–—(])")
+# A whole reply that is only a lower-case letter: "b", "(c)", "d."
+BARE_LOWER = re.compile(r"\s*\(?([abcd])\)?\.?\s*\Z")
+# Any standalone capital letter, except "A" used as an article ("A program ...")
+STANDALONE_LETTER = re.compile(r"\b([BCD]|A(?!\s+[a-z]))\b")
+WHITESPACE = re.compile(r"\s+")
+
+MIN_OPTION_CHARS = 4  # Shorter option texts ("Yes", "2") occur in explanations by chance
+
+class Extraction(NamedTuple):
+    letter: str    # "" when nothing was found
+    strategy: str  # one of STRATEGIES, or "none"
+
+STRATEGIES = ('explicit', 'leading', 'option_text', 'standalone')
+NO_ANSWER = Extraction("", 'none')
+
+def _normalize(text: str) -> str:
+    return WHITESPACE.sub(' ', text).strip().lower().rstrip('.')
+
+def match_option_text(response: str, options: Dict) -> str:
+    """The one option whose text the response quotes, or "" when none or several do"""
+    texts = {letter: _normalize(str(options.get(letter) or '')) for letter in LETTERS}
+    texts = {letter: text for letter, text in texts.items() if len(text) >= MIN_OPTION_CHARS}
+    if not texts:
+        return ""
+    haystack = _normalize(response)
+    found = [letter for letter, text in texts.items() if text in haystack]
+    # An option quoted only as part of a longer quoted option ("MOVE" in "MOVE CORRESPONDING") does not count
+    found = [letter for letter in found
+             if not any(texts[letter] in texts[other] and texts[letter] != texts[other]
+                        for other in found if other != letter)]
+    return found[0] if len(found) == 1 else ""
+
+def _explicit_answer(response: str) -> Optional['re.Match']:
+    """First EXPLICIT_ANSWER match, tried only where a keyword occurs
+
+    Finding the keywords with str.find on a lowered copy and anchoring the
+    pattern there is several times faster than a case-insensitive search
+    over the whole of a long response.
+    """
+    lowered = response.lower()
+    if len(lowered) != len(response):  # Some characters lower to several; offsets would not line up
+        return EXPLICIT_ANSWER.search(response)
+    hits = []
+    for keyword in EXPLICIT_KEYWORDS:
+        pos = lowered.find(keyword)
+        while pos != -1:
+            hits.append(pos)
+            pos = lowered.find(keyword, pos + 1)
+    for pos in sorted(hits):
+        match = EXPLICIT_ANSWER.match(response, pos)
+        if match:
+            return match
+    return None
+
+def extract_answer(response: str, options: Optional[Dict] = None) -> Extraction:
+    """Extract the chosen letter from a model response, trying strategies in rank order
+
+    options is the dataset example (or any mapping with A-D option texts) and
+    enables matching a reply that restates an option instead of its letter.
+    """
+    if not response:
+        return NO_ANSWER
+
+    match = _explicit_answer(response)
+    if match:
+        return Extraction(next(letter for letter in match.groups() if letter).upper(), 'explicit')
+
+    match = LEADING_LETTER.match(response) or BARE_LOWER.match(response)
+    if match:
+        return Extraction(match.group(1).upper(), 'leading')
+
+    if options:
+        letter = match_option_text(response, options)
+        if letter:
+            return Extraction(letter, 'option_text')
+
+    match = STANDALONE_LETTER.search(response)
+    if match:
+        return Extraction(match.group(1), 'standalone')
+    return NO_ANSWER
+
+def extract_mcq_answer(response: str, options: Optional[Dict] = None) -> str:
+    """Just the letter, for callers that do not track the strategy"""
+    return extract_answer(response, options).letter
+
+def legacy_extract(response: str) -> str:
+    """The extractor this module replaced, kept for the benchmark comparison"""
+    matches = re.findall(r'\b([ABCD])\b', response.upper())
+    return matches[0] if matches else ""
+
+def benchmark_responses(count: int, seed: int = 0):
+    """Labelled synthetic replies in the shapes seen from chat models, short and long"""
+    rng = random.Random(seed)
+    filler = ("a COBOL paragraph is performed until the record is found and the data is moved to a working "
+              "storage field before the file is closed").split()
+    options = {letter: f"{rng.choice(['MOVE', 'PERFORM', 'COMPUTE'])} {letter.lower()}-clause {i}"
+               for i, letter in enumerate(LETTERS)}
+    shapes = [
+        lambda letter: letter,
+        lambda letter: f"{letter}) {options[letter]}",
+        lambda letter: f"**{letter}**\n\n" + " ".join(rng.choices(filler, k=300)),
+        lambda letter: ("Looking at A) first: " + " ".join(rng.choices(filler, k=400)) +
+                        f" so the answer is {letter}."),
+        lambda letter: " ".join(rng.choices(filler, k=200)) + f" The correct option is {options[letter]}.",
+    ]
+    cases = []
+    for _ in range(count):
+        letter = rng.choice(LETTERS)
+        cases.append((rng.choice(shapes)(letter), letter, options))
+    return cases
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCQ answer extraction")
+    parser.add_argument('--responses', type=int, default=20000)
+    args = parser.parse_args()
+
+    cases = benchmark_responses(args.responses)
+    for name, extract in (('legacy', lambda response, options: legacy_extract(response)),
+                          ('ranked', extract_mcq_answer)):
+        start = time.perf_counter()
+        predicted = [extract(response, options) for response, _, options in cases]
+        elapsed = time.perf_counter() - start
+        accuracy = sum(p == letter for p, (_, letter, _) in zip(predicted, cases)) / len(cases)
+        print(f"{name:>7}: {elapsed / len(cases) * 1e6:6.1f} us/response, accuracy {accuracy:.3f}")
+
+    strategies = {}
+    for response, _, options in cases:
+        strategy = extract_answer(response, options).strategy
+        strategies[strategy] = strategies.get(strategy, 0) + 1
+    print("Strategies: " + ", ".join(f"{name}={count}" for name, count in sorted(strategies.items())))
+
+if __name__ == "__main__":
+    main()
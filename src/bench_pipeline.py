@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Evaluation Pipeline Benchmark
+Runs each evaluator end to end over a synthetic MainframeBench snapshot
+against the stub Q CLI (stub_q.py) with fixed latencies, one fresh interpreter
+per scenario. Reports items/second, p50/p95/p99 per stage, peak RSS and
+startup time, and saves or checks a JSON baseline so regressions show up
+as a failing exit code.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STUB_Q = os.path.join(SRC_DIR, 'stub_q.py')
+
+SCENARIOS = ('full_scale', 'full_scale_pool', 'complete', 'run_full_eval', 'bleu')  # _pool: stub serve mode only
+STAGES = ('query', 'extract', 'score', 'corpus_bleu')
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.002  # Smaller p95 shifts on sub-millisecond stages are timer noise
+
+def synthetic_rows(items: int, seed: int = 0) -> Dict[str, List[Dict]]:
+    """Deterministic MCQ, QA and code rows shaped like MainframeBench"""
+    rng = random.Random(seed)
+    words = ("MOVE PERFORM COMPUTE record file paragraph section copybook VSAM JCL the data is "
+             "read until end of file and written to the output dataset").split()
+    text = lambda low, high: " ".join(rng.choices(words, k=rng.randint(low, high)))
+    return {
+        'multiple_choice_question': [{'question': f"{text(8, 20)}? ({i})", 'A': text(1, 4), 'B': text(1, 4),
+                                      'C': text(1, 4), 'D': text(1, 4), 'answer': rng.choice('ABCD')}
+                                     for i in range(items)],
+        'question_answering': [{'question': f"{text(6, 15)}? ({i})", 'answer': text(10, 80)}
+                               for i in range(items)],
+        'COBOL_code_summarization': [{'source': f"PROCEDURE DIVISION.\n    DISPLAY '{i}'.\n" + text(20, 120),
+                                      'summary': text(5, 25)} for i in range(items)],
+    }
+
+def percentiles(samples: List[float]) -> Dict:
+    if not samples:
+        return {'count': 0}
+    if len(samples) == 1:
+        cuts = samples * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'count': len(samples), 'mean': statistics.fmean(samples),
+            'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+def peak_rss_mb() -> float:
+    """This process's peak resident set size
+
+    VmHWM is reset by exec; ru_maxrss can carry over the high-water mark of
+    the parent that spawned us, so it is only the fallback.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+def timed(obj, name: str, samples: List[float]):
+    """Shadow obj.name with a wrapper that appends each call's duration to samples"""
+    method = getattr(obj, name)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    setattr(obj, name, wrapper)
+
+def run_child(scenario: str, items: int, max_in_flight: int, workdir: str, launched_at: float) -> Dict:
+    """Run one scenario in this (fresh) interpreter and return its measurements"""
+    from model_backends import AsyncQClient
+    from q_worker_pool import QWorkerPool
+    from concurrency_controller import shared_concurrency_controller
+
+    stages = {stage: [] for stage in STAGES}
+
+    class StubBackend(AsyncQClient):
+        """The stub CLI with no limiter or cache, timing every query; adaptive with ADAPTIVE_CONCURRENCY=1"""
+        async def query(self, prompt, timeout=None):
+            start = time.perf_counter()
+            try:
+                return await super().query(prompt, timeout)
+            finally:
+                stages['query'].append(time.perf_counter() - start)
+
+    pool = None
+    if scenario == 'full_scale_pool':
+        pool = QWorkerPool((sys.executable, STUB_Q, 'serve'), size=max_in_flight)
+    backend = StubBackend(args=(sys.executable, STUB_Q, 'chat'), timeout=60, pool=pool,
+                          concurrency=shared_concurrency_controller())
+
+    if scenario in ('full_scale', 'full_scale_pool'):
+        from full_scale_evaluator import FullScaleCOBOLEvaluator
+        evaluator = FullScaleCOBOLEvaluator(max_in_flight=max_in_flight, backend=backend)
+        evaluator.results_dir = evaluator.bleu_evaluator.checkpoint_dir = workdir
+        timed(evaluator, 'extract_mcq_choice', stages['extract'])
+        timed(evaluator, 'assess_qa_quality', stages['score'])
+        timed(evaluator.bleu_evaluator, 'extract_summary', stages['extract'])
+        run, processed = evaluator.run_full_scale_evaluation, 3 * items
+    elif scenario == 'complete':
+        from complete_cobol_evaluator import CompleteCOBOLEvaluator
+        evaluator = CompleteCOBOLEvaluator(sample_size=items, backend=backend)
+        timed(evaluator, 'extract_mcq_answer', stages['extract'])
+        timed(evaluator, 'assess_qa_quality', stages['score'])
+        timed(evaluator.bleu_evaluator, 'extract_summary', stages['extract'])
+        run, processed = evaluator.run_complete_evaluation, 3 * items
+    elif scenario == 'run_full_eval':
+        from run_full_eval import FullCOBOLEvaluator
+        os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+        os.chdir(workdir)  # It writes to data/ relative to the working directory
+        evaluator = FullCOBOLEvaluator(backend=backend)
+        timed(evaluator, 'extract_mcq_answer', stages['extract'])
+        run, processed = (lambda: evaluator.run_full_evaluation(batch_size=50)), items
+    elif scenario == 'bleu':
+        from bleu_evaluator import SecureBLEUEvaluator
+        evaluator = SecureBLEUEvaluator(sample_size=items, max_in_flight=max_in_flight, checkpoint_dir=workdir,
+                                        backend=backend)
+        timed(evaluator, 'extract_summary', stages['extract'])
+        timed(evaluator, 'calculate_bleu_score', stages['corpus_bleu'])
+        def run():
+            evaluator.evaluate_code_summarization()
+            # The offline metric pass rescore.py runs, over the same responses
+            from response_store import ResponseStore
+            from dataset_snapshot import load_mainframebench
+            store = ResponseStore.for_results_dir(workdir)
+            responses = [response for _, response in store.iter_task('code')]
+            store.close()
+            references = [row['summary'] for row in load_mainframebench('COBOL_code_summarization')][:items]
+            evaluator.calculate_bleu_score([evaluator.extract_summary(r) for r in responses], references)
+        processed = items
+    else:
+        raise ValueError(f"unknown scenario: {scenario!r}")
+
+    startup = time.time() - launched_at  # Interpreter, imports and evaluator construction
+    start = time.perf_counter()
+    run()
+    wall = time.perf_counter() - start
+    if pool is not None:
+        from q_client import run_sync
+        run_sync(pool.close())
+
+    return {
+        'items': processed,
+        'wall_seconds': wall,
+        'items_per_second': processed / wall if wall > 0 else 0.0,
+        'startup_seconds': startup,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': {stage: percentiles(samples) for stage, samples in stages.items() if samples},
+    }
+
+def run_scenario(scenario: str, items: int, latency: float, startup: float, max_in_flight: int,
+                 snapshot_dir: str, verbose: bool = False) -> Dict:
+    """Run a scenario in a fresh interpreter with the stub's fixed latencies"""
+    with tempfile.TemporaryDirectory() as workdir:
+        result_file = os.path.join(workdir, 'result.json')
+        env = dict(os.environ, PYTHONPATH=SRC_DIR, MAINFRAMEBENCH_SNAPSHOT=snapshot_dir, Q_RESPONSE_CACHE='',
+                   STUB_Q_LATENCY_SECONDS=str(latency), STUB_Q_STARTUP_SECONDS=str(startup),
+                   METRIC_MIN_PARALLEL_ITEMS='1000000000')  # Keep metric work in-process so it is timed
+        command = [sys.executable, os.path.abspath(__file__), '--child', scenario, '--items', str(items),
+                   '--max-in-flight', str(max_in_flight), '--workdir', workdir, '--result-file', result_file,
+                   '--launched-at', repr(time.time())]
+        output = None if verbose else subprocess.DEVNULL
+        subprocess.run(command, cwd=SRC_DIR, env=env, check=True, stdout=output, stderr=output)
+        with open(result_file) as f:
+            return json.load(f)
+
+def find_regressions(current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Human-readable regressions of current against baseline, beyond tolerance"""
+    regressions = []
+    for scenario, base in baseline['scenarios'].items():
+        now = current['scenarios'].get(scenario)
+        if now is None:
+            continue
+        if now['items_per_second'] < base['items_per_second'] * (1 - tolerance):
+            regressions.append(f"{scenario}: throughput {now['items_per_second']:.2f} items/s "
+                               f"vs baseline {base['items_per_second']:.2f}")
+        for key, label in (('startup_seconds', 'startup'), ('peak_rss_mb', 'peak RSS')):
+            if now[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{scenario}: {label} {now[key]:.2f} vs baseline {base[key]:.2f}")
+        for stage, base_stage in base['stages'].items():
+            now_stage = now['stages'].get(stage)
+            if not now_stage or not base_stage.get('count'):
+                continue
+            if (now_stage['p95'] > base_stage['p95'] * (1 + tolerance) and
+                    now_stage['p95'] - base_stage['p95'] > MIN_REGRESSION_SECONDS):
+                regressions.append(f"{scenario}: {stage} p95 {now_stage['p95'] * 1000:.1f}ms "
+                                   f"vs baseline {base_stage['p95'] * 1000:.1f}ms")
+    return regressions
+
+def run_suite(scenarios, items: int, latency: float, startup: float, max_in_flight: int,
+              verbose: bool = False) -> Dict:
+    from dataset_snapshot import write_snapshot
+
+    report = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'config': {'items': items, 'stub_latency_seconds': latency, 'stub_startup_seconds': startup,
+                   'max_in_flight': max_in_flight},
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'scenarios': {},
+    }
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        for config, rows in synthetic_rows(items).items():
+            write_snapshot(config, rows, snapshot_dir)
+        for scenario in scenarios:
+            report['scenarios'][scenario] = run_scenario(scenario, items, latency, startup, max_in_flight,
+                                                         snapshot_dir, verbose)
+    return report
+
+def print_report(report: Dict):
+    print(f"{'scenario':<16} {'items/s':>8} {'wall':>7} {'startup':>8} {'peak RSS':>9}   stage p50/p95/p99 (ms)")
+    print("-" * 100)
+    for scenario, result in report['scenarios'].items():
+        stages = "  ".join(f"{stage} {s['p50'] * 1000:.1f}/{s['p95'] * 1000:.1f}/{s['p99'] * 1000:.1f}"
+                           for stage, s in result['stages'].items())
+        print(f"{scenario:<16} {result['items_per_second']:>8.2f} {result['wall_seconds']:>6.2f}s "
+              f"{result['startup_seconds']:>7.2f}s {result['peak_rss_mb']:>7.1f}MB   {stages}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation pipeline against the stub Q CLI")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="repeatable (default: all)")
+    parser.add_argument('--items', type=int, default=40, help="items per task")
+    parser.add_argument('--latency', type=float, default=0.02, help="stub model seconds per prompt")
+    parser.add_argument('--startup', type=float, default=0.0, help="stub session start-up seconds per process")
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--save-baseline', help="write the report as the baseline to compare later runs with")
+    parser.add_argument('--baseline', help="compare against a saved baseline; exit 1 on regression")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a metric counts as regressed")
+    parser.add_argument('--verbose', action='store_true', help="show evaluator output")
+    # Internal: run one scenario in this interpreter
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    parser.add_argument('--launched-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_child(args.child, args.items, args.max_in_flight, args.workdir, args.launched_at)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+
+    report = run_suite(args.scenario or SCENARIOS, args.items, args.latency, args.startup, args.max_in_flight,
+                       args.verbose)
+    print_report(report)
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report saved to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['config'] != report['config']:
+            print(f"Warning: baseline config {baseline['config']} differs from this run's {report['config']}")
+        regressions = find_regressions(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Evaluator Startup Benchmark
+Measures cold-start time in fresh interpreters: module import, the CLI --help
+path, and constructing the full-scale evaluator up to the point where the
+first Q CLI query could be sent (dataset download excluded)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = {
+    'import bleu_evaluator': ['-c', 'import bleu_evaluator'],
+    'import full_scale_evaluator': ['-c', 'import full_scale_evaluator'],
+    'import complete_cobol_evaluator': ['-c', 'import complete_cobol_evaluator'],
+    'full_scale_evaluator.py --help': [os.path.join(SRC_DIR, 'full_scale_evaluator.py'), '--help'],
+    'ready to query (full scale)': ['-c', 'import full_scale_evaluator, tempfile; '
+                                    'full_scale_evaluator.RESULTS_ROOT = tempfile.mkdtemp(); '
+                                    'full_scale_evaluator.FullScaleCOBOLEvaluator()'],
+}
+
+# Heavy dependencies the evaluators now defer until they are actually needed
+DEFERRED = {
+    'import datasets': ['-c', 'import datasets'],
+    'import sacrebleu': ['-c', 'import sacrebleu'],
+    'import numpy': ['-c', 'import numpy'],
+}
+
+def time_command(args, repeats: int) -> float:
+    """Median wall-clock seconds to run a fresh interpreter with args"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, Q_RESPONSE_CACHE='')
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=SRC_DIR, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evaluator cold-start time")
+    parser.add_argument('--repeats', type=int, default=5, help="fresh interpreters per scenario")
+    parser.add_argument('--deferred', action='store_true',
+                        help="also time the heavy imports that are now deferred, for comparison")
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS)
+    if args.deferred:
+        scenarios.update(DEFERRED)
+
+    baseline = time_command(['-c', 'pass'], args.repeats)
+    print(f"{'scenario':<36} {'median':>8} {'over bare python':>17}")
+    print("-" * 63)
+    for name, command in scenarios.items():
+        elapsed = time_command(command, args.repeats)
+        print(f"{name:<36} {elapsed:>7.3f}s {elapsed - baseline:>16.3f}s")
+    print(f"{'bare python':<36} {baseline:>7.3f}s")
+
+if __name__ == "__main__":
+    main()
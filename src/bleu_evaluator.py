@@ -5,19 +5,33 @@ Implements secure BLEU scoring following XMainframe paper methodology
 """
 import re
 import json
-import subprocess
-import time
 from typing import Dict, List, Tuple, Optional
-from datasets import load_dataset
-import sacrebleu
-from evaluate import load
+from query_engine import ConcurrentQueryEngine, DEFAULT_MAX_IN_FLIGHT
+from q_client import run_sync
+from model_backends import ModelBackend, default_backend, register_references
+from checkpoint_store import TaskCheckpoint
+from sharding import ShardSpec
+from bleu_stats import BLEUStats
+from parallel_metrics import extract_and_count, parallel_sentence_stats
+from instrumentation import DATASET_LOAD, EXTRACT, SCORE, stage
+from metrics_server import shared_metrics
+from progress import ProgressReporter
+from dataset_snapshot import load_mainframebench
+from prompts import render_jobs, render_prompt
 
 class SecureBLEUEvaluator:
-    def __init__(self, sample_size: int = 50):
+    def __init__(self, sample_size: int = 50, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 checkpoint_dir: Optional[str] = None, resume: bool = False,
+                 shard: Optional[ShardSpec] = None, backend: Optional[ModelBackend] = None):
         self.sample_size = sample_size
-        self.bleu_metric = load("bleu")
+        self.shard = shard or ShardSpec()
+        self.checkpoint_dir = checkpoint_dir  # Per-item progress is only kept when set
+        self.resume = resume
+        self.backend = backend or default_backend(timeout=30, cwd='/tmp')  # Secure working directory
+        self.query_engine = ConcurrentQueryEngine(self.aquery_amazon_q, max_in_flight)
         
-    def sanitize_input(self, text: str) -> str:
+    @staticmethod
+    def sanitize_input(text: str) -> str:
         """Sanitize input to prevent injection attacks"""
         if not isinstance(text, str):
             return ""
@@ -26,45 +40,27 @@ class SecureBLEUEvaluator:
         # Limit length to prevent DoS
         return text[:2000].strip()
     
-    def query_amazon_q(self, prompt: str) -> str:
-        """Query Amazon Q CLI with security controls"""
+    async def aquery_amazon_q(self, prompt: str) -> str:
+        """Query Amazon Q CLI asynchronously with security controls"""
         try:
             sanitized_prompt = self.sanitize_input(prompt)
             if not sanitized_prompt:
-            result = subprocess.run(
-                ['q', 'chat', '--no-input-file', '--'],
-                input=sanitized_prompt,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd='/tmp'  # Secure working directory
-            )
-            return result.stdout.strip() if result.returncode == 0 else ""
+                return ""
+            return await self.backend.query(sanitized_prompt)
         except Exception as e:
             print(f"Error querying Amazon Q: {e}")
             return ""
     
+    def query_amazon_q(self, prompt: str) -> str:
+        """Query Amazon Q CLI with security controls"""
+        return run_sync(self.aquery_amazon_q(prompt))
+    
     def calculate_bleu_score(self, predictions: List[str], references: List[str]) -> Dict:
-        """Calculate BLEU score using multiple methods for validation"""
+        """Calculate corpus BLEU with both the Hugging Face and sacrebleu conventions"""
         try:
-            # Method 1: Using evaluate library (Hugging Face)
-            hf_results = self.bleu_metric.compute(
-                predictions=predictions,
-                references=[[ref] for ref in references]
-            )
-            
-            # Method 2: Using sacrebleu for validation
-            sacre_score = sacrebleu.corpus_bleu(predictions, [references])
-            
-            return {
-                'bleu_hf': hf_results['bleu'],
-                'bleu_sacre': sacre_score.score / 100.0,  # Convert to 0-1 scale
-                'precisions': hf_results.get('precisions', []),
-                'brevity_penalty': hf_results.get('brevity_penalty', 0),
-                'length_ratio': hf_results.get('length_ratio', 0),
-                'translation_length': hf_results.get('translation_length', 0),
-                'reference_length': hf_results.get('reference_length', 0)
-            }
+            # One pass of n-gram statistics serves both scores (see bleu_stats), chunked across
+            # processes for large corpora
+            return BLEUStats(parallel_sentence_stats(predictions, references).sum(axis=0)).score()
         except Exception as e:
             print(f"Error calculating BLEU: {e}")
             return {'bleu_hf': 0.0, 'bleu_sacre': 0.0}
@@ -74,64 +70,101 @@ class SecureBLEUEvaluator:
         print("Loading COBOL Code Summarization dataset...")
         
         try:
-            dataset = load_dataset("Fsoft-AIC/MainframeBench", "COBOL_code_summarization")
-            data = dataset['train'].select(range(min(self.sample_size, len(dataset['train']))))
+            with stage(DATASET_LOAD):
+                dataset = load_mainframebench("COBOL_code_summarization")
+            data = dataset.select(range(min(self.sample_size, len(dataset))))
         except Exception as e:
             print(f"Error loading dataset: {e}")
             return {'error': 'Failed to load dataset'}
         
-        predictions = []
-        references = []
+        bleu_stats = BLEUStats()  # Sufficient statistics only, so texts are not held in memory
+        total_samples = 0
         results = []
         
-        for i, example in enumerate(data):
-            print(f"Code Summarization {i+1}/{len(data)}")
-            
-            # Create prompt for code summarization
-            cobol_code = example.get('code', '')
-            reference_summary = example.get('summary', '')
-            
-            if not cobol_code or not reference_summary:
-                continue
-                
-            prompt = f"""Please provide a concise summary of this COBOL code:
-            # Limit code length for security
-            truncated_code = cobol_code[:1000]
-            prompt = f"""Please provide a concise summary of this COBOL code:
-
-```cobol
-{truncated_code}
-
-Provide only the summary, no additional explanation."""
-            
-            response = self.query_amazon_q(prompt)
-            predicted_summary = self.extract_summary(response)
-            
-            predictions.append(predicted_summary)
-            references.append(reference_summary)
+        checkpoint = None
+        if self.checkpoint_dir:
+            checkpoint = TaskCheckpoint('code', self.checkpoint_dir, resume=self.resume)
+            if checkpoint.completed:
+                print(f"Resuming Code Summarization: {len(checkpoint.completed)} items already finished, "
+                      f"{checkpoint.failed} failed calls to retry")
+        replay = (lambda key: checkpoint.replay(key[0])) if checkpoint else None
+        metrics = shared_metrics()
+        metrics.start_task('code', self.shard.size(len(data)))
+        # Replayed items count as done up front so they do not inflate the rate or shrink the ETA
+        progress = ProgressReporter('code', self.shard.size(len(data)),
+                                    initial=len(checkpoint.completed) if checkpoint else 0)
+        
+        register_references(self.backend, ((self.sanitize_input(render_prompt('code_summary', {'source': cobol_code})),
+                                            reference_summary)
+                                           for _, cobol_code, reference_summary in self.iter_code_items(data)))
+        jobs, prompt_index = render_jobs(lambda: (((i, cobol_code, reference_summary), {'source': cobol_code})
+                                                  for i, cobol_code, reference_summary in self.iter_code_items(data)),
+                                         'code_summary')
+        print(f"Code Summarization prompts: {prompt_index.unique} unique of {prompt_index.total}")
+        
+        for (i, cobol_code, reference_summary), response in self.query_engine.run(jobs, replay=replay,
+                                                                                  dedup=prompt_index):
+            with stage(EXTRACT):
+                predicted_summary = self.extract_summary(response)
             
-            results.append({
-                'code_snippet': cobol_code[:200] + "..." if len(cobol_code) > 200 else cobol_code,
-                'reference_summary': reference_summary,
-                'predicted_summary': predicted_summary,
-                'response': response
-            })
+            with stage(SCORE):
+                bleu_stats.add(predicted_summary, reference_summary)
+            total_samples += 1
+            replayed = checkpoint is not None and i in checkpoint.completed
+            if checkpoint:
+                checkpoint.record(i, response, predicted_summary=predicted_summary,
+                                  reference_summary=reference_summary)
+            metrics.item_completed('code')
+            progress.update(0 if replayed else 1)
             
-            time.sleep(1)  # Rate limiting
+            if len(results) < 5:  # Only keep the first 5 for security
+                results.append({
+                    'code_snippet': cobol_code[:200] + "..." if len(cobol_code) > 200 else cobol_code,
+                    'reference_summary': reference_summary,
+                    'predicted_summary': predicted_summary,
+                    'response': response
+                })
         
-        # Calculate BLEU scores
-        bleu_results = self.calculate_bleu_score(predictions, references)
+        progress.close()
+        if checkpoint:
+            checkpoint.close()
+        
+        code_results = self.build_code_results(bleu_stats, total_samples, results)
+        code_results['prompt_dedup'] = prompt_index.stats()
+        return code_results
+    
+    def score_responses(self, responses: List[str], references: List[str]) -> Tuple[BLEUStats, List[str]]:
+        """Extract summaries from raw responses and count their BLEU statistics, in parallel for large inputs"""
+        stats, predictions = extract_and_count(responses, references, self.extract_summary)
+        return BLEUStats(stats.sum(axis=0)), predictions
+    
+    @staticmethod
+    def build_code_results(bleu_stats: BLEUStats, total_samples: int, detailed_results: List[Dict]) -> Dict:
+        """Assemble the code summarization result from corpus BLEU statistics"""
+        bleu_results = bleu_stats.score()
         
         return {
             'task': 'COBOL Code Summarization',
-            'total_samples': len(predictions),
+            'total_samples': total_samples,
             'bleu_scores': bleu_results,
             'primary_bleu': bleu_results.get('bleu_hf', 0.0),
             'validation_bleu': bleu_results.get('bleu_sacre', 0.0),
-            'detailed_results': results[:5]  # Only include first 5 for security
+            'bleu_stats': bleu_stats.to_list(),  # Lets shards be merged without their texts
+            'detailed_results': detailed_results
         }
     
-    def extract_summary(self, response: str) -> str:
+    def iter_code_items(self, data):
+        """Yield (index, code, reference summary) for this shard's examples that have both fields"""
+        for i, example in self.shard.iter_items(data):
+            cobol_code = example.get('source', '')
+            reference_summary = example.get('summary', '')
+            
+            if not cobol_code or not reference_summary:
+                continue
+            yield i, cobol_code, reference_summary
+    
+    @staticmethod
+    def extract_summary(response: str) -> str:
         """Extract summary from Amazon Q response"""
         if not response:
             return ""
@@ -146,7 +179,7 @@ Provide only the summary, no additional explanation."""
                 summary_lines.append(line)
         
         summary = ' '.join(summary_lines)
-        return self.sanitize_input(summary)
+        return SecureBLEUEvaluator.sanitize_input(summary)
 
 def main():
     """Run secure BLEU evaluation"""
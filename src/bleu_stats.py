@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Corpus BLEU Sufficient Statistics
+Corpus BLEU only depends on summed per-order n-gram match and total counts plus
+hypothesis and reference lengths, so shards and streaming runs can ship these
+ten integers instead of every prediction and reference
+"""
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, TYPE_CHECKING
+if TYPE_CHECKING:
+    import numpy as np  # Imported lazily at run time
+
+MAX_ORDER = 4
+STATS_WIDTH = 2 + 2 * MAX_ORDER  # hyp_len, ref_len, matches[1..4], totals[1..4]
+
+@lru_cache(maxsize=None)
+def _tokenizer():
+    # sacrebleu and numpy are imported on first use so importing the evaluators stays cheap
+    from sacrebleu.tokenizers.tokenizer_13a import Tokenizer13a
+    return Tokenizer13a()
+
+def tokenize(text: str) -> List[str]:
+    """13a tokenization shared by sacrebleu and the Hugging Face bleu metric
+
+    Trailing whitespace is stripped first as sacrebleu does; the two libraries
+    only disagree on text ending in a hyphenated line break.
+    """
+    return _tokenizer()(text.rstrip()).split()
+
+def ngram_counts(tokens: List[str]) -> Counter:
+    """Count all n-grams of order 1..MAX_ORDER"""
+    return Counter(tuple(tokens[i:i + n]) for n in range(1, MAX_ORDER + 1)
+                   for i in range(len(tokens) - n + 1))
+
+def sentence_stats(prediction: str, reference: str) -> List[int]:
+    """Sufficient statistics for one prediction against its single reference"""
+    hyp_tokens = tokenize(prediction)
+    ref_tokens = tokenize(reference)
+    ref_ngrams = ngram_counts(ref_tokens)
+
+    stats = [len(hyp_tokens), len(ref_tokens)] + [0] * (2 * MAX_ORDER)
+    for ngram, count in ngram_counts(hyp_tokens).items():
+        n = len(ngram) - 1
+        stats[2 + MAX_ORDER + n] += count
+        if ngram in ref_ngrams:
+            stats[2 + n] += min(count, ref_ngrams[ngram])
+    return stats
+
+def corpus_sentence_stats(predictions: List[str], references: List[str]) -> 'np.ndarray':
+    """Per-pair sufficient statistics for a whole corpus, one row per pair
+
+    Tokens are interned to integers and each n-gram gets a dense integer id by
+    pairing its (n-1)-gram prefix id with its last token, so n-gram matching is
+    a handful of NumPy sorts over the corpus instead of per-sentence Counters.
+    The ids are exact (no hashing collisions), so the counts equal
+    sentence_stats for every pair.
+    """
+    import numpy as np
+
+    n_pairs = len(predictions)
+    stats = np.zeros((n_pairs, STATS_WIDTH), dtype=np.int64)
+    if n_pairs == 0:
+        return stats
+
+    def flatten(texts):
+        tokens = []
+        lengths = []
+        for text in texts:
+            words = tokenize(text)
+            tokens.extend(words)
+            lengths.append(len(words))
+        return tokens, np.array(lengths, dtype=np.int64)
+
+    hyp_words, hyp_lens = flatten(predictions)
+    ref_words, ref_lens = flatten(references)
+    vocab = {token: i for i, token in enumerate(dict.fromkeys(hyp_words + ref_words))}
+    hyp_tokens = np.fromiter(map(vocab.__getitem__, hyp_words), dtype=np.int64, count=len(hyp_words))
+    ref_tokens = np.fromiter(map(vocab.__getitem__, ref_words), dtype=np.int64, count=len(ref_words))
+    hyp_pair = np.repeat(np.arange(n_pairs), hyp_lens)
+    ref_pair = np.repeat(np.arange(n_pairs), ref_lens)
+    stats[:, 0] = hyp_lens
+    stats[:, 1] = ref_lens
+
+    # gram[i] is the id of the n-gram starting at flat position i (for the current n)
+    hyp_gram, ref_gram = hyp_tokens, ref_tokens
+    n_grams = len(vocab)
+    for n in range(1, MAX_ORDER + 1):
+        if n > 1:
+            hyp_key = hyp_gram[:-1] * len(vocab) + hyp_tokens[n - 1:]
+            ref_key = ref_gram[:-1] * len(vocab) + ref_tokens[n - 1:]
+            unique_keys, gram_ids = np.unique(np.concatenate([hyp_key, ref_key]), return_inverse=True)
+            hyp_gram, ref_gram = gram_ids[:len(hyp_key)], gram_ids[len(hyp_key):]
+            n_grams = len(unique_keys)
+
+        # Only n-grams that do not cross a pair boundary count
+        hyp_valid = hyp_pair[:len(hyp_gram)] == hyp_pair[n - 1:]
+        ref_valid = ref_pair[:len(ref_gram)] == ref_pair[n - 1:]
+        hyp_keys, hyp_counts = np.unique(hyp_pair[:len(hyp_gram)][hyp_valid] * n_grams + hyp_gram[hyp_valid],
+                                         return_counts=True)
+        ref_keys, ref_counts = np.unique(ref_pair[:len(ref_gram)][ref_valid] * n_grams + ref_gram[ref_valid],
+                                         return_counts=True)
+        common, hyp_idx, ref_idx = np.intersect1d(hyp_keys, ref_keys, assume_unique=True, return_indices=True)
+        clipped = np.minimum(hyp_counts[hyp_idx], ref_counts[ref_idx])
+
+        stats[:, 1 + n] = np.bincount(common // max(n_grams, 1), weights=clipped, minlength=n_pairs)
+        stats[:, 1 + MAX_ORDER + n] = np.maximum(hyp_lens - n + 1, 0)
+    return stats
+
+class BLEUStats:
+    """Additive corpus BLEU statistics with an exact reducer"""
+
+    def __init__(self, counts: Iterable[int] = None):
+        self.counts = [int(c) for c in counts] if counts is not None else [0] * STATS_WIDTH
+        if len(self.counts) != STATS_WIDTH:
+            raise ValueError(f"expected {STATS_WIDTH} BLEU statistics, got {len(self.counts)}")
+
+    def add(self, prediction: str, reference: str) -> List[int]:
+        """Fold one prediction/reference pair in and return its sentence statistics"""
+        stats = sentence_stats(prediction, reference)
+        self.counts = [a + b for a, b in zip(self.counts, stats)]
+        return stats
+
+    def merge(self, other: 'BLEUStats') -> 'BLEUStats':
+        """Combine statistics from another shard or worker"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    @classmethod
+    def from_corpus(cls, predictions: List[str], references: List[str]) -> 'BLEUStats':
+        return cls(corpus_sentence_stats(predictions, references).sum(axis=0))
+
+    def to_list(self) -> List[int]:
+        return list(self.counts)
+
+    def score(self) -> Dict:
+        """Corpus BLEU from the statistics, in calculate_bleu_score's format
+
+        bleu_hf follows the Hugging Face bleu metric (no smoothing) and bleu_sacre
+        follows sacrebleu.corpus_bleu (exp smoothing), each using its library's
+        own arithmetic so the results are identical, not merely close.
+        """
+        hyp_len, ref_len = self.counts[0], self.counts[1]
+        matches = self.counts[2:2 + MAX_ORDER]
+        totals = self.counts[2 + MAX_ORDER:]
+
+        # Hugging Face bleu (tensorflow/nmt compute_bleu)
+        precisions = [m / t if t > 0 else 0.0 for m, t in zip(matches, totals)]
+        if min(precisions) > 0:
+            geo_mean = math.exp(sum((1. / MAX_ORDER) * math.log(p) for p in precisions))
+        else:
+            geo_mean = 0
+        ratio = hyp_len / ref_len if ref_len else 0.0
+        if ratio > 1.0:
+            brevity_penalty = 1.
+        else:
+            brevity_penalty = math.exp(1 - 1. / ratio) if ratio > 0 else 0.0
+
+        return {
+            'bleu_hf': geo_mean * brevity_penalty,
+            'bleu_sacre': self.sacrebleu_score() / 100.0,  # Convert to 0-1 scale
+            'precisions': precisions,
+            'brevity_penalty': brevity_penalty,
+            'length_ratio': ratio,
+            'translation_length': hyp_len,
+            'reference_length': ref_len
+        }
+
+    def sacrebleu_score(self) -> float:
+        """sacrebleu corpus BLEU (0-100) with its default exp smoothing"""
+        hyp_len, ref_len = self.counts[0], self.counts[1]
+        matches = self.counts[2:2 + MAX_ORDER]
+        totals = self.counts[2 + MAX_ORDER:]
+
+        bp = 1.0
+        if hyp_len < ref_len:
+            bp = math.exp(1 - ref_len / hyp_len) if hyp_len > 0 else 0.0
+        if not any(matches):
+            return 0.0
+
+        precisions = [0.0] * MAX_ORDER
+        smooth_mteval = 1.
+        for n in range(MAX_ORDER):
+            if totals[n] == 0:
+                break
+            if matches[n] == 0:
+                smooth_mteval *= 2
+                precisions[n] = 100. / (smooth_mteval * totals[n])
+            else:
+                precisions[n] = 100. * matches[n] / totals[n]
+        log_sum = sum(math.log(p) if p > 0 else -9999999999 for p in precisions)
+        return bp * math.exp(log_sum / MAX_ORDER)
+
+def reduce_stats(parts: Iterable) -> BLEUStats:
+    """Sum statistics from shards or workers, given as BLEUStats or plain lists"""
+    total = BLEUStats()
+    for part in parts:
+        total.merge(part if isinstance(part, BLEUStats) else BLEUStats(part))
+    return total
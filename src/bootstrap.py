@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Bootstrap Confidence Intervals and Paired Significance
+Resamples a run's per-item results (MCQ correctness, QA quality scores and
+per-sentence BLEU sufficient statistics) to put confidence intervals on the
+three task metrics, and compares two runs on the same items with a paired
+bootstrap. BLEU is recomputed from summed statistics rows, never from text,
+so thousands of resamples over the full dataset take seconds on one core.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict, Iterator, Optional, TYPE_CHECKING, Tuple
+from bleu_stats import MAX_ORDER, BLEUStats, corpus_sentence_stats
+from result_sink import read_jsonl
+if TYPE_CHECKING:
+    import numpy as np  # Imported lazily at run time
+
+DEFAULT_RESAMPLES = int(os.environ.get('BOOTSTRAP_RESAMPLES', '1000'))
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_SEED = 12345
+RESAMPLES_PER_BATCH = 100  # Bounds the (batch, items, stats) gather to a few tens of MB
+
+# Published per-metric results with no per-item data, checked against our interval instead
+PUBLISHED_BASELINES = {
+    'mcq_accuracy': {'xmainframe_instruct': 0.7789, 'gpt35': 0.7456},
+    'bleu_score': {'xmainframe_instruct': 0.1139, 'gpt35': 0.12},
+}
+
+def mean_metric(sums: 'np.ndarray', n: int) -> 'np.ndarray':
+    return sums[:, 0] / n
+
+def bleu_metric(sums: 'np.ndarray', n: int) -> 'np.ndarray':
+    """Hugging Face BLEU (the primary score) for each row of summed statistics, as BLEUStats.score"""
+    import numpy as np
+
+    hyp_len, ref_len = sums[:, 0], sums[:, 1]
+    matches, totals = sums[:, 2:2 + MAX_ORDER], sums[:, 2 + MAX_ORDER:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precisions = np.where(totals > 0, matches / totals, 0.0)
+        geo_mean = np.where(precisions.min(axis=1) > 0,
+                            np.exp((np.log(precisions) / MAX_ORDER).sum(axis=1)), 0.0)
+        ratio = np.where(ref_len > 0, hyp_len / ref_len, 0.0)
+        brevity_penalty = np.where(ratio > 1.0, 1.0, np.where(ratio > 0, np.exp(1 - 1. / ratio), 0.0))
+    return geo_mean * brevity_penalty
+
+# metric name -> (task checkpoint, statistic over summed item rows)
+METRICS: Dict[str, Tuple[str, Callable]] = {
+    'mcq_accuracy': ('mcq', mean_metric),
+    'qa_quality': ('qa', mean_metric),
+    'bleu_score': ('code', bleu_metric),
+}
+
+def point_estimate(metric: str, rows: 'np.ndarray') -> float:
+    """The metric on the full sample, computed exactly as the evaluators report it"""
+    if metric == 'bleu_score':
+        return BLEUStats(rows.sum(axis=0)).score()['bleu_hf']
+    return sum(rows[:, 0].tolist()) / len(rows) if len(rows) else 0.0
+
+def resample_indices(n: int, resamples: int, seed: int) -> Iterator['np.ndarray']:
+    """Batches of bootstrap samples, each row n item indices drawn with replacement"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, resamples, RESAMPLES_PER_BATCH):
+        yield rng.integers(0, n, size=(min(RESAMPLES_PER_BATCH, resamples - start), n))
+
+def bootstrap_samples(rows: 'np.ndarray', statistic: Callable, resamples: int = DEFAULT_RESAMPLES,
+                      seed: int = DEFAULT_SEED, paired_rows: Optional['np.ndarray'] = None) -> 'np.ndarray':
+    """Metric value for each resample, or the paired difference rows - paired_rows on shared draws"""
+    import numpy as np
+
+    n = len(rows)
+    samples = []
+    for indices in resample_indices(n, resamples, seed):
+        values = statistic(rows[indices].sum(axis=1), n)
+        if paired_rows is not None:
+            values = values - statistic(paired_rows[indices].sum(axis=1), n)
+        samples.append(values)
+    return np.concatenate(samples) if samples else np.zeros(0)
+
+def percentile_interval(samples: 'np.ndarray', confidence: float) -> Tuple[float, float]:
+    import numpy as np
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(samples, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+def confidence_interval(metric: str, rows: 'np.ndarray', resamples: int = DEFAULT_RESAMPLES,
+                        confidence: float = DEFAULT_CONFIDENCE, seed: int = DEFAULT_SEED) -> Dict:
+    """Percentile bootstrap interval for one metric over its per-item rows"""
+    if len(rows) == 0:
+        return {'estimate': 0.0, 'items': 0}
+    samples = bootstrap_samples(rows, METRICS[metric][1], resamples, seed)
+    low, high = percentile_interval(samples, confidence)
+    interval = {
+        'estimate': point_estimate(metric, rows),
+        'ci_low': low,
+        'ci_high': high,
+        'std_error': float(samples.std(ddof=1)) if len(samples) > 1 else 0.0,
+        'confidence': confidence,
+        'resamples': resamples,
+        'items': len(rows),
+    }
+    baselines = PUBLISHED_BASELINES.get(metric)
+    if baselines:
+        # Outside the interval means the gap to the published number is not resampling noise
+        interval['published_baselines'] = {name: {'score': score, 'outside_ci': not low <= score <= high}
+                                           for name, score in baselines.items()}
+    return interval
+
+def paired_comparison(metric: str, rows: 'np.ndarray', baseline_rows: 'np.ndarray',
+                      resamples: int = DEFAULT_RESAMPLES, confidence: float = DEFAULT_CONFIDENCE,
+                      seed: int = DEFAULT_SEED) -> Dict:
+    """Paired bootstrap of metric(rows) - metric(baseline_rows) over the same items
+
+    The two-sided p-value counts resampled differences at least as far from
+    the observed difference as the observed difference is from zero
+    (Koehn 2004 with the shifted null).
+    """
+    import numpy as np
+
+    if len(rows) != len(baseline_rows):
+        raise ValueError(f"paired rows differ in length: {len(rows)} vs {len(baseline_rows)}")
+    if len(rows) == 0:
+        return {'difference': 0.0, 'items': 0}
+    estimate, baseline = point_estimate(metric, rows), point_estimate(metric, baseline_rows)
+    difference = estimate - baseline
+    samples = bootstrap_samples(rows, METRICS[metric][1], resamples, seed, paired_rows=baseline_rows)
+    low, high = percentile_interval(samples, confidence)
+    extreme = int(np.count_nonzero(np.abs(samples - difference) >= abs(difference)))
+    return {
+        'estimate': estimate,
+        'baseline': baseline,
+        'difference': difference,
+        'ci_low': low,
+        'ci_high': high,
+        'p_value': (extreme + 1) / (len(samples) + 1),
+        'confidence': confidence,
+        'resamples': resamples,
+        'items': len(rows),
+    }
+
+def load_item_rows(results_dir: str, task: str) -> Tuple['np.ndarray', 'np.ndarray']:
+    """(dataset indices, per-item rows) from a task's checkpoint stream, in dataset order
+
+    MCQ rows hold is_correct, QA rows the quality score and code rows the
+    sentence BLEU statistics of the stored prediction and reference.
+    """
+    import numpy as np
+
+    path = os.path.join(results_dir, f"{task}_items.jsonl")
+    records = {}
+    if os.path.exists(path):
+        for record in read_jsonl(path):
+            records[record['index']] = record
+    indices = sorted(records)
+    if task == 'code':
+        rows = corpus_sentence_stats([records[i]['predicted_summary'] for i in indices],
+                                     [records[i]['reference_summary'] for i in indices])
+    else:
+        field = 'is_correct' if task == 'mcq' else 'quality_score'
+        rows = np.array([[float(records[i][field])] for i in indices], dtype=np.float64).reshape(-1, 1)
+    return np.array(indices, dtype=np.int64), rows
+
+def confidence_intervals(results_dir: str, resamples: int = DEFAULT_RESAMPLES,
+                         confidence: float = DEFAULT_CONFIDENCE, seed: int = DEFAULT_SEED) -> Dict:
+    """Intervals for all three task metrics of the run in results_dir"""
+    return {metric: confidence_interval(metric, load_item_rows(results_dir, task)[1], resamples, confidence, seed)
+            for metric, (task, _) in METRICS.items()}
+
+def compare_runs(results_dir: str, baseline_dir: str, resamples: int = DEFAULT_RESAMPLES,
+                 confidence: float = DEFAULT_CONFIDENCE, seed: int = DEFAULT_SEED) -> Dict:
+    """Paired comparison of two runs on the items both of them finished"""
+    import numpy as np
+
+    comparison = {}
+    for metric, (task, _) in METRICS.items():
+        indices, rows = load_item_rows(results_dir, task)
+        baseline_indices, baseline_rows = load_item_rows(baseline_dir, task)
+        _, mine, theirs = np.intersect1d(indices, baseline_indices, assume_unique=True, return_indices=True)
+        comparison[metric] = paired_comparison(metric, rows[mine], baseline_rows[theirs],
+                                               resamples, confidence, seed)
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals and paired significance tests")
+    parser.add_argument('--results-dir', required=True, help="run directory holding {task}_items.jsonl")
+    parser.add_argument('--baseline-dir', help="second run to compare against on shared items")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help="write the report as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = {'confidence_intervals': confidence_intervals(args.results_dir, args.resamples,
+                                                           args.confidence, args.seed)}
+    for metric, interval in report['confidence_intervals'].items():
+        if interval['items']:
+            print(f"{metric}: {interval['estimate']:.4f} "
+                  f"[{interval['ci_low']:.4f}, {interval['ci_high']:.4f}] ({interval['items']} items)")
+
+    if args.baseline_dir:
+        report['paired_comparison'] = compare_runs(args.results_dir, args.baseline_dir, args.resamples,
+                                                   args.confidence, args.seed)
+        for metric, result in report['paired_comparison'].items():
+            if result['items']:
+                print(f"{metric}: {result['difference']:+.4f} vs baseline "
+                      f"[{result['ci_low']:+.4f}, {result['ci_high']:+.4f}], p={result['p_value']:.4f}")
+    print(f"{args.resamples} resamples in {time.perf_counter() - start:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
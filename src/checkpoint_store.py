@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Durable per-item checkpoints for resumable evaluation runs
+Each task streams one JSON line per finished item (dataset index plus the raw
+response) so a restarted pod can replay finished items and rebuild every
+aggregate exactly instead of querying the model again. Every response also
+goes to the run's compressed raw response store for offline re-scoring.
+An empty response is a failed call (timeout or non-zero exit): it counts in
+the run that made it, but a resumed run drops it and asks the model again.
+The retried items are written last, and the stream is put back in dataset
+order when the checkpoint closes.
+"""
+import json
+import os
+from typing import Dict, Optional
+from result_sink import JsonlResultSink
+from response_store import ResponseStore
+from instrumentation import CHECKPOINT_WRITE, shared_instrumentation
+
+DEFAULT_FLUSH_EVERY = int(os.environ.get('CHECKPOINT_FLUSH_EVERY', '25'))
+
+class TaskCheckpoint:
+    def __init__(self, task: str, results_dir: str = '/results', resume: bool = False,
+                 flush_every: int = DEFAULT_FLUSH_EVERY, keep_raw: bool = True):
+        self.task = task
+        self.path = os.path.join(results_dir, f"{task}_items.jsonl")
+
+        # Finished items are indexed by byte offset; their responses are re-read on demand
+        self.failed = 0  # Failed items dropped on resume, to be queried again
+        self.completed: Dict[int, int] = self._load() if resume else {}
+        self.recorded = set()
+        # Retried items are appended after later ones, so close() restores index order
+        self.last_index = max(self.completed, default=-1)
+        self.unordered = False
+        self.reader = open(self.path, 'rb') if self.completed else None
+        # Items lost from the unflushed batch on a crash are simply queried again
+        self.sink = JsonlResultSink(self.path, flush_every, append=resume, fsync=True)
+        self.store = ResponseStore.for_results_dir(results_dir) if keep_raw else None
+        if self.store and not resume:
+            # A fresh run on the same results volume must not leave older raw responses for rescore
+            self.store.clear(task)
+
+    def _load(self) -> Dict[int, int]:
+        """Read finished items, ignoring a torn final line from a crash mid-write
+
+        Failed items are removed from the file as well, so the retried answer
+        becomes the item's only record.
+        """
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+
+        valid_bytes = 0
+        kept, kept_bytes = [], 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                if not record['response']:
+                    self.failed += 1
+                    continue
+                completed[record['index']] = kept_bytes
+                kept.append(line)
+                kept_bytes += len(line)
+
+        if self.failed:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.writelines(kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        else:
+            # Drop the torn tail so new records start on a clean line
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        return completed
+
+    def replay(self, index: int) -> Optional[str]:
+        """Stored response for a finished item, or None if it still has to run"""
+        offset = self.completed.get(index)
+        if offset is None:
+            return None
+        self.reader.seek(offset)
+        return json.loads(self.reader.readline())['response']
+
+    def record(self, index: int, response: str, **fields):
+        """Stream one finished item; replayed items are not written twice"""
+        if index in self.completed or index in self.recorded:
+            return
+        with shared_instrumentation().stage(CHECKPOINT_WRITE):
+            self.sink.write({'task': self.task, 'index': index, 'response': response, **fields})
+            if self.store:
+                self.store.put(self.task, index, response)
+        self.recorded.add(index)
+        self.unordered = self.unordered or index < self.last_index
+        self.last_index = max(self.last_index, index)
+
+    def close(self):
+        self.sink.close()
+        if self.store:
+            self.store.close()
+        if self.reader:
+            self.reader.close()
+        if self.unordered:
+            self._sort()
+
+    def _sort(self):
+        """Rewrite the item stream in dataset order"""
+        with open(self.path, 'rb') as f:
+            lines = sorted(f, key=lambda line: json.loads(line)['index'])
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -8,27 +8,24 @@ Users assume all risks. Not intended for production use without proper validatio
 See DISCLAIMER.md for complete legal terms.
 """
 import json
-import subprocess
 import time
-from datasets import load_dataset
-from typing import Dict, List, Tuple
-import re
+from typing import Dict, Optional
+from model_backends import ModelBackend, default_backend
+from dataset_snapshot import load_mainframebench
+from prompts import render_prompt
+from answer_extraction import extract_mcq_answer
 
 class COBOLEvaluator:
-    def __init__(self, sample_size: int = 50):
+    def __init__(self, sample_size: int = 50, backend: Optional[ModelBackend] = None):
         self.sample_size = sample_size
         self.results = {}
+        self.backend = backend or default_backend(args=('q', 'chat', '--no-input-file'), timeout=30,
+                                                  prompt_via_stdin=False)
         
     def query_amazon_q(self, prompt: str) -> str:
         """Query Amazon Q CLI with a prompt"""
         try:
-            result = subprocess.run(
-                ['q', 'chat', '--no-input-file', prompt],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return result.stdout.strip() if result.returncode == 0 else ""
+            return self.backend.query_sync(prompt)
         except Exception as e:
             print(f"Error querying Amazon Q: {e}")
             return ""
@@ -36,8 +33,8 @@ class COBOLEvaluator:
     def evaluate_mcq(self) -> Dict:
         """Evaluate Multiple Choice Questions"""
         print("Loading MCQ dataset...")
-        dataset = load_dataset("Fsoft-AIC/MainframeBench", "multiple_choice_question")
-        data = dataset['train'].select(range(min(self.sample_size, len(dataset['train']))))
+        dataset = load_mainframebench("multiple_choice_question")
+        data = dataset.select(range(min(self.sample_size, len(dataset))))
         
         correct = 0
         total = 0
@@ -46,16 +43,10 @@ class COBOLEvaluator:
         for i, example in enumerate(data):
             print(f"MCQ {i+1}/{len(data)}")
             
-            prompt = f"""Question: {example['question']}
-A) {example['A']}
-B) {example['B']}
-C) {example['C']}
-D) {example['D']}
-
-Please answer with just the letter (A, B, C, or D)."""
+            prompt = render_prompt('mcq', example)
             
             response = self.query_amazon_q(prompt)
-            predicted = self.extract_mcq_answer(response)
+            predicted = self.extract_mcq_answer(response, example)
             correct_answer = example['answer']
             
             is_correct = predicted == correct_answer
@@ -70,8 +61,6 @@ Please answer with just the letter (A, B, C, or D)."""
                 'is_correct': is_correct,
                 'response': response
             })
-            
-            time.sleep(1)  # Rate limiting
         
         accuracy = correct / total if total > 0 else 0
         return {
@@ -82,10 +71,9 @@ Please answer with just the letter (A, B, C, or D)."""
             'results': results
         }
     
-    def extract_mcq_answer(self, response: str) -> str:
-        """Extract MCQ answer from response"""
-        matches = re.findall(r'\b([ABCD])\b', response.upper())
-        return matches[0] if matches else ""
+    def extract_mcq_answer(self, response: str, options: Optional[Dict] = None) -> str:
+        """Extract MCQ answer from response (see answer_extraction)"""
+        return extract_mcq_answer(response, options)
     
     def run_evaluation(self) -> Dict:
         """Run complete evaluation"""
@@ -4,17 +4,21 @@ Complete COBOL Evaluation Framework with BLEU Implementation
 Integrates MCQ, QA, and Code Summarization with proper BLEU scoring
 """
 import json
-import subprocess
 import time
-from datasets import load_dataset
-from typing import Dict, List, Tuple
+from typing import Dict, Optional
 import re
 from bleu_evaluator import SecureBLEUEvaluator
+from model_backends import ModelBackend, default_backend
+from dataset_snapshot import load_mainframebench
+from prompts import render_prompt
+from answer_extraction import extract_mcq_answer
+from qa_scoring import COMPLETE_WEIGHTS, score_qa_item
 
 class CompleteCOBOLEvaluator:
-    def __init__(self, sample_size: int = 50):
+    def __init__(self, sample_size: int = 50, backend: Optional[ModelBackend] = None):
         self.sample_size = sample_size
-        self.bleu_evaluator = SecureBLEUEvaluator(sample_size)
+        self.backend = backend or default_backend(timeout=30, cwd='/tmp')
+        self.bleu_evaluator = SecureBLEUEvaluator(sample_size, backend=self.backend)
         
     def sanitize_input(self, text: str) -> str:
         """Sanitize input for security"""
@@ -25,16 +29,9 @@ class CompleteCOBOLEvaluator:
         
     def query_amazon_q(self, prompt: str) -> str:
         """Query Amazon Q CLI with security controls"""
-            result = subprocess.run(
-                ['q', 'chat', '--no-input-file', '--'],
-                input=sanitized_prompt,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd='/tmp'
-            )
-            )
-            return result.stdout.strip() if result.returncode == 0 else ""
+        try:
+            sanitized_prompt = self.sanitize_input(prompt)
+            return self.backend.query_sync(sanitized_prompt)
         except Exception as e:
             print(f"Error querying Amazon Q: {e}")
             return ""
@@ -43,8 +40,8 @@ class CompleteCOBOLEvaluator:
         """Evaluate Multiple Choice Questions"""
         print("Loading MCQ dataset...")
         try:
-            dataset = load_dataset("Fsoft-AIC/MainframeBench", "multiple_choice_question")
-            data = dataset['train'].select(range(min(self.sample_size, len(dataset['train']))))
+            dataset = load_mainframebench("multiple_choice_question")
+            data = dataset.select(range(min(self.sample_size, len(dataset))))
         except Exception as e:
             print(f"Error loading MCQ dataset: {e}")
             return {'error': 'Failed to load MCQ dataset'}
@@ -56,16 +53,10 @@ class CompleteCOBOLEvaluator:
         for i, example in enumerate(data):
             print(f"MCQ {i+1}/{len(data)}")
             
-            prompt = f"""Question: {example['question']}
-A) {example['A']}
-B) {example['B']}
-C) {example['C']}
-D) {example['D']}
-
-Please answer with just the letter (A, B, C, or D)."""
+            prompt = render_prompt('mcq', example)
             
             response = self.query_amazon_q(prompt)
-            predicted = self.extract_mcq_answer(response)
+            predicted = self.extract_mcq_answer(response, example)
             correct_answer = example['answer']
             
             is_correct = predicted == correct_answer
@@ -79,8 +70,6 @@ Please answer with just the letter (A, B, C, or D)."""
                 'correct': correct_answer,
                 'is_correct': is_correct
             })
-            
-            time.sleep(1)
         
         accuracy = correct / total if total > 0 else 0
         return {
@@ -95,8 +84,8 @@ Please answer with just the letter (A, B, C, or D)."""
         """Evaluate Question Answering"""
         print("Loading QA dataset...")
         try:
-            dataset = load_dataset("Fsoft-AIC/MainframeBench", "question_answering")
-            data = dataset['train'].select(range(min(self.sample_size, len(dataset['train']))))
+            dataset = load_mainframebench("question_answering")
+            data = dataset.select(range(min(self.sample_size, len(dataset))))
         except Exception as e:
             print(f"Error loading QA dataset: {e}")
             return {'error': 'Failed to load QA dataset'}
@@ -113,9 +102,7 @@ Please answer with just the letter (A, B, C, or D)."""
             if not question or not reference_answer:
                 continue
                 
-            prompt = f"""Question: {question}
-
-Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
+            prompt = render_prompt('qa', {'question': question})
             
             response = self.query_amazon_q(prompt)
             
@@ -129,8 +116,6 @@ Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
                 'response_length': len(response.split()),
                 'quality_score': quality_score
             })
-            
-            time.sleep(1)
         
         avg_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0
         
@@ -143,28 +128,11 @@ Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
     
     def assess_qa_quality(self, response: str, reference: str) -> float:
         """Simple quality assessment for QA responses"""
-        if not response or not reference:
-            return 0.0
-        
-        # Basic metrics: length similarity, keyword overlap
-        response_words = set(response.lower().split())
-        reference_words = set(reference.lower().split())
-        
-        if not reference_words:
-            return 0.0
-        
-        overlap = len(response_words.intersection(reference_words))
-        overlap_ratio = overlap / len(reference_words)
-        
-        # Length penalty/bonus
-        length_ratio = min(len(response.split()) / len(reference.split()), 1.0)
-        
-        return (overlap_ratio * 0.7 + length_ratio * 0.3)
+        return score_qa_item(response, reference, COMPLETE_WEIGHTS)
     
-    def extract_mcq_answer(self, response: str) -> str:
-        """Extract MCQ answer from response"""
-        matches = re.findall(r'\b([ABCD])\b', response.upper())
-        return matches[0] if matches else ""
+    def extract_mcq_answer(self, response: str, options: Optional[Dict] = None) -> str:
+        """Extract MCQ answer from response (see answer_extraction)"""
+        return extract_mcq_answer(response, options)
     
     def run_complete_evaluation(self) -> Dict:
         """Run all three evaluation tasks"""
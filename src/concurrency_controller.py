@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency Controller
+AIMD limit on concurrent Q CLI calls. Every window of finished calls the
+controller compares the window's p95 latency with a slowly drifting
+baseline and counts timeouts and non-zero exits: a healthy window whose
+limit was actually reached raises the limit by one, an overloaded window
+cuts it by BACKOFF_RATIO. The limit therefore climbs to the throughput
+ceiling of the service and backs off when the service slows down, without
+tuning MAX_IN_FLIGHT by hand. Decisions are published to the metrics endpoint.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from metrics_server import shared_metrics
+
+ENABLED = os.environ.get('ADAPTIVE_CONCURRENCY', '0').lower() in ('1', 'true', 'yes', 'on')
+DEFAULT_INITIAL = int(os.environ.get('MAX_IN_FLIGHT', '4'))
+DEFAULT_MIN = int(os.environ.get('ADAPTIVE_CONCURRENCY_MIN', '1'))
+DEFAULT_MAX = int(os.environ.get('ADAPTIVE_CONCURRENCY_MAX', '16'))
+DEFAULT_WINDOW = int(os.environ.get('ADAPTIVE_CONCURRENCY_WINDOW', '20'))  # Finished calls per decision
+LATENCY_TOLERANCE = 2.0    # A window p95 above this multiple of the baseline counts as overload
+MAX_FAILURE_RATE = 0.1     # Timeouts plus non-zero exits per window before backing off
+BACKOFF_RATIO = 0.5        # Multiplicative decrease
+BASELINE_DRIFT = 0.1       # Share of a slower p95 folded into the baseline, so a lasting slowdown becomes normal
+HISTORY = 50               # Decisions kept for the run report
+
+def p95(latencies: List[float]) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+class AdaptiveConcurrencyController:
+    """Use from the shared event loop only; acquire() before a call, release() after it"""
+
+    def __init__(self, initial: int = DEFAULT_INITIAL, min_limit: int = DEFAULT_MIN,
+                 max_limit: int = DEFAULT_MAX, window: int = DEFAULT_WINDOW,
+                 latency_tolerance: float = LATENCY_TOLERANCE, max_failure_rate: float = MAX_FAILURE_RATE,
+                 backoff_ratio: float = BACKOFF_RATIO):
+        if not 1 <= min_limit <= max_limit or window < 1:
+            raise ValueError("need 1 <= min_limit <= max_limit and window >= 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial, min_limit), max_limit)
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.max_failure_rate = max_failure_rate
+        self.backoff_ratio = backoff_ratio
+
+        self.in_flight = 0
+        self.peak = 0  # Most calls in flight during the current window
+        self.waiters = deque()
+        self.latencies: List[float] = []
+        self.failures = 0
+        self.baseline: Optional[float] = None
+        self.generation = 0  # Bumped by every decision
+        self.decisions = {'increase': 0, 'decrease': 0, 'hold': 0}
+        self.history = deque(maxlen=HISTORY)
+        self._publish(None, 0.0)
+
+    async def acquire(self) -> int:
+        """Wait for a free slot under the current limit; returns the generation to pass to release()"""
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()  # Hand the slot we were woken for to the next waiter
+                raise
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        return self.generation
+
+    def release(self, generation: int, outcome: Optional[str], latency: float):
+        """Free the slot; outcome is "ok", "error" (non-zero exit), "timeout", or None when cancelled
+
+        Calls acquired before the last decision ran under the old limit and are
+        not counted toward the next one.
+        """
+        self.in_flight -= 1
+        if outcome is not None and generation == self.generation:
+            self.latencies.append(latency)
+            if outcome != 'ok':
+                self.failures += 1
+            if len(self.latencies) >= self.window:
+                self._decide()
+        self._wake()
+
+    def _wake(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _decide(self):
+        window_p95 = p95(self.latencies)
+        failure_rate = self.failures / len(self.latencies)
+        previous = self.limit
+        if failure_rate > self.max_failure_rate:
+            decision, reason = 'decrease', f"failure rate {failure_rate:.2f}"
+        elif self.baseline is not None and window_p95 > self.latency_tolerance * self.baseline:
+            decision, reason = 'decrease', f"p95 {window_p95:.3f}s over {self.latency_tolerance:g}x baseline {self.baseline:.3f}s"
+        elif self.peak >= self.limit and self.limit < self.max_limit:
+            decision, reason = 'increase', f"p95 {window_p95:.3f}s healthy at the limit"
+        else:
+            decision, reason = 'hold', "limit not reached" if self.peak < self.limit else "at max_limit"
+
+        if decision == 'decrease':
+            self.limit = max(self.min_limit, math.floor(self.limit * self.backoff_ratio))
+        elif decision == 'increase':
+            self.limit += 1
+        # Overloaded windows do not move the baseline; healthy ones pull it down at once or up slowly
+        if decision != 'decrease' or self.baseline is None:
+            if self.baseline is None or window_p95 < self.baseline:
+                self.baseline = window_p95
+            else:
+                self.baseline += (window_p95 - self.baseline) * BASELINE_DRIFT
+
+        self.decisions[decision] += 1
+        self.history.append({'time': time.time(), 'decision': decision, 'limit': self.limit,
+                             'previous_limit': previous, 'p95_seconds': window_p95,
+                             'failure_rate': failure_rate, 'reason': reason})
+        if decision == 'decrease':
+            print(f"Adaptive concurrency: {previous} -> {self.limit} ({reason})")
+        self.latencies = []
+        self.failures = 0
+        self.peak = self.in_flight
+        self.generation += 1
+        self._publish(window_p95, failure_rate)
+
+    def _publish(self, window_p95: Optional[float], failure_rate: float):
+        metrics = shared_metrics()
+        metrics.set_gauge('concurrency_limit', self.limit)
+        metrics.set_gauge('concurrency_window_p95_seconds', window_p95 if window_p95 is not None else math.nan)
+        metrics.set_gauge('concurrency_window_failure_rate', failure_rate)
+        metrics.set_gauge('concurrency_baseline_p95_seconds', self.baseline if self.baseline is not None else math.nan)
+        for decision, count in self.decisions.items():
+            metrics.set_gauge(f'concurrency_decisions_{decision}', count)
+
+    def stats(self) -> Dict:
+        return {
+            'limit': self.limit,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'baseline_p95_seconds': self.baseline,
+            'decisions': dict(self.decisions),
+            'history': list(self.history),
+        }
+
+_shared_controller: Optional[AdaptiveConcurrencyController] = None
+
+def shared_concurrency_controller() -> Optional[AdaptiveConcurrencyController]:
+    """Process-wide controller, or None unless ADAPTIVE_CONCURRENCY is enabled"""
+    global _shared_controller
+    if _shared_controller is None and ENABLED:
+        _shared_controller = AdaptiveConcurrencyController()
+    return _shared_controller
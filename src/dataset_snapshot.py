@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Local MainframeBench Snapshot
+One-time export of each MainframeBench config to an uncompressed Arrow IPC
+file with prompts pre-rendered, opened memory-mapped so evaluators start
+without the network, the datasets library, or parsing multi-MB JSON
+"""
+import argparse
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+from prompts import SUITE_TEMPLATES, render_prompt
+
+DATASET_NAME = "Fsoft-AIC/MainframeBench"
+CONFIGS = ('multiple_choice_question', 'question_answering', 'COBOL_code_summarization')
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'data', 'mainframebench')
+SNAPSHOT_DIR = os.environ.get('MAINFRAMEBENCH_SNAPSHOT', DEFAULT_SNAPSHOT_DIR)
+
+def snapshot_path(config: str, snapshot_dir: Optional[str] = None) -> str:
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"{config}.arrow")
+
+class SnapshotTable:
+    """Read-only, memory-mapped table with the parts of the datasets.Dataset API the evaluators use
+
+    Opening, slicing and column selection reference the mapped file without
+    copying it. Rows are still Python dicts: iteration converts them one
+    record batch at a time, and indexing converts a single row.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def open(cls, path: str) -> 'SnapshotTable':
+        import pyarrow as pa
+        # read_all over a memory map references the file's pages instead of copying them
+        with pa.memory_map(path, 'r') as source:
+            return cls(pa.ipc.open_file(source).read_all())
+
+    @property
+    def column_names(self) -> List[str]:
+        return self.table.column_names
+
+    def column(self, name: str):
+        """Zero-copy Arrow column"""
+        return self.table.column(name)
+
+    def select_columns(self, names: List[str]) -> 'SnapshotTable':
+        """Only the named columns, so converting rows skips the rest (e.g. the pre-rendered prompt)"""
+        return SnapshotTable(self.table.select(names))
+
+    def select(self, indices: Iterable[int]) -> 'SnapshotTable':
+        if isinstance(indices, range) and indices.step == 1:
+            return SnapshotTable(self.table.slice(indices.start, len(indices)))  # Contiguous: zero-copy
+        return SnapshotTable(self.table.take(list(indices)))
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.table.slice(index, 1).to_pylist()[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        # Materialize one record batch at a time so memory stays bounded
+        for batch in self.table.to_batches(max_chunksize=1024):
+            yield from batch.to_pylist()
+
+def load_mainframebench(config: str, snapshot_dir: Optional[str] = None):
+    """Train split of a MainframeBench config, from the local snapshot when one exists"""
+    path = snapshot_path(config, snapshot_dir)
+    if os.path.exists(path):
+        return SnapshotTable.open(path)
+    from datasets import load_dataset  # Imported lazily: datasets alone takes ~1s to import
+    template = SUITE_TEMPLATES[config]
+    # Same columns as the snapshot so callers do not care which source they got
+    return load_dataset(DATASET_NAME, config)['train'].map(
+        lambda example, i: {'id': i, 'prompt': render_prompt(template, example)}, with_indices=True)
+
+def write_snapshot(config: str, rows: List[Dict], snapshot_dir: Optional[str] = None) -> str:
+    """Write rows plus id and pre-rendered prompt columns as an Arrow IPC file"""
+    import pyarrow as pa
+    template = SUITE_TEMPLATES[config]
+    rows = [dict(row, id=i, prompt=render_prompt(template, row)) for i, row in enumerate(rows)]
+    table = pa.Table.from_pylist(rows)
+
+    path = snapshot_path(config, snapshot_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:  # Uncompressed so it can be memory-mapped
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+def export_snapshot(snapshot_dir: Optional[str] = None, configs: Iterable[str] = CONFIGS):
+    """Download each config once through datasets and write its snapshot"""
+    from datasets import load_dataset
+    for config in configs:
+        print(f"Loading {config}...")
+        train_data = load_dataset(DATASET_NAME, config)['train']
+        path = write_snapshot(config, train_data.to_list(), snapshot_dir)
+        print(f"Saved {len(train_data)} {config} rows to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export MainframeBench to a local Arrow snapshot")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR,
+                        help="output directory (default: $MAINFRAMEBENCH_SNAPSHOT or data/mainframebench)")
+    parser.add_argument('--config', action='append', choices=CONFIGS,
+                        help="config to export (repeatable, default: all)")
+    args = parser.parse_args()
+    export_snapshot(args.snapshot_dir, args.config or CONFIGS)
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ See DISCLAIMER.md for complete legal terms.
 """
 import json
 from datasets import load_dataset
+from prompts import SUITE_TEMPLATES, render_prompt
 
 def create_full_test_suite():
     """Create complete test suite from MainframeBench"""
@@ -28,21 +29,21 @@ def create_full_test_suite():
                     'question': example['question'],
                     'options': {'A': example['A'], 'B': example['B'], 'C': example['C'], 'D': example['D']},
                     'correct': example['answer'],
-                    'prompt': f"{example['question']}\nA) {example['A']}\nB) {example['B']}\nC) {example['C']}\nD) {example['D']}\nAnswer:"
+                    'prompt': render_prompt(SUITE_TEMPLATES[config], example)
                 }
             elif config == 'question_answering':
                 test = {
                     'id': i,
                     'question': example['question'],
                     'reference': example['answer'],
-                    'prompt': example['question']
+                    'prompt': render_prompt(SUITE_TEMPLATES[config], example)
                 }
             else:  # code_summarization
                 test = {
                     'id': i,
                     'code': example['source'],
                     'reference': example['summary'],
-                    'prompt': f"Summarize this COBOL code:\n{example['source']}"
+                    'prompt': render_prompt(SUITE_TEMPLATES[config], example)
                 }
             tests.append(test)
         
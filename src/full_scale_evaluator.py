@@ -3,24 +3,58 @@
 Full-Scale COBOL Evaluation Framework for AWS EKS
 Runs complete MainframeBench dataset (7,052 tests) with production-grade monitoring
 """
+import argparse
 import json
-import subprocess
 import time
 import os
-from datasets import load_dataset
-from typing import Dict, List
+from typing import Dict, Optional
 import re
 from bleu_evaluator import SecureBLEUEvaluator
+from query_engine import ConcurrentQueryEngine, DEFAULT_MAX_IN_FLIGHT
+from q_client import run_sync
+from model_backends import ModelBackend, default_backend, register_references
+from checkpoint_store import TaskCheckpoint
+from result_sink import summarize_jsonl
+from sharding import ShardSpec
+from dataset_snapshot import load_mainframebench
+from prompts import render_jobs, render_prompt
+from mcq_batch import RAW_BATCH_TASK, BatchedMCQAnswerer, encode_batch_response
+from qa_scoring import FULL_SCALE_WEIGHTS, score_qa_item
+from answer_extraction import Extraction, extract_answer
+from bootstrap import confidence_intervals
+from instrumentation import DATASET_LOAD, EXTRACT, RESULT_WRITE, SCORE, shared_instrumentation, stage
+from metrics_server import shared_metrics, start_metrics_server, DEFAULT_METRICS_PORT
+from progress import ProgressReporter
+from concurrency_controller import shared_concurrency_controller
+
+RESULTS_ROOT = '/results'
+TOTAL_TESTS = 7052  # Full MainframeBench: MCQ + QA + code summarization
+DEFAULT_MCQ_BATCH_SIZE = int(os.environ.get('MCQ_BATCH_SIZE', '1'))  # 1 = one question per call
 
 class FullScaleCOBOLEvaluator:
-    def __init__(self):
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, resume: bool = False,
+                 shard: Optional[ShardSpec] = None, mcq_batch_size: int = DEFAULT_MCQ_BATCH_SIZE,
+                 backend: Optional[ModelBackend] = None):
         # Full dataset sizes from MainframeBench
         self.mcq_total = 1931
         self.qa_total = 2598  
         self.code_total = 2523
-        self.total_tests = 7052
+        self.total_tests = TOTAL_TESTS
+        self.resume = resume
+        self.shard = shard or ShardSpec()
+        self.mcq_batch_size = mcq_batch_size
+        # Each shard writes to its own directory on the shared results volume
+        self.results_dir = RESULTS_ROOT if self.shard.count == 1 else os.path.join(RESULTS_ROOT, self.shard.name)
+        controller = shared_concurrency_controller()
+        if controller is not None:
+            # The controller sets the actual concurrency; the engines only need room for its ceiling
+            max_in_flight = max(max_in_flight, controller.max_limit)
         
-        self.bleu_evaluator = SecureBLEUEvaluator(sample_size=self.code_total)
+        self.bleu_evaluator = SecureBLEUEvaluator(sample_size=self.code_total, max_in_flight=max_in_flight,
+                                                  checkpoint_dir=self.results_dir, resume=resume,
+                                                  shard=self.shard, backend=backend)
+        self.backend = backend or default_backend(timeout=60, cwd='/tmp')  # Increased timeout for complex queries
+        self.query_engine = ConcurrentQueryEngine(self.aquery_amazon_q, max_in_flight)
         
     def sanitize_input(self, text: str) -> str:
         """Enhanced security sanitization"""
@@ -29,30 +63,34 @@ class FullScaleCOBOLEvaluator:
         text = re.sub(r'[;&|`$(){}[\]<>"\'\\\\n\r\t]', '', text)
         return text[:2000].strip()
         
-    def query_amazon_q(self, prompt: str) -> str:
-        """Query Amazon Q CLI with enhanced error handling"""
+    async def aquery_amazon_q(self, prompt: str) -> str:
+        """Query Amazon Q CLI asynchronously with enhanced error handling"""
+        return await self.aquery_prepared(self.sanitize_input(prompt))
+    
+    async def aquery_prepared(self, prompt: str) -> str:
+        """Query a prompt that is already sanitized or rendered from sanitized fields"""
         try:
-            sanitized_prompt = self.sanitize_input(prompt)
-            result = subprocess.run(
-                ['q', 'chat', '--no-input-file', '--'],
-                input=sanitized_prompt,
-                capture_output=True,
-                text=True,
-                timeout=60,  # Increased timeout for complex queries
-                cwd='/tmp'
-            )
-            return result.stdout.strip() if result.returncode == 0 else ""
+            return await self.backend.query(prompt)
         except Exception as e:
             print(f"Error querying Amazon Q: {e}")
             return ""
     
+    def query_amazon_q(self, prompt: str) -> str:
+        """Query Amazon Q CLI with enhanced error handling"""
+        return run_sync(self.aquery_amazon_q(prompt))
+    
+    def mcq_batcher(self, batch_size: int) -> BatchedMCQAnswerer:
+        """Batched MCQ answering that sanitizes each question's fields instead of the batch prompt"""
+        engine = ConcurrentQueryEngine(self.aquery_prepared, self.query_engine.max_in_flight)
+        return BatchedMCQAnswerer(engine, self.aquery_amazon_q, batch_size, sanitize=self.sanitize_input)
+    
     def evaluate_mcq_full(self) -> Dict:
         """Evaluate ALL Multiple Choice Questions (1,931 tests)"""
         print(f"Loading FULL MCQ dataset ({self.mcq_total} tests)...")
         try:
-            dataset = load_dataset("Fsoft-AIC/MainframeBench", "multiple_choice_question")
-            data = dataset['train']  # Full dataset
-            print(f"Loaded {len(data)} MCQ questions")
+            with stage(DATASET_LOAD):  # Full dataset, memory-mapped when snapshotted
+                data = load_mainframebench("multiple_choice_question")
+            print(f"Loaded {len(data)} MCQ questions ({self.shard.size(len(data))} in this shard)")
         except Exception as e:
             print(f"Error loading MCQ dataset: {e}")
             return {'error': 'Failed to load MCQ dataset'}
@@ -60,27 +98,54 @@ class FullScaleCOBOLEvaluator:
         correct = 0
         total = 0
         results = []
+        strategies = {}  # Which answer_extraction strategy read each response
         batch_size = 50  # Process in batches for monitoring
         
-        for i, example in enumerate(data):
-            print(f"MCQ Progress: {i+1}/{len(data)} ({((i+1)/len(data)*100):.1f}%)")
+        shard_size = self.shard.size(len(data))
+        checkpoint = TaskCheckpoint('mcq', self.results_dir, resume=self.resume)
+        metrics = shared_metrics()
+        metrics.start_task('mcq', shard_size)
+        # Replayed items count as done up front so they do not inflate the rate or shrink the ETA
+        progress = ProgressReporter('mcq', shard_size, initial=len(checkpoint.completed))
+        if checkpoint.completed:
+            print(f"Resuming MCQ: {len(checkpoint.completed)} questions already finished, "
+                  f"{checkpoint.failed} failed calls to retry")
+        
+        if self.mcq_batch_size > 1:
+            batcher = self.mcq_batcher(self.mcq_batch_size)
             
-            prompt = f"""Question: {example['question']}
-A) {example['A']}
-B) {example['B']}
-C) {example['C']}
-D) {example['D']}
-
-Please answer with just the letter (A, B, C, or D)."""
+            def keep_batch_response(i, slot, count, response):
+                # The item records the parsed letter; rescore.py re-parses the raw batch response
+                checkpoint.store.put(RAW_BATCH_TASK, i, encode_batch_response(slot, count, response))
             
-            response = self.query_amazon_q(prompt)
-            predicted = self.extract_mcq_answer(response)
+            answered = batcher.run(self.shard.iter_items(data), replay=checkpoint.replay,
+                                   on_batched=keep_batch_response if checkpoint.store else None)
+            print(f"MCQ batching: up to {self.mcq_batch_size} questions per call")
+        else:
+            batcher = None
+            register_references(self.backend, ((self.sanitize_input(render_prompt('mcq', example)), example['answer'])
+                                               for _, example in self.shard.iter_items(data)))
+            jobs, prompt_index = render_jobs(lambda: (((i, example), example)
+                                                      for i, example in self.shard.iter_items(data)), 'mcq')
+            answered = ((i, example, response) for (i, example), response in self.query_engine.run(
+                jobs, replay=lambda key: checkpoint.replay(key[0]), dedup=prompt_index))
+            print(f"MCQ prompts: {prompt_index.unique} unique of {prompt_index.total}")
+        
+        for i, example, response in answered:
+            with stage(EXTRACT):
+                extraction = self.extract_mcq_choice(response, example)
+            predicted = extraction.letter
             correct_answer = example['answer']
             
             is_correct = predicted == correct_answer
             if is_correct:
                 correct += 1
             total += 1
+            strategies[extraction.strategy] = strategies.get(extraction.strategy, 0) + 1
+            replayed = i in checkpoint.completed
+            checkpoint.record(i, response, predicted=predicted, is_correct=is_correct, strategy=extraction.strategy)
+            metrics.item_completed('mcq')
+            progress.update(0 if replayed else 1, accuracy=round(correct / total, 4))
             
             # Store detailed results for first 10 and every 100th
             if i < 10 or (i + 1) % 100 == 0:
@@ -93,53 +158,71 @@ Please answer with just the letter (A, B, C, or D)."""
                 })
             
             # Progress checkpoint every 100 questions
-            if (i + 1) % 100 == 0:
+            if total % 100 == 0:
                 current_accuracy = correct / total
-                print(f"Checkpoint {i+1}: Accuracy = {current_accuracy:.3f} ({correct}/{total})")
-                self.save_checkpoint('mcq', i+1, correct, total, current_accuracy)
-            
-            time.sleep(0.5)  # Rate limiting
+                progress.write(f"Checkpoint {total}: Accuracy = {current_accuracy:.3f} ({correct}/{total})")
+                self.save_checkpoint('mcq', total, correct, total, current_accuracy)
         
+        progress.close()
+        checkpoint.close()
         accuracy = correct / total if total > 0 else 0
-        return {
+        mcq_results = {
             'task': 'Multiple Choice Questions (FULL)',
             'accuracy': accuracy,
             'correct': correct,
             'total': total,
             'sample_results': results,
+            'extraction_strategies': strategies,
             'completion_status': 'COMPLETE'
         }
+        if batcher is not None:
+            mcq_results['mcq_batching'] = batcher.stats()
+        else:
+            mcq_results['prompt_dedup'] = prompt_index.stats()
+        return mcq_results
     
     def evaluate_qa_full(self) -> Dict:
         """Evaluate ALL Question Answering (2,598 tests)"""
         print(f"Loading FULL QA dataset ({self.qa_total} tests)...")
         try:
-            dataset = load_dataset("Fsoft-AIC/MainframeBench", "question_answering")
-            data = dataset['train']  # Full dataset
-            print(f"Loaded {len(data)} QA questions")
+            with stage(DATASET_LOAD):  # Full dataset, memory-mapped when snapshotted
+                data = load_mainframebench("question_answering")
+            print(f"Loaded {len(data)} QA questions ({self.shard.size(len(data))} in this shard)")
         except Exception as e:
             print(f"Error loading QA dataset: {e}")
             return {'error': 'Failed to load QA dataset'}
         
         results = []
-        quality_scores = []
+        quality_total = 0.0
+        quality_count = 0
         
-        for i, example in enumerate(data):
-            print(f"QA Progress: {i+1}/{len(data)} ({((i+1)/len(data)*100):.1f}%)")
-            
-            question = example.get('question', '')
-            reference_answer = example.get('answer', '')
-            
-            if not question or not reference_answer:
-                continue
-                
-            prompt = f"""Question: {question}
-
-Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
-            
-            response = self.query_amazon_q(prompt)
-            quality_score = self.assess_qa_quality(response, reference_answer)
-            quality_scores.append(quality_score)
+        shard_size = self.shard.size(len(data))
+        checkpoint = TaskCheckpoint('qa', self.results_dir, resume=self.resume)
+        metrics = shared_metrics()
+        metrics.start_task('qa', shard_size)
+        progress = ProgressReporter('qa', shard_size, initial=len(checkpoint.completed))
+        if checkpoint.completed:
+            print(f"Resuming QA: {len(checkpoint.completed)} questions already finished, "
+                  f"{checkpoint.failed} failed calls to retry")
+        
+        register_references(self.backend, ((self.sanitize_input(render_prompt('qa', {'question': question})),
+                                            reference_answer)
+                                           for _, question, reference_answer in self.iter_qa_items(data)))
+        jobs, prompt_index = render_jobs(lambda: (((i, question, reference_answer), {'question': question})
+                                                  for i, question, reference_answer in self.iter_qa_items(data)),
+                                         'qa')
+        print(f"QA prompts: {prompt_index.unique} unique of {prompt_index.total}")
+        
+        for (i, question, reference_answer), response in self.query_engine.run(
+                jobs, replay=lambda key: checkpoint.replay(key[0]), dedup=prompt_index):
+            with stage(SCORE):
+                quality_score = self.assess_qa_quality(response, reference_answer)
+            quality_total += quality_score
+            quality_count += 1
+            replayed = i in checkpoint.completed
+            checkpoint.record(i, response, quality_score=quality_score)
+            metrics.item_completed('qa')
+            progress.update(0 if replayed else 1, avg_quality=round(quality_total / quality_count, 4))
             
             # Store detailed results for first 10 and every 200th
             if i < 10 or (i + 1) % 200 == 0:
@@ -152,50 +235,45 @@ Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
                 })
             
             # Progress checkpoint every 200 questions
-            if (i + 1) % 200 == 0:
-                current_avg = sum(quality_scores) / len(quality_scores)
-                print(f"Checkpoint {i+1}: Avg Quality = {current_avg:.3f}")
-                self.save_checkpoint('qa', i+1, len(quality_scores), len(quality_scores), current_avg)
-            
-            time.sleep(0.5)  # Rate limiting
+            if quality_count % 200 == 0:
+                current_avg = quality_total / quality_count
+                progress.write(f"Checkpoint {quality_count}: Avg Quality = {current_avg:.3f}")
+                self.save_checkpoint('qa', quality_count, quality_count, quality_count, current_avg)
         
-        avg_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0
+        progress.close()
+        checkpoint.close()
+        avg_quality = quality_total / quality_count if quality_count else 0
         
         return {
             'task': 'Question Answering (FULL)',
-            'total_samples': len(quality_scores),
+            'total_samples': quality_count,
             'average_quality_score': avg_quality,
             'sample_results': results,
+            'prompt_dedup': prompt_index.stats(),
             'completion_status': 'COMPLETE'
         }
     
+    def iter_qa_items(self, data):
+        """Yield (index, question, reference) for this shard's QA examples that have both fields"""
+        for i, example in self.shard.iter_items(data):
+            question = example.get('question', '')
+            reference_answer = example.get('answer', '')
+            
+            if not question or not reference_answer:
+                continue
+            yield i, question, reference_answer
+    
     def assess_qa_quality(self, response: str, reference: str) -> float:
         """Enhanced QA quality assessment"""
-        if not response or not reference:
-            return 0.0
-        
-        response_words = set(response.lower().split())
-        reference_words = set(reference.lower().split())
-        
-        if not reference_words:
-            return 0.0
-            
-        # Keyword overlap
-        overlap = len(response_words.intersection(reference_words))
-        overlap_ratio = overlap / len(reference_words)
-        
-        # Length appropriateness
-        length_ratio = min(len(response.split()) / len(reference.split()), 1.0)
-        
-        # Completeness bonus for comprehensive answers
-        completeness_bonus = 0.1 if len(response.split()) >= 20 else 0
-        
-        return min(overlap_ratio * 0.6 + length_ratio * 0.3 + completeness_bonus, 1.0)
+        return score_qa_item(response, reference, FULL_SCALE_WEIGHTS)
     
-    def extract_mcq_answer(self, response: str) -> str:
+    def extract_mcq_choice(self, response: str, options: Optional[Dict] = None) -> Extraction:
+        """Extract MCQ answer and the strategy that found it (see answer_extraction)"""
+        return extract_answer(response, options)
+    
+    def extract_mcq_answer(self, response: str, options: Optional[Dict] = None) -> str:
         """Extract MCQ answer with improved pattern matching"""
-        matches = re.findall(r'\b([ABCD])\b', response.upper())
-        return matches[0] if matches else ""
+        return self.extract_mcq_choice(response, options).letter
     
     def save_checkpoint(self, task: str, current: int, correct_or_count: int, total: int, score: float):
         """Save progress checkpoints"""
@@ -204,11 +282,12 @@ Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
             'progress': f"{current}/{total if task == 'mcq' else 'N/A'}",
             'current_score': score,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'completion_percentage': (current / total * 100) if task == 'mcq' else (current / self.qa_total * 100)
+            'completion_percentage': (current / total * 100) if task == 'mcq' else (current / self.qa_total * 100),
+            'stage_timings': shared_instrumentation().snapshot(buckets=False)
         }
         
-        filename = f"/results/{task}_checkpoint_{current}.json"
-        os.makedirs('/results', exist_ok=True)
+        filename = os.path.join(self.results_dir, f"{task}_checkpoint_{current}.json")
+        os.makedirs(self.results_dir, exist_ok=True)
         
         with open(filename, 'w') as f:
             json.dump(checkpoint, f, indent=2)
@@ -224,6 +303,10 @@ Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
         print("="*80)
         
         start_time = time.time()
+        # Declared up front so the ETA covers the phases that have not started yet
+        metrics = shared_metrics()
+        for task, total in (('mcq', self.mcq_total), ('qa', self.qa_total), ('code', self.code_total)):
+            metrics.set_total(task, self.shard.size(total))
         
         # Run all evaluations
         print("\n🔍 Phase 1: Multiple Choice Questions")
@@ -239,83 +322,133 @@ Please provide a comprehensive answer based on mainframe and COBOL knowledge."""
         end_time = time.time()
         total_duration = end_time - start_time
         
-        # Calculate comprehensive results
-        mcq_score = mcq_results.get('accuracy', 0) if 'error' not in mcq_results else 0
-        qa_score = qa_results.get('average_quality_score', 0) if 'error' not in qa_results else 0
-        bleu_score = bleu_results.get('primary_bleu', 0) if 'error' not in bleu_results else 0
-        
-        # Weighted overall score (matching academic standards)
-        overall_score = (mcq_score * 0.4 + qa_score * 0.3 + bleu_score * 0.3)
-        
-        final_results = {
-            'evaluation_info': {
-                'model': 'Amazon Q CLI (Claude)',
-                'dataset': 'MainframeBench (Complete)',
-                'total_tests': self.total_tests,
-                'duration_hours': total_duration / 3600,
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'evaluation_type': 'Full-Scale Production Assessment'
-            },
-            'task_results': {
-                'mcq_results': mcq_results,
-                'qa_results': qa_results,
-                'code_summarization_results': bleu_results
-            },
-            'performance_summary': {
-                'overall_score': overall_score,
-                'mcq_accuracy': mcq_score,
-                'qa_quality': qa_score,
-                'bleu_score': bleu_score,
-                'tests_completed': {
-                    'mcq': mcq_results.get('total', 0),
-                    'qa': qa_results.get('total_samples', 0),
-                    'code': bleu_results.get('total_samples', 0)
-                }
-            },
-            'benchmarks': {
-                'vs_xmainframe_instruct': {
-                    'mcq_improvement': ((mcq_score - 0.7789) / 0.7789 * 100) if mcq_score > 0 else 0,
-                    'bleu_improvement': ((bleu_score - 0.1139) / 0.1139 * 100) if bleu_score > 0 else 0
-                },
-                'vs_gpt35': {
-                    'bleu_improvement': ((bleu_score - 0.12) / 0.12 * 100) if bleu_score > 0 else 0
-                }
+        final_results = build_final_results(self.total_tests, mcq_results, qa_results, bleu_results, total_duration)
+        final_results['evaluation_info']['shard'] = {'index': self.shard.index, 'count': self.shard.count}
+        # Resampled from the per-item checkpoints; rankings within the interval width are not meaningful
+        final_results['confidence_intervals'] = confidence_intervals(self.results_dir)
+        cache = getattr(self.backend, 'cache', None)
+        if cache is not None:
+            final_results['evaluation_info']['response_cache'] = {
+                'hits': cache.hits, 'misses': cache.misses, 'hit_rate': cache.hit_rate()
             }
-        }
-        
+        pool = getattr(self.backend, 'pool', None)
+        if pool is not None:
+            final_results['evaluation_info']['worker_pool'] = pool.stats()
+        concurrency = getattr(self.backend, 'concurrency', None)
+        if concurrency is not None:
+            final_results['evaluation_info']['adaptive_concurrency'] = concurrency.stats()
+        # Per-stage histograms: where the time went (dataset load, spawn, model calls, waits, scoring, writes)
+        final_results['evaluation_info']['stage_timings'] = shared_instrumentation().snapshot()
+        metrics.mark_finished()
         return final_results
     
-    def save_results(self, results: Dict, filename: str = "/results/full_scale_mainframebench_results.json"):
+    def save_results(self, results: Dict, filename: Optional[str] = None):
         """Save comprehensive results"""
-        os.makedirs('/results', exist_ok=True)
-        with open(filename, 'w') as f:
-            json.dump(results, f, indent=2)
-        print(f"Full results saved to {filename}")
-        
-        # Also save summary
-        summary_file = "/results/evaluation_summary.json"
-        summary = {
-            'timestamp': results['evaluation_info']['timestamp'],
-            'total_tests': results['evaluation_info']['total_tests'],
-            'duration_hours': results['evaluation_info']['duration_hours'],
-            'overall_score': results['performance_summary']['overall_score'],
-            'task_scores': {
-                'mcq_accuracy': results['performance_summary']['mcq_accuracy'],
-                'qa_quality': results['performance_summary']['qa_quality'],
-                'bleu_score': results['performance_summary']['bleu_score']
+        write_results(results, self.results_dir, filename)
+
+def build_final_results(total_tests: int, mcq_results: Dict, qa_results: Dict, bleu_results: Dict,
+                        total_duration: float) -> Dict:
+    """Assemble the full_scale_mainframebench_results.json document from per-task results"""
+    # Calculate comprehensive results
+    mcq_score = mcq_results.get('accuracy', 0) if 'error' not in mcq_results else 0
+    qa_score = qa_results.get('average_quality_score', 0) if 'error' not in qa_results else 0
+    bleu_score = bleu_results.get('primary_bleu', 0) if 'error' not in bleu_results else 0
+    
+    # Weighted overall score (matching academic standards)
+    overall_score = (mcq_score * 0.4 + qa_score * 0.3 + bleu_score * 0.3)
+    
+    final_results = {
+        'evaluation_info': {
+            'model': 'Amazon Q CLI (Claude)',
+            'dataset': 'MainframeBench (Complete)',
+            'total_tests': total_tests,
+            'duration_hours': total_duration / 3600,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'evaluation_type': 'Full-Scale Production Assessment'
+        },
+        'task_results': {
+            'mcq_results': mcq_results,
+            'qa_results': qa_results,
+            'code_summarization_results': bleu_results
+        },
+        'performance_summary': {
+            'overall_score': overall_score,
+            'mcq_accuracy': mcq_score,
+            'qa_quality': qa_score,
+            'bleu_score': bleu_score,
+            'tests_completed': {
+                'mcq': mcq_results.get('total', 0),
+                'qa': qa_results.get('total_samples', 0),
+                'code': bleu_results.get('total_samples', 0)
+            }
+        },
+        'benchmarks': {
+            'vs_xmainframe_instruct': {
+                'mcq_improvement': ((mcq_score - 0.7789) / 0.7789 * 100) if mcq_score > 0 else 0,
+                'bleu_improvement': ((bleu_score - 0.1139) / 0.1139 * 100) if bleu_score > 0 else 0
+            },
+            'vs_gpt35': {
+                'bleu_improvement': ((bleu_score - 0.12) / 0.12 * 100) if bleu_score > 0 else 0
             }
         }
-        
-        with open(summary_file, 'w') as f:
-            json.dump(summary, f, indent=2)
-        print(f"Summary saved to {summary_file}")
+    }
+    
+    return final_results
+
+def write_results(results: Dict, results_dir: str = RESULTS_ROOT, filename: Optional[str] = None):
+    """Write full results plus a summary derived from the per-item result streams"""
+    os.makedirs(results_dir, exist_ok=True)
+    filename = filename or os.path.join(results_dir, "full_scale_mainframebench_results.json")
+    with stage(RESULT_WRITE), open(filename, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Full results saved to {filename}")
+    
+    # Also save summary, derived from the per-item result streams
+    summary_file = os.path.join(results_dir, "evaluation_summary.json")
+    streams = {task: summarize_jsonl(os.path.join(results_dir, f"{task}_items.jsonl"), task)
+               for task in ('mcq', 'qa', 'code')}
+    summary = {
+        'timestamp': results['evaluation_info']['timestamp'],
+        'total_tests': results['evaluation_info']['total_tests'],
+        'duration_hours': results['evaluation_info']['duration_hours'],
+        'overall_score': results['performance_summary']['overall_score'],
+        'task_scores': {
+            'mcq_accuracy': streams['mcq']['means'].get('is_correct', 0),
+            'qa_quality': streams['qa']['means'].get('quality_score', 0),
+            'bleu_score': results['performance_summary']['bleu_score']
+        },
+        'items_completed': {task: stream['count'] for task, stream in streams.items()}
+    }
+    
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"Summary saved to {summary_file}")
 
 def main():
     """Run full-scale evaluation with monitoring"""
     print("FULL-SCALE MAINFRAMEBENCH EVALUATION ON AWS EKS")
     print("="*80)
     
-    evaluator = FullScaleCOBOLEvaluator()
+    parser = argparse.ArgumentParser(description="Full-scale MainframeBench evaluation")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from /results/*_items.jsonl instead of starting over")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="concurrent Q CLI calls")
+    env_shard = ShardSpec.from_env()
+    parser.add_argument('--shard-index', type=int, default=env_shard.index,
+                        help="this pod's shard (default: SHARD_INDEX or JOB_COMPLETION_INDEX)")
+    parser.add_argument('--shard-count', type=int, default=env_shard.count,
+                        help="total number of shards (default: SHARD_COUNT)")
+    parser.add_argument('--mcq-batch-size', type=int, default=DEFAULT_MCQ_BATCH_SIZE,
+                        help="MCQs per model call; 1 disables batching (default: MCQ_BATCH_SIZE or 1)")
+    parser.add_argument('--metrics-port', default=DEFAULT_METRICS_PORT,
+                        help="serve /metrics, /healthz and /readyz on this port (default: METRICS_PORT, off if unset)")
+    args = parser.parse_args()
+    
+    start_metrics_server(args.metrics_port)
+    evaluator = FullScaleCOBOLEvaluator(max_in_flight=args.max_in_flight, resume=args.resume,
+                                        shard=ShardSpec(args.shard_index, args.shard_count),
+                                        mcq_batch_size=args.mcq_batch_size)
     results = evaluator.run_full_scale_evaluation()
     evaluator.save_results(results)
     
@@ -329,6 +462,11 @@ def main():
     print(f"QA Quality: {perf['qa_quality']:.3f} ({perf['tests_completed']['qa']} tests)")
     print(f"BLEU Score: {perf['bleu_score']:.4f} ({perf['tests_completed']['code']} tests)")
     
+    print(f"\n95% Confidence Intervals:")
+    for metric, interval in results['confidence_intervals'].items():
+        if interval['items']:
+            print(f"  {metric}: [{interval['ci_low']:.4f}, {interval['ci_high']:.4f}]")
+    
     # Show improvements vs baselines
     benchmarks = results['benchmarks']
     print(f"\nVs XMainframe-Instruct:")
@@ -339,7 +477,7 @@ def main():
     print(f"  BLEU: {benchmarks['vs_gpt35']['bleu_improvement']:+.1f}%")
     
     print(f"\nTotal Duration: {results['evaluation_info']['duration_hours']:.1f} hours")
-    print(f"Results saved to: /results/")
+    print(f"Results saved to: {evaluator.results_dir}/")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Stage Timing Instrumentation
+Monotonic timers around each pipeline stage (dataset load, CLI process spawn,
+model calls, rate-limit waits, answer extraction, scoring, checkpoint and
+result writes) folded into fixed-bucket latency histograms, so a run reports
+where its time went. EVAL_INSTRUMENTATION=0 makes every timer a shared no-op.
+"""
+import argparse
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+ENABLED = os.environ.get('EVAL_INSTRUMENTATION', '1').lower() not in ('0', 'false', 'no', 'off')
+
+# Upper bounds in seconds, from in-process extraction (~10us) up to slow model calls
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Stage names used across the evaluators
+DATASET_LOAD = 'dataset_load'
+CACHE_LOOKUP = 'cache_lookup'
+RATE_LIMIT_WAIT = 'rate_limit_wait'
+PROCESS_SPAWN = 'process_spawn'
+QUERY = 'query'  # One model call: spawn (or pooled worker) plus model latency
+EXTRACT = 'extract'
+SCORE = 'score'
+CHECKPOINT_WRITE = 'checkpoint_write'
+RESULT_WRITE = 'result_write'
+
+class Histogram:
+    """Counts per latency bucket plus count, sum and max; safe to observe from several threads"""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        slot = bisect.bisect_left(self.bounds, seconds)
+        with self.lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for slot, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[slot - 1] if slot > 0 else 0.0
+                high = self.bounds[slot] if slot < len(self.bounds) else self.max
+                return min(low + (high - low) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def to_dict(self, buckets: bool = True) -> Dict:
+        summary = {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else 0.0,
+            'max_seconds': self.max,
+            'p50_seconds': self.quantile(0.50),
+            'p95_seconds': self.quantile(0.95),
+            'p99_seconds': self.quantile(0.99),
+        }
+        if buckets:
+            # Cumulative counts keyed by upper bound, as Prometheus histograms are
+            cumulative, running = {}, 0
+            for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+                running += count
+                cumulative[str(bound)] = running
+            summary['buckets'] = cumulative
+        return summary
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+NOOP_TIMER = _NoopTimer()
+
+class Instrumentation:
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def stage(self, name: str):
+        """Context manager timing one pass through a stage"""
+        if not self.enabled:
+            return NOOP_TIMER
+        return _StageTimer(self.histogram(name))
+
+    def record(self, name: str, seconds: float):
+        """Add a duration measured elsewhere"""
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def snapshot(self, buckets: bool = True) -> Dict:
+        """Per-stage histogram summaries; empty when disabled"""
+        return {name: histogram.to_dict(buckets) for name, histogram in sorted(self.histograms.items())}
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+_shared_instrumentation: Optional[Instrumentation] = None
+
+def shared_instrumentation() -> Instrumentation:
+    """Process-wide stage timers shared by the evaluators, the Q client and the result writers"""
+    global _shared_instrumentation
+    if _shared_instrumentation is None:
+        _shared_instrumentation = Instrumentation()
+    return _shared_instrumentation
+
+def stage(name: str):
+    """Time a stage on the shared instrumentation"""
+    return shared_instrumentation().stage(name)
+
+def main():
+    """Measure the per-call cost of a timer, enabled and disabled"""
+    parser = argparse.ArgumentParser(description="Benchmark stage timer overhead")
+    parser.add_argument('--calls', type=int, default=1000000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        pass
+    bare = time.perf_counter() - start
+    for enabled in (True, False):
+        instrumentation = Instrumentation(enabled)
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            with instrumentation.stage('bench'):
+                pass
+        elapsed = time.perf_counter() - start - bare
+        print(f"{'enabled' if enabled else 'disabled':>8}: {elapsed / args.calls * 1e9:6.0f} ns per timed stage")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Batched MCQ Answering
+Packs several multiple choice questions into one numbered prompt so each Q CLI
+call answers a batch, parses the per-question answer list back, and falls back
+to single-question calls for any slot that could not be parsed
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from prompts import render_mcq_batch, render_prompt
+from query_engine import ConcurrentQueryEngine
+
+DEFAULT_MAX_PROMPT_CHARS = 2000  # Evaluators truncate prompts to this length when sanitizing
+MCQ_FIELDS = ('question', 'A', 'B', 'C', 'D')
+RAW_BATCH_TASK = 'mcq_batch'  # Raw response store task holding each batched answer's whole batch response
+
+# "3: B", "3. B", "Question 3 - (B)", "3: B) Loops", "3: B - because ..."; the letter must stand
+# alone so "3: A program" is not read as A
+NUMBERED_ANSWER = re.compile(r'^\s*(?:[Qq]uestion\s*)?(\d{1,3})\s*[:.)\-=]\s*\(?([ABCD])'
+                             r'(?:\)|(?=[.,;:]?[ \t]*$|[ \t]*[-:(]))', re.MULTILINE)
+BARE_ANSWER = re.compile(r'\s*\(?([ABCD])\)?[.]?\s*')
+
+def parse_batch_answers(response: str, count: int) -> Dict[int, str]:
+    """Map question number (1-based) to answer letter for each slot found in a batch response
+
+    Numbered lines are preferred, and the last answer given for a slot wins so a
+    model that restates the questions before answering is still read correctly.
+    A response that is exactly one bare letter per line is read in order.
+    """
+    if not response:
+        return {}
+    answers = {}
+    for number, letter in NUMBERED_ANSWER.findall(response):
+        if 1 <= int(number) <= count:
+            answers[int(number)] = letter
+    if answers:
+        return answers
+
+    lines = [line for line in response.splitlines() if line.strip()]
+    bare = [BARE_ANSWER.fullmatch(line) for line in lines]
+    if len(lines) == count and all(bare):
+        return {number: match.group(1) for number, match in enumerate(bare, 1)}
+    return {}
+
+def encode_batch_response(slot: int, count: int, response: str) -> str:
+    """Raw store entry for one batched answer: its slot and the whole batch response"""
+    return json.dumps({'slot': slot, 'count': count, 'response': response})
+
+def slot_response(entry: str) -> str:
+    """Re-read a batched answer from its raw store entry with the current parser"""
+    batch = json.loads(entry)
+    return parse_batch_answers(batch['response'], batch['count']).get(batch['slot'], "")
+
+def pack_batches(items: Iterable[Tuple[Any, Dict]], batch_size: int,
+                 max_prompt_chars: int = DEFAULT_MAX_PROMPT_CHARS) -> Iterator[List[Tuple[Any, Dict]]]:
+    """Group items into batches of up to batch_size whose rendered prompt fits max_prompt_chars"""
+    batch = []
+    for item in items:
+        if batch and (len(batch) >= batch_size or
+                      len(render_mcq_batch([example for _, example in batch + [item]])) > max_prompt_chars):
+            yield batch
+            batch = []
+        batch.append(item)
+    if batch:
+        yield batch
+
+class BatchedMCQAnswerer:
+    def __init__(self, engine: ConcurrentQueryEngine, query_fn: Callable[[str], str], batch_size: int,
+                 max_prompt_chars: int = DEFAULT_MAX_PROMPT_CHARS,
+                 sanitize: Optional[Callable[[str], str]] = None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.engine = engine  # Sends batch prompts as rendered
+        # Single-question fallbacks run concurrently too, in order, under the same in-flight bound
+        self.fallback_engine = ConcurrentQueryEngine(query_fn, engine.max_in_flight)
+        self.batch_size = batch_size
+        self.max_prompt_chars = max_prompt_chars
+        # Applied to each question field rather than the whole prompt, so the instructions and
+        # slot labels reach the model intact
+        self.sanitize = sanitize
+        self.model_calls = 0
+        self.batched_answers = 0
+        self.fallbacks = 0
+
+    def prepare(self, example: Dict) -> Dict:
+        if self.sanitize is None:
+            return example
+        return dict(example, **{field: self.sanitize(example[field]) for field in MCQ_FIELDS})
+
+    def run(self, items: Iterable[Tuple[Any, Dict]],
+            replay: Optional[Callable[[Any], Optional[str]]] = None,
+            on_batched: Optional[Callable[[Any, int, int, str], None]] = None) -> Iterator[Tuple[Any, Dict, str]]:
+        """Answer (key, example) items, yielding (key, example, response) in input order
+
+        For a batched answer the response is the parsed letter, so it scores (and
+        replays) the same as a single-question response; on_batched receives
+        (key, slot, count, raw batch response) for it. Items with a stored
+        response from replay are not sent again.
+        """
+        def jobs():
+            # Packed by unsanitized length; sanitizing only shortens a prompt
+            for batch in pack_batches(items, self.batch_size, self.max_prompt_chars):
+                stored = [replay(key) if replay is not None else None for key, _ in batch]
+                todo = [self.prepare(example) for (_, example), response in zip(batch, stored) if response is None]
+                yield (batch, stored, len(todo)), render_mcq_batch(todo) if todo else ""
+
+        def answered():
+            """(key, example, response) per item, with None where a single-question call is needed"""
+            # Batches whose items were all replayed need no query
+            for (batch, stored, asked), response in self.engine.run(jobs(),
+                                                                     replay=lambda job: "" if not job[2] else None):
+                if asked:
+                    self.model_calls += 1
+                answers = parse_batch_answers(response, asked)
+                slot = 0
+                for (key, example), stored_response in zip(batch, stored):
+                    if stored_response is not None:
+                        yield key, example, stored_response
+                        continue
+                    slot += 1
+                    if slot in answers:
+                        self.batched_answers += 1
+                        if on_batched is not None:
+                            on_batched(key, slot, asked, response)
+                        yield key, example, answers[slot]
+                    else:
+                        self.fallbacks += 1
+                        self.model_calls += 1
+                        yield key, example, None
+
+        fallback_jobs = ((item, render_prompt('mcq', item[1]) if item[2] is None else "") for item in answered())
+        for (key, example, _), response in self.fallback_engine.run(fallback_jobs, replay=lambda item: item[2]):
+            yield key, example, response
+
+    def stats(self) -> Dict:
+        answered = self.batched_answers + self.fallbacks
+        return {
+            'batch_size': self.batch_size,
+            'model_calls': self.model_calls,
+            'batched_answers': self.batched_answers,
+            'fallbacks': self.fallbacks,
+            'parse_rate': self.batched_answers / answered if answered else 0.0
+        }
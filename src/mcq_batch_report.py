@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+MCQ Batch Size Report
+Runs the same MCQ sample in single-question mode and at several batch sizes,
+and compares accuracy, agreement with single-question answers, model calls
+and throughput so the batch size can be chosen on evidence
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+from dataset_snapshot import load_mainframebench
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from prompts import render_jobs
+from query_engine import DEFAULT_MAX_IN_FLIGHT
+
+def run_mode(evaluator: FullScaleCOBOLEvaluator, examples: List[Dict], batch_size: int) -> Dict:
+    """Answer every example at one batch size (1 = single-question mode)"""
+    items = list(enumerate(examples))
+    start = time.time()
+    if batch_size > 1:
+        batcher = evaluator.mcq_batcher(batch_size)
+        answered = [(i, response) for i, _, response in batcher.run(items)]
+        calls, fallbacks = batcher.model_calls, batcher.fallbacks
+    else:
+        jobs, index = render_jobs(lambda: items, 'mcq')
+        answered = list(evaluator.query_engine.run(jobs))
+        calls, fallbacks = index.total, 0
+    duration = time.time() - start
+
+    predicted = [evaluator.extract_mcq_answer(response) for _, response in answered]
+    correct = sum(p == example['answer'] for p, example in zip(predicted, examples))
+    return {
+        'batch_size': batch_size,
+        'accuracy': correct / len(examples) if examples else 0,
+        'model_calls': calls,
+        'fallbacks': fallbacks,
+        'duration_seconds': duration,
+        'questions_per_second': len(examples) / duration if duration > 0 else 0,
+        'predicted': predicted
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and single-question MCQ evaluation")
+    parser.add_argument('--sample-size', type=int, default=100, help="MCQs to answer in every mode")
+    parser.add_argument('--batch-sizes', default='1,5,10,20', help="comma-separated batch sizes; 1 = single mode")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument('--output', default='mcq_batch_report.json')
+    args = parser.parse_args()
+
+    data = load_mainframebench('multiple_choice_question')
+    examples = list(data.select(range(min(args.sample_size, len(data)))))
+    evaluator = FullScaleCOBOLEvaluator(max_in_flight=args.max_in_flight)
+    evaluator.backend.cache = None  # Every mode must actually query the model for a fair comparison
+
+    batch_sizes = sorted({int(size) for size in args.batch_sizes.split(',')} | {1})
+    modes = []
+    for batch_size in batch_sizes:
+        print(f"Running batch size {batch_size} on {len(examples)} MCQs...")
+        modes.append(run_mode(evaluator, examples, batch_size))
+
+    single = modes[0]['predicted']
+    print(f"\n{'batch':>5} {'accuracy':>9} {'agree':>7} {'calls':>6} {'fallback':>9} {'q/s':>7}")
+    for mode in modes:
+        predicted = mode.pop('predicted')
+        mode['agreement_with_single'] = sum(a == b for a, b in zip(predicted, single)) / len(single) if single else 0
+        mode['speedup_vs_single'] = (mode['questions_per_second'] / modes[0]['questions_per_second']
+                                     if modes[0]['questions_per_second'] else 0)
+        print(f"{mode['batch_size']:>5} {mode['accuracy']:>9.3f} {mode['agreement_with_single']:>7.3f} "
+              f"{mode['model_calls']:>6} {mode['fallbacks']:>9} {mode['questions_per_second']:>7.2f}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'sample_size': len(examples), 'modes': modes}, f, indent=2)
+    print(f"\nReport saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Merge sharded full-scale evaluation outputs
+Combines the per-shard result directories written by an Indexed Job into the
+same full_scale_mainframebench_results.json schema as a single-pod run
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List
+from bleu_evaluator import SecureBLEUEvaluator
+from bootstrap import confidence_intervals
+from bleu_stats import reduce_stats
+from full_scale_evaluator import RESULTS_ROOT, build_final_results, write_results
+from result_sink import JsonlResultSink, read_jsonl
+
+SHARD_DIR_PATTERN = re.compile(r'shard_(\d+)_of_(\d+)$')
+
+def find_shard_dirs(results_root: str = RESULTS_ROOT) -> List[str]:
+    """Locate every shard directory, failing if any shard of the run is missing"""
+    dirs = {}
+    counts = set()
+    for path in glob.glob(os.path.join(results_root, 'shard_*_of_*')):
+        match = SHARD_DIR_PATTERN.search(path)
+        if match:
+            dirs[int(match.group(1))] = path
+            counts.add(int(match.group(2)))
+
+    if len(counts) != 1:
+        raise ValueError(f"expected shard outputs from exactly one shard count in {results_root}, found {sorted(counts)}")
+    count = counts.pop()
+    missing = sorted(set(range(count)) - set(dirs))
+    if missing:
+        raise ValueError(f"missing shard outputs: {missing} of {count}")
+    return [dirs[i] for i in range(count)]
+
+def sorted_item_stream(path: str) -> Iterator[Dict]:
+    """One shard's records in index order, streamed as is unless a crash left them unsorted"""
+    indices = [record['index'] for record in read_jsonl(path)]
+    if all(a < b for a, b in zip(indices, indices[1:])):
+        return read_jsonl(path)
+    return iter(sorted(read_jsonl(path), key=lambda record: record['index']))
+
+def merge_item_streams(shard_dirs: List[str], task: str, results_root: str = RESULTS_ROOT) -> str:
+    """Interleave the shards' per-item streams back into global dataset order"""
+    streams = [sorted_item_stream(path) for path in
+               (os.path.join(d, f"{task}_items.jsonl") for d in shard_dirs) if os.path.exists(path)]
+    merged_path = os.path.join(results_root, f"{task}_items.jsonl")
+    with JsonlResultSink(merged_path, flush_every=500) as sink:
+        for record in heapq.merge(*streams, key=lambda record: record['index']):
+            sink.write(record)
+    return merged_path
+
+def merge_task_results(shard_results: List[Dict], key: str) -> Dict:
+    """Collect one task's per-shard result dicts, returning the first error if any shard failed"""
+    task_results = [results['task_results'][key] for results in shard_results]
+    for result in task_results:
+        if 'error' in result:
+            return {'error': result['error']}
+    return {'shards': task_results}
+
+def sum_counters(counters: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Add up count dicts key by key"""
+    total = {}
+    for counter in counters:
+        for name, count in counter.items():
+            total[name] = total.get(name, 0) + count
+    return total
+
+def merge_shard_counters(shards: List[Dict]) -> Dict:
+    """Sum one task's per-shard extraction strategy, prompt dedup and MCQ batching counters
+
+    Each shard deduplicates its own prompts, so unique_prompts counts a prompt
+    once per shard that sent it, which is what was actually queried.
+    """
+    merged = {}
+    strategies = [shard['extraction_strategies'] for shard in shards if 'extraction_strategies' in shard]
+    if strategies:
+        merged['extraction_strategies'] = sum_counters(strategies)
+
+    dedup = [shard['prompt_dedup'] for shard in shards if 'prompt_dedup' in shard]
+    if dedup:
+        stats = sum_counters({name: count for name, count in shard.items() if name != 'dedup_rate'}
+                             for shard in dedup)
+        stats['dedup_rate'] = stats['duplicate_prompts'] / stats['total_prompts'] if stats['total_prompts'] else 0.0
+        merged['prompt_dedup'] = stats
+
+    batching = [shard['mcq_batching'] for shard in shards if 'mcq_batching' in shard]
+    if batching:
+        stats = sum_counters({name: count for name, count in shard.items() if name not in ('batch_size', 'parse_rate')}
+                             for shard in batching)
+        answered = stats['batched_answers'] + stats['fallbacks']
+        merged['mcq_batching'] = {'batch_size': batching[0]['batch_size'], **stats,
+                                  'parse_rate': stats['batched_answers'] / answered if answered else 0.0}
+    return merged
+
+def merge_shards(results_root: str = RESULTS_ROOT) -> Dict:
+    """Merge all shard outputs under results_root into one full-scale results document"""
+    shard_dirs = find_shard_dirs(results_root)
+    shard_results = []
+    for shard_dir in shard_dirs:
+        with open(os.path.join(shard_dir, 'full_scale_mainframebench_results.json')) as f:
+            shard_results.append(json.load(f))
+    print(f"Merging {len(shard_dirs)} shards from {results_root}")
+
+    # MCQ: exact integer totals from the merged stream
+    mcq_results = merge_task_results(shard_results, 'mcq_results')
+    if 'error' not in mcq_results:
+        correct = total = 0
+        for record in read_jsonl(merge_item_streams(shard_dirs, 'mcq', results_root)):
+            correct += record['is_correct']
+            total += 1
+        samples = [s for shard in mcq_results['shards'] for s in shard['sample_results']]
+        mcq_results = {
+            'task': 'Multiple Choice Questions (FULL)',
+            'accuracy': correct / total if total > 0 else 0,
+            'correct': correct,
+            'total': total,
+            'sample_results': sorted(samples, key=lambda s: s['question_id']),
+            **merge_shard_counters(mcq_results['shards']),
+            'completion_status': 'COMPLETE'
+        }
+
+    # QA: sum scores in dataset order so the average matches a single-pod run bit for bit
+    qa_results = merge_task_results(shard_results, 'qa_results')
+    if 'error' not in qa_results:
+        quality_total = 0.0
+        quality_count = 0
+        for record in read_jsonl(merge_item_streams(shard_dirs, 'qa', results_root)):
+            quality_total += record['quality_score']
+            quality_count += 1
+        samples = [s for shard in qa_results['shards'] for s in shard['sample_results']]
+        qa_results = {
+            'task': 'Question Answering (FULL)',
+            'total_samples': quality_count,
+            'average_quality_score': quality_total / quality_count if quality_count else 0,
+            'sample_results': sorted(samples, key=lambda s: s['question_id']),
+            **merge_shard_counters(qa_results['shards']),
+            'completion_status': 'COMPLETE'
+        }
+
+    # Code summarization: corpus BLEU is exact from the summed per-shard statistics
+    bleu_results = merge_task_results(shard_results, 'code_summarization_results')
+    if 'error' not in bleu_results:
+        merge_item_streams(shard_dirs, 'code', results_root)
+        shards = bleu_results['shards']
+        details = [d for shard in shards for d in shard['detailed_results']]
+        bleu_results = SecureBLEUEvaluator.build_code_results(
+            reduce_stats(shard['bleu_stats'] for shard in shards),
+            sum(shard['total_samples'] for shard in shards), details[:5])
+        bleu_results.update(merge_shard_counters(shards))
+
+    # Shards run in parallel, so wall-clock time is the slowest shard
+    duration = max(results['evaluation_info']['duration_hours'] for results in shard_results) * 3600
+    final_results = build_final_results(shard_results[0]['evaluation_info']['total_tests'],
+                                        mcq_results, qa_results, bleu_results, duration)
+    final_results['evaluation_info']['shard'] = {'index': None, 'count': len(shard_dirs)}
+    # The merged item streams cover the whole dataset, so intervals come from them, not per shard
+    final_results['confidence_intervals'] = confidence_intervals(results_root)
+    return final_results
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge sharded full-scale evaluation results")
+    parser.add_argument('--results-root', default=RESULTS_ROOT, help="directory holding shard_*_of_* outputs")
+    args = parser.parse_args()
+
+    results = merge_shards(args.results_root)
+    write_results(results, args.results_root)
+
+    perf = results['performance_summary']
+    print(f"Overall Score: {perf['overall_score']:.3f}")
+    print(f"MCQ Accuracy: {perf['mcq_accuracy']:.3f} ({perf['tests_completed']['mcq']} tests)")
+    print(f"QA Quality: {perf['qa_quality']:.3f} ({perf['tests_completed']['qa']} tests)")
+    print(f"BLEU Score: {perf['bleu_score']:.4f} ({perf['tests_completed']['code']} tests)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Evaluation Metrics Endpoint
+Process-wide progress metrics (items completed per task, in-flight queries,
+error and timeout counts, cache hit rate, rolling throughput and ETA) served
+in the Prometheus text format from a background thread, together with
+/healthz and /readyz probes that fail when the run stops making progress
+rather than only when the process is gone. Off unless METRICS_PORT is set.
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from instrumentation import shared_instrumentation
+
+DEFAULT_METRICS_PORT = os.environ.get('METRICS_PORT', '')  # Empty = no endpoint
+DEFAULT_STALL_SECONDS = float(os.environ.get('METRICS_STALL_SECONDS', '900'))
+THROUGHPUT_WINDOW_SECONDS = 300
+OUTCOMES = ('ok', 'error', 'timeout')
+
+class EvaluationMetrics:
+    def __init__(self, stall_seconds: float = DEFAULT_STALL_SECONDS,
+                 window_seconds: float = THROUGHPUT_WINDOW_SECONDS):
+        self.stall_seconds = stall_seconds
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.last_progress = self.started
+        self.tasks: Dict[str, Dict[str, int]] = {}  # task -> {'completed', 'total'}
+        self.recent = deque()  # Completion times inside the throughput window
+        self.in_flight = 0
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.gauges: Dict[str, float] = {}
+        self.ready = False
+        self.finished = False
+
+    def set_total(self, task: str, total: int):
+        """Declare how many items a task has, ahead of or when it starts"""
+        with self.lock:
+            self.tasks.setdefault(task, {'completed': 0, 'total': 0})['total'] = total
+
+    def start_task(self, task: str, total: int):
+        """A task has loaded its data and is about to query; the pod is ready from here on"""
+        self.set_total(task, total)
+        with self.lock:
+            self.ready = True
+            self.last_progress = time.monotonic()
+
+    def item_completed(self, task: str, count: int = 1):
+        now = time.monotonic()
+        with self.lock:
+            self.tasks.setdefault(task, {'completed': 0, 'total': 0})['completed'] += count
+            self.recent.extend([now] * count)
+            self.last_progress = now
+
+    def query_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def query_finished(self, outcome: Optional[str]):
+        """outcome is "ok", "error" or "timeout"; None (cancelled) only frees the slot"""
+        with self.lock:
+            self.in_flight -= 1
+            if outcome is not None:
+                self.outcomes[outcome] += 1
+                self.last_progress = time.monotonic()
+
+    def cache_hit(self):
+        with self.lock:
+            self.cache_hits += 1
+
+    def cache_miss(self):
+        with self.lock:
+            self.cache_misses += 1
+
+    def set_gauge(self, name: str, value: float):
+        """Publish an extra gauge as eval_<name>"""
+        with self.lock:
+            self.gauges[name] = value
+
+    def mark_finished(self):
+        with self.lock:
+            self.finished = True
+
+    def throughput(self) -> float:
+        """Items per second over the last window (or since start, if shorter)"""
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and self.recent[0] < now - self.window_seconds:
+                self.recent.popleft()
+            span = min(self.window_seconds, now - self.started)
+            return len(self.recent) / span if span > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining declared items at the current rolling throughput, or None when unknown"""
+        rate = self.throughput()
+        with self.lock:
+            remaining = sum(max(t['total'] - t['completed'], 0) for t in self.tasks.values())
+        if remaining == 0:
+            return 0.0
+        return remaining / rate if rate > 0 else None
+
+    def cache_hit_rate(self) -> float:
+        with self.lock:
+            lookups = self.cache_hits + self.cache_misses
+            return self.cache_hits / lookups if lookups else 0.0
+
+    def liveness(self) -> Tuple[bool, str]:
+        """Live unless started, unfinished and without any completed query or item for stall_seconds"""
+        with self.lock:
+            idle = time.monotonic() - self.last_progress
+            if self.finished or not self.ready or idle <= self.stall_seconds:
+                return True, f"last progress {idle:.0f}s ago"
+            return False, f"no progress for {idle:.0f}s (limit {self.stall_seconds:.0f}s)"
+
+    def snapshot(self) -> Dict:
+        throughput = self.throughput()
+        eta = self.eta_seconds()
+        live, reason = self.liveness()
+        with self.lock:
+            return {
+                'tasks': {task: dict(counts) for task, counts in self.tasks.items()},
+                'in_flight': self.in_flight,
+                'queries': dict(self.outcomes),
+                'cache': {'hits': self.cache_hits, 'misses': self.cache_misses},
+                'gauges': dict(self.gauges),
+                'seconds_since_progress': time.monotonic() - self.last_progress,
+                'throughput_items_per_second': throughput,
+                'eta_seconds': eta,
+                'ready': self.ready,
+                'finished': self.finished,
+                'live': live,
+                'liveness': reason,
+            }
+
+    def to_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format(value)}" if label_text else f"{name} {_format(value)}")
+
+        tasks = snapshot['tasks']
+        metric('eval_items_completed_total', 'counter', "Items finished per task",
+               [({'task': task}, counts['completed']) for task, counts in tasks.items()])
+        metric('eval_items', 'gauge', "Items to evaluate per task",
+               [({'task': task}, counts['total']) for task, counts in tasks.items()])
+        metric('eval_queries_in_flight', 'gauge', "Model queries currently running", [({}, snapshot['in_flight'])])
+        metric('eval_queries_total', 'counter', "Finished model queries by outcome",
+               [({'outcome': outcome}, count) for outcome, count in snapshot['queries'].items()])
+        metric('eval_cache_lookups_total', 'counter', "Response cache lookups by result",
+               [({'result': 'hit'}, snapshot['cache']['hits']), ({'result': 'miss'}, snapshot['cache']['misses'])])
+        metric('eval_cache_hit_ratio', 'gauge', "Share of cache lookups answered from the cache",
+               [({}, self.cache_hit_rate())])
+        metric('eval_throughput_items_per_second', 'gauge',
+               f"Items finished per second over the last {self.window_seconds:.0f}s",
+               [({}, snapshot['throughput_items_per_second'])])
+        metric('eval_eta_seconds', 'gauge', "Estimated seconds until every declared item is finished",
+               [({}, math.nan if snapshot['eta_seconds'] is None else snapshot['eta_seconds'])])
+        metric('eval_seconds_since_progress', 'gauge', "Seconds since the last finished query or item",
+               [({}, snapshot['seconds_since_progress'])])
+        metric('eval_ready', 'gauge', "1 once the first task has loaded its data", [({}, int(snapshot['ready']))])
+        for name, value in sorted(snapshot['gauges'].items()):
+            metric(f"eval_{name}", 'gauge', f"{name.replace('_', ' ')}", [({}, value)])
+
+        stages = shared_instrumentation().snapshot()
+        if stages:
+            lines.append("# HELP eval_stage_seconds Time spent per pipeline stage")
+            lines.append("# TYPE eval_stage_seconds histogram")
+            for stage, histogram in stages.items():
+                for bound, count in histogram['buckets'].items():
+                    lines.append(f'eval_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'eval_stage_seconds_sum{{stage="{stage}"}} {_format(histogram["total_seconds"])}')
+                lines.append(f'eval_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+def _format(value) -> str:
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+_shared_metrics: Optional[EvaluationMetrics] = None
+
+def shared_metrics() -> EvaluationMetrics:
+    """Process-wide progress metrics updated by the Q client and the evaluators"""
+    global _shared_metrics
+    if _shared_metrics is None:
+        _shared_metrics = EvaluationMetrics()
+    return _shared_metrics
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics: EvaluationMetrics = None  # Set per server in MetricsServer
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            self._reply(200, self.metrics.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+        elif path == '/healthz':
+            live, reason = self.metrics.liveness()
+            self._reply(200 if live else 503, reason + "\n")
+        elif path == '/readyz':
+            ready = self.metrics.ready
+            self._reply(200 if ready else 503, "ready\n" if ready else "evaluation not started\n")
+        elif path == '/progress':
+            self._reply(200, json.dumps(self.metrics.snapshot(), indent=2) + "\n", 'application/json')
+        else:
+            self._reply(404, "not found\n")
+
+    def _reply(self, status: int, body: str, content_type: str = 'text/plain; charset=utf-8'):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Probes every few seconds would drown the evaluation log
+
+class MetricsServer:
+    def __init__(self, port: int, metrics: Optional[EvaluationMetrics] = None, host: str = '0.0.0.0'):
+        self.metrics = metrics or shared_metrics()
+        handler = type('MetricsHandler', (_Handler,), {'metrics': self.metrics})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]  # The bound port when 0 was asked for
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+
+    def start(self) -> 'MetricsServer':
+        self.thread.start()
+        print(f"Metrics endpoint on :{self.port} (/metrics, /healthz, /readyz, /progress)")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def start_metrics_server(port: Optional[str] = DEFAULT_METRICS_PORT) -> Optional[MetricsServer]:
+    """Serve the shared metrics on port, or do nothing when no port is configured"""
+    if port in (None, ''):
+        return None
+    return MetricsServer(int(port)).start()
+
+def main():
+    """Serve metrics for a simulated run, to try the endpoint and probes locally"""
+    parser = argparse.ArgumentParser(description="Local demo of the evaluation metrics endpoint")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--stall-after', type=int, default=0, help="stop progressing after N items (0 = never)")
+    args = parser.parse_args()
+
+    metrics = shared_metrics()
+    metrics.stall_seconds = 10
+    start_metrics_server(str(args.port))
+    metrics.start_task('mcq', args.items)
+    for i in range(args.items):
+        if args.stall_after and i >= args.stall_after:
+            print("Stalled; /healthz turns 503 after 10s")
+            time.sleep(3600)
+        metrics.query_started()
+        time.sleep(0.05)
+        metrics.query_finished('ok' if i % 20 else 'error')
+        metrics.item_completed('mcq')
+    metrics.mark_finished()
+    print(f"Done; curl localhost:{args.port}/metrics, Ctrl-C to exit")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Model Backends
+Evaluators talk to the model through a small backend protocol. The Q CLI
+backend is AsyncQClient wired to the shared rate limiter, response cache and
+worker pool; the mock backend answers offline with configurable latency,
+failure rate and accuracy so concurrency, caching and sharding can be
+load-tested without the real CLI. MODEL_BACKEND=mock selects it for a whole run.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+from q_client import AsyncQClient, Q_CHAT_ARGS
+from rate_limiter import TokenBucketRateLimiter, shared_rate_limiter
+from response_cache import ResponseCache, shared_response_cache
+from q_worker_pool import shared_worker_pool
+from concurrency_controller import AdaptiveConcurrencyController, shared_concurrency_controller
+from prompts import prompt_digest
+
+DEFAULT_BACKEND = os.environ.get('MODEL_BACKEND', 'q')
+MOCK_MODEL_NAME = 'mock'
+
+# MCQ prompts as the evaluators send them: sanitizing may strip parentheses and the letter n,
+# so "Question 3:" can arrive as "Questio 3:" and "A) Copies data" as "A Copies data"
+MOCK_MCQ_SLOT = re.compile(r'Questio?n? (\d+):')
+MOCK_MCQ_CHOICES = re.compile(r'^\s*A\)? .*\n\s*B\)? ', re.MULTILINE)
+
+class ModelBackend(Protocol):
+    async def query(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Answer one prompt, returning "" on failure and raising asyncio.TimeoutError on timeout"""
+
+    def query_sync(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Blocking form of query() for synchronous callers"""
+
+def q_cli_backend(args: Sequence[str] = Q_CHAT_ARGS, timeout: float = 30, cwd: Optional[str] = None,
+                  prompt_via_stdin: bool = True) -> AsyncQClient:
+    """The Amazon Q CLI with the process-wide rate limiter, response cache, worker pool and concurrency controller"""
+    return AsyncQClient(args=args, timeout=timeout, cwd=cwd, prompt_via_stdin=prompt_via_stdin,
+                        rate_limiter=shared_rate_limiter(), cache=shared_response_cache(),
+                        pool=shared_worker_pool(timeout=timeout, cwd=cwd),
+                        concurrency=shared_concurrency_controller())
+
+class LatencyDistribution:
+    """Seconds per call, parsed from a spec such as "lognormal:2.5,0.6"
+
+    fixed:S, uniform:LOW,HIGH, exponential:MEAN, lognormal:MEDIAN,SIGMA, or
+    empirical:PATH where PATH is a JSON list of observed latencies in seconds.
+    """
+
+    def __init__(self, spec: str = 'fixed:0'):
+        self.spec = spec
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        if kind == 'empirical':
+            with open(params) as f:
+                self.samples: List[float] = [float(value) for value in json.load(f)]
+            if not self.samples:
+                raise ValueError(f"no latency samples in {params}")
+            return
+        self.params = [float(value) for value in params.split(',')] if params else []
+        expected = {'fixed': 1, 'uniform': 2, 'exponential': 1, 'lognormal': 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"invalid latency distribution: {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'exponential':
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        if self.kind == 'lognormal':
+            return rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return rng.choice(self.samples)
+
+class MockBackend(AsyncQClient):
+    """Deterministic offline model
+
+    Shares AsyncQClient's cache, rate limiting and timeout semantics; only the
+    CLI call is simulated. Each prompt's latency, failure and correctness are
+    drawn from an RNG seeded by (seed, prompt), so a run is reproducible
+    whatever order the concurrent calls happen in. Accuracy applies to
+    prompts registered with add_answers(), which the evaluators do through
+    register_references(); others get a plausible guess.
+    """
+
+    def __init__(self, latency: str = 'fixed:0', failure_rate: float = 0.0, accuracy: float = 1.0,
+                 seed: int = 0, timeout: float = 30,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 cache: Optional[ResponseCache] = None,
+                 concurrency: Optional[AdaptiveConcurrencyController] = None):
+        super().__init__(args=(MOCK_MODEL_NAME,), timeout=timeout, rate_limiter=rate_limiter,
+                         cache=cache, model=MOCK_MODEL_NAME, concurrency=concurrency)
+        self.latency = LatencyDistribution(latency)
+        self.failure_rate = failure_rate
+        self.accuracy = accuracy
+        self.seed = seed
+        self.answers: Dict[str, str] = {}
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls, timeout: float = 30) -> 'MockBackend':
+        return cls(latency=os.environ.get('MOCK_LATENCY', 'fixed:0'),
+                   failure_rate=float(os.environ.get('MOCK_FAILURE_RATE', '0')),
+                   accuracy=float(os.environ.get('MOCK_ACCURACY', '1.0')),
+                   seed=int(os.environ.get('MOCK_SEED', '0')), timeout=timeout,
+                   rate_limiter=shared_rate_limiter(), cache=shared_response_cache(),
+                   concurrency=shared_concurrency_controller())
+
+    def add_answers(self, pairs: Iterable[Tuple[str, str]]):
+        """Register (prompt, correct answer) pairs; prompts must be as the backend receives them"""
+        for prompt, answer in pairs:
+            self.answers[prompt_digest(prompt)] = answer
+
+    async def _exec(self, prompt: str, timeout: Optional[float]):
+        digest = prompt_digest(prompt)
+        rng = random.Random(f"{self.seed}:{digest}")
+        latency = self.latency.sample(rng)
+        timeout = self.timeout if timeout is None else timeout
+        if latency > timeout:
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError(f"Mock call timed out after {timeout}s")
+        await asyncio.sleep(latency)
+        self.calls += 1
+        if rng.random() < self.failure_rate:
+            return 1, ""
+        return 0, self._answer(prompt, digest, rng)
+
+    def _answer(self, prompt: str, digest: str, rng: random.Random) -> str:
+        correct = rng.random() < self.accuracy
+        reference = self.answers.get(digest)
+        if reference in ('A', 'B', 'C', 'D'):
+            return reference if correct else rng.choice([c for c in 'ABCD' if c != reference])
+        if reference is not None:
+            if correct:
+                return reference
+            words = reference.split()
+            rng.shuffle(words)
+            return " ".join(words)
+
+        slots = MOCK_MCQ_SLOT.findall(prompt)
+        if slots:
+            return "\n".join(f"{number}: {rng.choice('ABCD')}" for number in slots)
+        if MOCK_MCQ_CHOICES.search(prompt):
+            return rng.choice('ABCD')
+        return f"Mock answer {digest[:8]}"
+
+def register_references(backend: ModelBackend, pairs: Iterable[Tuple[str, str]]):
+    """Hand (prompt as sent, reference answer) pairs to the mock backend so MOCK_ACCURACY applies
+
+    Other backends ignore them, and the pairs are not even rendered.
+    """
+    if isinstance(backend, MockBackend):
+        backend.add_answers(pairs)
+
+def default_backend(args: Sequence[str] = Q_CHAT_ARGS, timeout: float = 30, cwd: Optional[str] = None,
+                    prompt_via_stdin: bool = True) -> ModelBackend:
+    """The backend named by MODEL_BACKEND ("q" or "mock"), given each evaluator's CLI settings"""
+    if DEFAULT_BACKEND == 'mock':
+        return MockBackend.from_env(timeout)
+    if DEFAULT_BACKEND != 'q':
+        raise ValueError(f"unknown MODEL_BACKEND: {DEFAULT_BACKEND!r}")
+    return q_cli_backend(args, timeout, cwd, prompt_via_stdin)
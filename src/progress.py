@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Throttled Progress Reporting
+Evaluation loops call update() once per item; output is aggregated and
+emitted at most every PROGRESS_INTERVAL_SECONDS with rate and ETA. On a
+terminal the report is a tqdm bar, otherwise (pod logs) one JSON line per
+interval plus a final line when the task ends.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional, TextIO
+
+DEFAULT_INTERVAL = float(os.environ.get('PROGRESS_INTERVAL_SECONDS', '30'))
+DEFAULT_MODE = os.environ.get('PROGRESS_MODE', 'auto')  # auto, tqdm, json or off
+MODES = ('auto', 'tqdm', 'json', 'off')
+
+def resolve_mode(mode: str = DEFAULT_MODE, stream: Optional[TextIO] = None) -> str:
+    """tqdm when auto and stderr is a terminal with tqdm installed, JSON lines otherwise"""
+    if mode not in MODES:
+        raise ValueError(f"unknown progress mode {mode!r}; expected one of {', '.join(MODES)}")
+    if mode != 'auto':
+        return mode
+    stream = stream or sys.stderr
+    if hasattr(stream, 'isatty') and stream.isatty():
+        try:
+            import tqdm  # noqa: F401
+            return 'tqdm'
+        except ImportError:
+            pass
+    return 'json'
+
+class ProgressReporter:
+    """Progress of one task; initial counts items already done (e.g. on resume)"""
+
+    def __init__(self, task: str, total: int, interval: float = DEFAULT_INTERVAL, mode: str = DEFAULT_MODE,
+                 initial: int = 0, stream: Optional[TextIO] = None):
+        self.task = task
+        self.total = total
+        self.interval = interval
+        self.completed = initial
+        self.initial = initial
+        self.fields: Dict = {}
+        self.stream = stream
+        self.mode = resolve_mode(mode, stream)
+        self.started = time.monotonic()
+        self.last_emit = self.started
+        self.closed = False
+        self.bar = None
+        if self.mode == 'tqdm':
+            from tqdm import tqdm
+            self.bar = tqdm(total=total, initial=initial, desc=task, unit='item', file=stream,
+                            mininterval=min(interval, 1.0), dynamic_ncols=True)
+
+    def update(self, count: int = 1, **fields):
+        """Count finished items; fields (accuracy, average score, ...) go into the next report"""
+        self.completed += count
+        if fields:
+            self.fields.update(fields)
+        if self.bar is not None:
+            self.bar.update(count)
+            return
+        if self.mode == 'json':
+            now = time.monotonic()
+            if now - self.last_emit >= self.interval:
+                self.last_emit = now
+                self._emit('progress', now)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Items per second since the reporter started, not counting initial"""
+        elapsed = (now or time.monotonic()) - self.started
+        return (self.completed - self.initial) / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        remaining = max(self.total - self.completed, 0)
+        if remaining == 0:
+            return 0.0
+        rate = self.rate(now)
+        return remaining / rate if rate > 0 else None
+
+    def report(self, now: Optional[float] = None) -> Dict:
+        now = now or time.monotonic()
+        eta = self.eta_seconds(now)
+        return {
+            'task': self.task,
+            'completed': self.completed,
+            'total': self.total,
+            'percent': round(self.completed / self.total * 100, 1) if self.total else 100.0,
+            'rate_per_second': round(self.rate(now), 3),
+            'eta_seconds': None if eta is None else round(eta, 1),
+            'elapsed_seconds': round(now - self.started, 1),
+            **self.fields,
+        }
+
+    def write(self, message: str):
+        """Print a message without breaking the tqdm bar"""
+        if self.bar is not None:
+            self.bar.write(message, file=self.stream)
+        elif self.mode != 'off':
+            print(message, file=self.stream)
+
+    def _emit(self, event: str, now: float):
+        print(json.dumps({'event': event, 'time': round(time.time(), 3), **self.report(now)}),
+              file=self.stream or sys.stdout, flush=True)
+
+    def close(self):
+        """Final report for the task; safe to call more than once"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.bar is not None:
+            if self.fields:
+                self.bar.set_postfix(self.fields, refresh=False)
+            self.bar.close()
+        elif self.mode == 'json':
+            self._emit('done', time.monotonic())
+
+    def __enter__(self) -> 'ProgressReporter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    """Compare per-item print against the throttled reporter"""
+    parser = argparse.ArgumentParser(description="Benchmark progress reporting overhead")
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+
+    with open(os.devnull, 'w') as devnull:
+        start = time.perf_counter()
+        for i in range(args.items):
+            print(f"MCQ Progress: {i+1}/{args.items} ({((i+1)/args.items*100):.1f}%)", file=devnull, flush=True)
+        per_item = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ProgressReporter('mcq', args.items, mode='json', stream=devnull) as progress:
+            for i in range(args.items):
+                progress.update(accuracy=0.5)
+        throttled = time.perf_counter() - start
+    print(f"per-item print: {per_item / args.items * 1e6:5.2f} us/item")
+    print(f"throttled:      {throttled / args.items * 1e6:5.2f} us/item")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Prompt Templates and Dedup Index
+All evaluators render prompts from the templates here and hash the result
+so duplicate or near-identical MainframeBench prompts are sent to
+the model only once and their answers fanned back out
+"""
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+class PromptTemplate:
+    def __init__(self, text: str, limits: Optional[Dict[str, int]] = None):
+        self.text = text
+        self.limits = limits or {}  # Field -> max characters, for security and prompt size
+
+    def render(self, example: Dict) -> str:
+        fields = dict(example)
+        for name, limit in self.limits.items():
+            fields[name] = fields[name][:limit]
+        return self.text.format(**fields)
+
+MCQ_CHOICES = "A) {A}\nB) {B}\nC) {C}\nD) {D}"
+
+TEMPLATES: Dict[str, PromptTemplate] = {
+    # Evaluator prompts (cobol_evaluator, complete_cobol_evaluator, full_scale_evaluator, bleu_evaluator)
+    'mcq': PromptTemplate("Question: {question}\n" + MCQ_CHOICES +
+                          "\n\nPlease answer with just the letter (A, B, C, or D)."),
+    'qa': PromptTemplate("Question: {question}\n\n"
+                         "Please provide a comprehensive answer based on mainframe and COBOL knowledge."),
+    'code_summary': PromptTemplate("Please provide a concise summary of this COBOL code:\n\n```cobol\n{source}\n```\n\n"
+                                   "Provide only the summary, no additional explanation.",
+                                   limits={'source': 1000}),
+    # Test-suite prompts (full_eval, dataset_snapshot)
+    'suite_mcq': PromptTemplate("{question}\n" + MCQ_CHOICES + "\nAnswer:"),
+    'suite_qa': PromptTemplate("{question}"),
+    'suite_code': PromptTemplate("Summarize this COBOL code:\n{source}"),
+    # Manual test cases (simple_cobol_eval)
+    'manual_mcq': PromptTemplate("Question: {question}\n\n" + MCQ_CHOICES +
+                                 "\n\nPlease answer with just the letter (A, B, C, or D)."),
+    'manual_qa': PromptTemplate("Question: {question}\n\nPlease provide a clear and concise answer."),
+    'manual_code': PromptTemplate("Please summarize the following COBOL code:\n\n{source}\n\n"
+                                  "Provide a clear, brief summary of what this code does."),
+}
+
+# Batched MCQ mode: several numbered questions per model call (see mcq_batch.py)
+MCQ_BATCH_HEADER = ("Answer each of the following {count} multiple choice questions about mainframes and COBOL.\n"
+                    "Reply with one line per question giving its number and answer letter, for example:\n"
+                    "1: B\n2: D\n\n")
+MCQ_BATCH_ITEM = PromptTemplate("Question {number}: {question}\n" + MCQ_CHOICES)
+MCQ_BATCH_FOOTER = "\n\nAnswers:"
+
+SUITE_TEMPLATES = {
+    'multiple_choice_question': 'suite_mcq',
+    'question_answering': 'suite_qa',
+    'COBOL_code_summarization': 'suite_code',
+}
+
+def render_prompt(template: str, example: Dict) -> str:
+    """Render a named template with a dataset example's fields"""
+    return TEMPLATES[template].render(example)
+
+def render_mcq_batch(examples: List[Dict]) -> str:
+    """Render several MCQ examples as one prompt with numbered slots"""
+    items = [MCQ_BATCH_ITEM.render(dict(example, number=number)) for number, example in enumerate(examples, 1)]
+    return MCQ_BATCH_HEADER.format(count=len(examples)) + "\n\n".join(items) + MCQ_BATCH_FOOTER
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form used for dedup: Unicode NFKC with whitespace runs collapsed"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', prompt)).strip()
+
+def prompt_digest(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+
+class PromptIndex:
+    """Counts how many items share each normalized prompt"""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, prompt: str) -> str:
+        digest = prompt_digest(prompt)
+        self.counts[digest] += 1
+        return digest
+
+    def count(self, digest: str) -> int:
+        return self.counts[digest]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def unique(self) -> int:
+        return len(self.counts)
+
+    def stats(self) -> Dict:
+        return {
+            'total_prompts': self.total,
+            'unique_prompts': self.unique,
+            'duplicate_prompts': self.total - self.unique,
+            'dedup_rate': (self.total - self.unique) / self.total if self.total else 0.0
+        }
+
+def render_jobs(items: Callable[[], Iterable[Tuple[Any, Dict]]],
+                template: str) -> Tuple[Iterator[Tuple[Any, str]], PromptIndex]:
+    """Lazy (key, prompt) jobs for the (key, example) pairs items() yields, plus their dedup index
+
+    The index needs every prompt up front, so a first pass over items() keeps
+    only digest counts; the jobs are rendered again one at a time as the
+    engine pulls them, so no prompt list is ever held in memory.
+    """
+    index = PromptIndex()
+    for _, example in items():
+        index.add(render_prompt(template, example))
+
+    def jobs():
+        for key, example in items():
+            yield key, render_prompt(template, example)
+    return jobs(), index
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Asyncio subprocess client for the Amazon Q CLI
+Runs `q chat` with asyncio.create_subprocess_exec so thousands of pending calls
+share one event loop, with per-call timeouts and cancellation that kill the
+child process. A synchronous facade keeps the existing evaluators working.
+With a QWorkerPool the prompt goes to a long-lived worker instead of a new process.
+With an AdaptiveConcurrencyController the number of concurrent calls follows
+observed latency and failures instead of a fixed MAX_IN_FLIGHT.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Coroutine, Optional, Sequence
+from rate_limiter import TokenBucketRateLimiter
+from response_cache import ResponseCache, cache_key
+from q_worker_pool import QWorkerPool
+from instrumentation import CACHE_LOOKUP, PROCESS_SPAWN, QUERY, RATE_LIMIT_WAIT, shared_instrumentation
+from metrics_server import shared_metrics
+from concurrency_controller import AdaptiveConcurrencyController
+
+Q_CHAT_ARGS = ('q', 'chat', '--no-input-file', '--')
+Q_MODEL_NAME = 'amazon-q-cli'
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop, starting its daemon thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='q-client-loop', daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+def submit_coroutine(coro: Coroutine) -> Future:
+    """Schedule a coroutine on the shared loop; cancelling the future cancels the task"""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+
+def run_sync(coro: Coroutine):
+    """Run a coroutine on the shared loop and block until it finishes"""
+    return submit_coroutine(coro).result()
+
+class AsyncQClient:
+    def __init__(self, args: Sequence[str] = Q_CHAT_ARGS, timeout: float = 30,
+                 cwd: Optional[str] = None, prompt_via_stdin: bool = True,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 cache: Optional[ResponseCache] = None, model: str = Q_MODEL_NAME,
+                 pool: Optional[QWorkerPool] = None,
+                 concurrency: Optional[AdaptiveConcurrencyController] = None):
+        self.args = tuple(args)
+        self.timeout = timeout
+        self.cwd = cwd
+        self.prompt_via_stdin = prompt_via_stdin
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.model = model
+        self.pool = pool
+        self.concurrency = concurrency
+
+    async def query(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Send one prompt to the CLI, returning stdout or "" on a non-zero exit
+
+        Raises asyncio.TimeoutError when the call exceeds its timeout. On timeout
+        or cancellation the child process is killed before the error propagates.
+        Non-zero exits and timeouts are reported to the rate limiter for backoff.
+        Cached responses are returned without spawning the CLI or taking a token.
+        """
+        instrumentation = shared_instrumentation()
+        key = None
+        if self.cache is not None:
+            with instrumentation.stage(CACHE_LOOKUP):
+                key = cache_key(self.model, self.args, prompt)
+                cached = self.cache.get(key)
+            if cached is not None:
+                shared_metrics().cache_hit()
+                return cached
+            shared_metrics().cache_miss()
+
+        if self.rate_limiter is None:
+            returncode, output = await self._call(prompt, timeout)
+        else:
+            waiting_since = time.perf_counter()
+            async with self.rate_limiter.limit():
+                instrumentation.record(RATE_LIMIT_WAIT, time.perf_counter() - waiting_since)
+                try:
+                    returncode, output = await self._call(prompt, timeout)
+                except asyncio.TimeoutError:
+                    self.rate_limiter.record_failure()
+                    raise
+            if returncode == 0:
+                self.rate_limiter.record_success()
+            else:
+                self.rate_limiter.record_failure()
+
+        # Only successful answers are cached so failures are retried next run
+        if key is not None and returncode == 0 and output:
+            self.cache.put(key, output)
+        return output
+
+    async def _call(self, prompt: str, timeout: Optional[float]):
+        """_exec timed as the query stage, counted in the progress metrics and fed to the concurrency controller"""
+        if self.concurrency is not None:
+            generation = await self.concurrency.acquire()
+        metrics = shared_metrics()
+        metrics.query_started()
+        outcome = None  # Cancelled calls only free their in-flight slot
+        started = time.perf_counter()
+        try:
+            with shared_instrumentation().stage(QUERY):
+                returncode, output = await self._exec(prompt, timeout)
+            outcome = 'ok' if returncode == 0 else 'error'
+            return returncode, output
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            raise
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            metrics.query_finished(outcome)
+            if self.concurrency is not None:
+                self.concurrency.release(generation, outcome, time.perf_counter() - started)
+
+    async def _exec(self, prompt: str, timeout: Optional[float]):
+        """Spawn the CLI once (or use a pooled worker), returning (returncode, stripped stdout or "")"""
+        if self.pool is not None:
+            return await self.pool.query(prompt, self.timeout if timeout is None else timeout)
+        if self.prompt_via_stdin:
+            argv, stdin, payload = self.args, asyncio.subprocess.PIPE, prompt.encode('utf-8')
+        else:
+            argv, stdin, payload = self.args + (prompt,), asyncio.subprocess.DEVNULL, None
+
+        with shared_instrumentation().stage(PROCESS_SPAWN):
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=stdin,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.cwd
+            )
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(payload), timeout=timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            raise asyncio.TimeoutError(f"Q CLI call timed out after {timeout}s") from None
+        except BaseException:
+            await self._kill(process)
+            raise
+
+        output = stdout.decode('utf-8', errors='replace').strip() if process.returncode == 0 else ""
+        return process.returncode, output
+
+    async def _kill(self, process: asyncio.subprocess.Process):
+        """Terminate a child process that is still running"""
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    def query_sync(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Blocking facade over query() for synchronous callers"""
+        return run_sync(self.query(prompt, timeout))
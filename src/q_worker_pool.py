@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Persistent Q CLI worker pool
+Keeps a fixed number of long-lived worker processes, each holding one CLI
+session, and feeds them prompts over a JSON-lines protocol so process start-up,
+auth and session setup are paid once per worker instead of once per prompt.
+Workers are health-checked when idle, recycled after a number of requests and
+replaced on any error; callers wait in a queue for a free worker.
+
+Only stub_q.py ("stub_q.py serve") speaks this protocol today. The Amazon Q
+CLI has no persistent serve mode, so production runs keep one `q chat`
+process per prompt and the pool is exercised by the tests and the
+benchmarks against the stub only.
+
+Protocol (one JSON object per line):
+    worker -> {"ready": true}                          once, after session setup
+    pool   -> {"id": 1, "prompt": "..."}               worker -> {"id": 1, "ok": true, "output": "..."}
+    pool   -> {"id": 2, "ping": true}                  worker -> {"id": 2, "ok": true}
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import sys
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+DEFAULT_WORKER_ARGS = os.environ.get('Q_WORKER_ARGS', '')  # Empty = one `q chat` process per prompt
+DEFAULT_POOL_SIZE = int(os.environ.get('Q_WORKER_POOL_SIZE', os.environ.get('MAX_IN_FLIGHT', '4')))
+DEFAULT_MAX_REQUESTS = int(os.environ.get('Q_WORKER_MAX_REQUESTS', '200'))
+DEFAULT_STARTUP_TIMEOUT = 60.0
+DEFAULT_HEALTH_CHECK_SECONDS = 30.0  # Ping workers idle for longer than this before use
+STREAM_LIMIT = 16 * 1024 * 1024  # Largest response line accepted from a worker
+
+class QWorkerError(RuntimeError):
+    """A worker failed to start, exited, or broke the protocol"""
+
+class QWorker:
+    def __init__(self, args: Sequence[str], cwd: Optional[str] = None):
+        self.args = tuple(args)
+        self.cwd = cwd
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.served = 0
+        self.last_used = 0.0
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, timeout: float = DEFAULT_STARTUP_TIMEOUT):
+        """Spawn the worker and wait for its ready line"""
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=self.cwd,
+                limit=STREAM_LIMIT
+            )
+        except OSError as e:
+            raise QWorkerError(f"could not start worker {self.args[0]}: {e}") from e
+        try:
+            message = await asyncio.wait_for(self._read(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise QWorkerError(f"worker not ready after {timeout}s") from None
+        if not message.get('ready'):
+            raise QWorkerError(f"unexpected worker greeting: {message}")
+        self.last_used = time.monotonic()
+
+    async def request(self, payload: Dict, timeout: float) -> Dict:
+        """Send one message and return the matching reply
+
+        Raises asyncio.TimeoutError if no reply arrives in time and QWorkerError
+        if the worker exits or answers out of turn; either way the worker's
+        state is unknown and it must be stopped.
+        """
+        if not self.alive:
+            raise QWorkerError("worker is not running")
+        self._next_id += 1
+        payload = dict(payload, id=self._next_id)
+        try:
+            self.process.stdin.write((json.dumps(payload) + "\n").encode('utf-8'))
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise QWorkerError("worker closed its input") from e
+        message = await asyncio.wait_for(self._read(), timeout=timeout)
+        if message.get('id') != self._next_id:
+            raise QWorkerError(f"reply for request {message.get('id')}, expected {self._next_id}")
+        self.last_used = time.monotonic()
+        return message
+
+    async def _read(self) -> Dict:
+        line = await self.process.stdout.readline()
+        if not line:
+            raise QWorkerError("worker exited")
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise QWorkerError(f"malformed worker reply: {line[:200]!r}") from e
+
+    async def stop(self):
+        """Close the worker's input and kill it if it does not exit promptly"""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), timeout=2)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        if self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+class QWorkerPool:
+    def __init__(self, args: Sequence[str], size: int = DEFAULT_POOL_SIZE,
+                 max_requests: int = DEFAULT_MAX_REQUESTS, timeout: float = 30,
+                 cwd: Optional[str] = None, startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+                 health_check_seconds: float = DEFAULT_HEALTH_CHECK_SECONDS):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.args = tuple(args)
+        self.size = size
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.cwd = cwd
+        self.startup_timeout = startup_timeout
+        self.health_check_seconds = health_check_seconds
+        self.started = 0
+        self.recycled = 0
+        self.failures = 0
+        self._slots: Optional[asyncio.Queue] = None
+
+    def _queue(self) -> asyncio.Queue:
+        """Free worker slots; an empty slot (None) is filled with a new worker on checkout"""
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(None)
+        return self._slots
+
+    async def _checkout(self) -> QWorker:
+        worker = await self._queue().get()
+        try:
+            if worker is not None and worker.alive and \
+                    time.monotonic() - worker.last_used > self.health_check_seconds:
+                try:
+                    await worker.request({'ping': True}, timeout=min(self.timeout, 10))
+                except (asyncio.TimeoutError, QWorkerError):
+                    self.failures += 1
+                    await worker.stop()
+            if worker is None or not worker.alive:
+                worker = QWorker(self.args, self.cwd)
+                self.started += 1
+                try:
+                    await worker.start(self.startup_timeout)
+                except BaseException:
+                    await worker.stop()
+                    raise
+            return worker
+        except BaseException:
+            self._slots.put_nowait(None)
+            raise
+
+    async def _checkin(self, worker: Optional[QWorker]):
+        if worker is not None and worker.served >= self.max_requests:
+            self.recycled += 1
+            await worker.stop()
+            worker = None
+        self._slots.put_nowait(worker)
+
+    async def query(self, prompt: str, timeout: Optional[float] = None) -> Tuple[int, str]:
+        """Answer one prompt on a free worker, returning (returncode, output)
+
+        Mirrors a one-shot CLI call: 0 with the stripped output on success, 1
+        with "" if the worker reports failure or dies mid-request. Raises
+        asyncio.TimeoutError on timeout. The worker is replaced after any error.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        worker = await self._checkout()
+        try:
+            reply = await worker.request({'prompt': prompt}, timeout=timeout)
+            worker.served += 1
+        except asyncio.TimeoutError:
+            self.failures += 1
+            await worker.stop()
+            await self._checkin(None)
+            raise asyncio.TimeoutError(f"Q worker call timed out after {timeout}s") from None
+        except QWorkerError as e:
+            self.failures += 1
+            print(f"Q worker failed, replacing it: {e}")
+            await worker.stop()
+            await self._checkin(None)
+            return 1, ""
+        except BaseException:
+            await worker.stop()
+            await self._checkin(None)
+            raise
+        await self._checkin(worker)
+        if not reply.get('ok'):
+            return 1, ""
+        return 0, str(reply.get('output', '')).strip()
+
+    async def close(self):
+        """Stop every idle worker; call once no queries are running"""
+        if self._slots is None:
+            return
+        while not self._slots.empty():
+            worker = self._slots.get_nowait()
+            if worker is not None:
+                await worker.stop()
+        self._slots = None
+
+    def stats(self) -> Dict:
+        return {
+            'pool_size': self.size,
+            'workers_started': self.started,
+            'workers_recycled': self.recycled,
+            'worker_failures': self.failures
+        }
+
+_shared_pool = None
+
+def shared_worker_pool(timeout: float = 30, cwd: Optional[str] = None) -> Optional[QWorkerPool]:
+    """Process-wide pool, or None when Q_WORKER_ARGS is unset (one process per prompt)
+
+    Q_WORKER_ARGS must name a command that speaks the protocol above; `q chat` does not.
+    """
+    global _shared_pool
+    if _shared_pool is None and DEFAULT_WORKER_ARGS:
+        _shared_pool = QWorkerPool(shlex.split(DEFAULT_WORKER_ARGS), timeout=timeout, cwd=cwd)
+    return _shared_pool
+
+def main():
+    """Compare per-prompt processes with the pool using the offline stub CLI (spawn cost of the stub only)"""
+    from q_client import AsyncQClient, run_sync
+
+    parser = argparse.ArgumentParser(description="Benchmark one-process-per-prompt against the worker pool")
+    parser.add_argument('--requests', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_q.py')
+    pool = QWorkerPool((sys.executable, stub, 'serve'), size=args.concurrency)
+    clients = {
+        'process per prompt': AsyncQClient(args=(sys.executable, stub, 'chat')),
+        'worker pool': AsyncQClient(args=(sys.executable, stub, 'chat'), pool=pool),
+    }
+
+    async def run(client):
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with semaphore:
+                return await client.query(f"prompt {i}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        return time.perf_counter() - start
+
+    for name, client in clients.items():
+        duration = run_sync(run(client))
+        per_item = duration * args.concurrency / args.requests
+        print(f"{name:>20}: {duration:6.2f}s total, {per_item * 1000:7.1f} ms per item per worker")
+    run_sync(pool.close())
+    print(f"Pool: {pool.stats()}")
+
+if __name__ == "__main__":
+    main()
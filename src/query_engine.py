@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Concurrent query engine for Amazon Q CLI evaluations
+Dispatches model queries with a bounded number of in-flight calls and yields
+responses in dataset order, so aggregates match a serial run exactly
+"""
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+from q_client import submit_coroutine
+from prompts import PromptIndex, prompt_digest
+
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', '4'))
+
+class ConcurrentQueryEngine:
+    def __init__(self, query_fn: Callable[[str], Any], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.query_fn = query_fn
+        self.max_in_flight = max_in_flight
+        # Coroutine query functions run on the shared asyncio loop instead of a thread each
+        self.is_async = asyncio.iscoroutinefunction(query_fn)
+
+    async def _aquery(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        """Run one coroutine query; the semaphore bounds in-flight calls"""
+        async with semaphore:
+            return await self.query_fn(prompt)
+
+    def run(self, jobs: Iterable[Tuple[Any, str]],
+            replay: Optional[Callable[[Any], Optional[str]]] = None,
+            dedup: Optional[PromptIndex] = None) -> Iterator[Tuple[Any, str]]:
+        """Query every (key, prompt) job concurrently, yielding (key, response) in input order
+
+        At most max_in_flight queries run at once. Jobs are pulled lazily from the
+        iterable, so only a small window of prompts is held in memory, and the
+        caller can score finished items while later queries are still pending.
+        When replay(key) returns a stored response, that job is not queried again.
+        With a dedup index of the jobs' prompts, later duplicates of a prompt reuse
+        the first occurrence's response instead of querying the model again.
+        """
+        window = self.max_in_flight * 2
+        pending = deque()
+        shared = {}  # digest -> [future, consumers still to come] for duplicated prompts
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            try:
+                for key, prompt in jobs:
+                    digest = prompt_digest(prompt) if dedup is not None else None
+                    response = replay(key) if replay is not None else None
+                    if response is not None:
+                        future = Future()
+                        future.set_result(response)
+                    elif digest in shared:
+                        future = shared[digest][0]
+                    elif self.is_async:
+                        future = submit_coroutine(self._aquery(prompt, semaphore))
+                    else:
+                        future = executor.submit(self.query_fn, prompt)
+
+                    if digest is not None:
+                        if digest in shared:
+                            shared[digest][1] -= 1
+                            if shared[digest][1] == 0:
+                                del shared[digest]
+                        elif dedup.count(digest) > 1:
+                            shared[digest] = [future, dedup.count(digest) - 1]
+                    pending.append((key, future))
+                    if len(pending) >= window:
+                        key, future = pending.popleft()
+                        yield key, future.result()
+
+                while pending:
+                    key, future = pending.popleft()
+                    yield key, future.result()
+            finally:
+                # Consumer stopped early: drop queued work instead of running it
+                for _, future in pending:
+                    future.cancel()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiter for Amazon Q CLI calls
+Paces requests by requests-per-second and burst size instead of a fixed sleep
+after every call, caps concurrent calls, and backs off adaptively when the CLI
+exits non-zero or times out
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from concurrency_controller import shared_concurrency_controller
+
+DEFAULT_REQUESTS_PER_SECOND = float(os.environ.get('Q_REQUESTS_PER_SECOND', '2.0'))
+DEFAULT_BURST = int(os.environ.get('Q_BURST', '4'))
+DEFAULT_CONCURRENCY = int(os.environ.get('Q_MAX_CONCURRENCY', os.environ.get('MAX_IN_FLIGHT', '4')))
+
+class TokenBucketRateLimiter:
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst: int = DEFAULT_BURST, concurrency: int = DEFAULT_CONCURRENCY,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        if requests_per_second <= 0 or burst < 1 or concurrency < 1:
+            raise ValueError("requests_per_second, burst and concurrency must be positive")
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.concurrency = concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.backoff = 0.0
+        self.blocked_until = 0.0
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def _refill(self, now: float):
+        """Add tokens earned since the last update, capped at the burst size"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.requests_per_second)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and any backoff window has passed"""
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self.blocked_until - now
+            if wait <= 0:
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.requests_per_second
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def limit(self):
+        """Hold a concurrency slot and a token for the duration of one call"""
+        async with self.semaphore:
+            await self.acquire()
+            yield
+
+    def record_success(self):
+        """Relax the backoff after a successful call"""
+        self.backoff = self.backoff / 2 if self.backoff > self.backoff_base else 0.0
+
+    def record_failure(self):
+        """Double the backoff after a non-zero exit or timeout and pause new calls"""
+        self.backoff = min(self.backoff_max, max(self.backoff_base, self.backoff * 2))
+        self.blocked_until = time.monotonic() + self.backoff
+
+_shared_limiter = None
+
+def shared_rate_limiter() -> TokenBucketRateLimiter:
+    """Process-wide limiter so every evaluator draws from one request budget"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        controller = shared_concurrency_controller()
+        # With adaptive concurrency the controller sets the limit and the semaphore only caps it
+        concurrency = max(DEFAULT_CONCURRENCY, controller.max_limit) if controller else DEFAULT_CONCURRENCY
+        _shared_limiter = TokenBucketRateLimiter(concurrency=concurrency)
+    return _shared_limiter
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Offline Re-scoring
+Recomputes every task metric of a finished full-scale run from its stored raw
+responses, using the current extraction and scoring code in parallel worker
+processes, so scoring changes can be evaluated in minutes without querying
+the model again
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from answer_extraction import extract_answer
+from bleu_stats import BLEUStats
+from bleu_evaluator import SecureBLEUEvaluator
+from dataset_snapshot import load_mainframebench
+from full_scale_evaluator import RESULTS_ROOT, TOTAL_TESTS, build_final_results
+from mcq_batch import RAW_BATCH_TASK, slot_response
+from merge_shards import find_shard_dirs
+from parallel_metrics import DEFAULT_WORKERS, MIN_PARALLEL_ITEMS, extract_and_count, map_chunks, process_pool
+from qa_scoring import FULL_SCALE_WEIGHTS, QATokenStats, QAWeights
+from response_store import RAW_STORE_NAME, ResponseStore
+
+TASK_CONFIGS = {
+    'mcq': 'multiple_choice_question',
+    'qa': 'question_answering',
+    'code': 'COBOL_code_summarization',
+}
+DEFAULT_CHUNK_SIZE = 250
+
+def score_mcq_chunk(chunk: List[Tuple[int, str, Dict]]) -> List[Tuple[str, bool, str]]:
+    """(index, response, example) -> (predicted, is_correct, extraction strategy)"""
+    results = []
+    for _, response, example in chunk:
+        predicted, strategy = extract_answer(response, example)
+        results.append((predicted, predicted == example['answer'], strategy))
+    return results
+
+def score_qa_chunk(chunk: List[Tuple[int, str, str]], weights: QAWeights) -> List[float]:
+    """(index, response, reference) -> quality score"""
+    stats = QATokenStats([response for _, response, _ in chunk], [reference for _, _, reference in chunk])
+    return stats.scores(weights).tolist()
+
+def find_results_dirs(results_root: str) -> List[str]:
+    """The shard directories of a sharded run, or the root itself for a single-pod run"""
+    if glob.glob(os.path.join(results_root, 'shard_*_of_*')):
+        return find_shard_dirs(results_root)
+    return [results_root]
+
+def load_responses(results_dirs: List[str], task: str) -> List[Tuple[int, str]]:
+    """Every stored (index, response) for a task across result directories, in dataset order
+
+    Runs from before the raw store existed are back-filled from their checkpoints.
+    """
+    responses = []
+    for results_dir in results_dirs:
+        store_path = os.path.join(results_dir, RAW_STORE_NAME)
+        checkpoint_path = os.path.join(results_dir, f"{task}_items.jsonl")
+        if not os.path.exists(store_path) and not os.path.exists(checkpoint_path):
+            continue
+        store = ResponseStore(store_path)
+        if store.count(task) == 0 and os.path.exists(checkpoint_path):
+            print(f"Importing {task} responses from {checkpoint_path}")
+            store.import_checkpoint(task, checkpoint_path)
+        responses.extend(store.iter_task(task))
+        store.close()
+    return sorted(responses)
+
+def needed_rows(data, columns: List[str]) -> List[Dict]:
+    """Every row's needed columns, converted in one pass instead of one data[i] lookup per use"""
+    return list(data.select_columns(columns)) if len(data) else []
+
+def rescore_mcq(data, responses, executor, chunk_size, batches: Optional[Dict[int, str]] = None) -> Dict:
+    batches = batches or {}
+    data = needed_rows(data, ['question', 'A', 'B', 'C', 'D', 'answer'])
+    # Batched items stored their parsed letter; their slot is read again from the raw batch response
+    items = [(i, slot_response(batches[i]) if i in batches else response, data[i]) for i, response in responses]
+    scored = [result for chunk in map_chunks(score_mcq_chunk, items, chunk_size,
+                                                       executor=executor) for result in chunk]
+
+    correct = sum(is_correct for _, is_correct, _ in scored)
+    strategies = {}
+    for _, _, strategy in scored:
+        strategies[strategy] = strategies.get(strategy, 0) + 1
+    samples = []
+    for (i, _, example), (predicted, is_correct, _) in zip(items, scored):
+        if i < 10 or (i + 1) % 100 == 0:
+            question = data[i]['question']
+            samples.append({
+                'question_id': i + 1,
+                'question': question[:100] + "..." if len(question) > 100 else question,
+                'predicted': predicted,
+                'correct': example['answer'],
+                'is_correct': is_correct
+            })
+    return {
+        'task': 'Multiple Choice Questions (FULL)',
+        'accuracy': correct / len(items) if items else 0,
+        'correct': correct,
+        'total': len(items),
+        'sample_results': samples,
+        'extraction_strategies': strategies,
+        'completion_status': 'COMPLETE'
+    }
+
+def rescore_qa(data, responses, executor, chunk_size, weights: QAWeights) -> Dict:
+    data = needed_rows(data, ['question', 'answer'])
+    items = [(i, response, data[i]['answer']) for i, response in responses]
+    scores = [score for chunk in map_chunks(score_qa_chunk, items, chunk_size, weights,
+                                                          executor=executor)
+              for score in chunk]
+
+    # Summed in dataset order so an unchanged scorer reproduces the live average bit for bit
+    quality_total = 0.0
+    samples = []
+    for (i, response, reference), score in zip(items, scores):
+        quality_total += score
+        if i < 10 or (i + 1) % 200 == 0:
+            question = data[i]['question']
+            samples.append({
+                'question_id': i + 1,
+                'question': question[:100] + "..." if len(question) > 100 else question,
+                'reference_length': len(reference.split()),
+                'response_length': len(response.split()),
+                'quality_score': score
+            })
+    return {
+        'task': 'Question Answering (FULL)',
+        'total_samples': len(items),
+        'average_quality_score': quality_total / len(items) if items else 0,
+        'sample_results': samples,
+        'completion_status': 'COMPLETE'
+    }
+
+def rescore_code(data, responses, executor, chunk_size) -> Dict:
+    data = needed_rows(data, ['source', 'summary'])
+    items = [(i, response, data[i]['summary']) for i, response in responses]
+    stats, predictions = extract_and_count([response for _, response, _ in items],
+                                           [reference for _, _, reference in items],
+                                           SecureBLEUEvaluator.extract_summary, workers=1, executor=executor,
+                                           chunk_size=chunk_size)  # Serial unless rescore() opened a pool
+
+    details = []
+    for (i, response, reference), predicted in zip(items[:5], predictions):
+        code = data[i]['source']
+        details.append({
+            'code_snippet': code[:200] + "..." if len(code) > 200 else code,
+            'reference_summary': reference,
+            'predicted_summary': predicted,
+            'response': response
+        })
+    return SecureBLEUEvaluator.build_code_results(BLEUStats(stats.sum(axis=0)), len(items), details)
+
+def rescore(results_root: str = RESULTS_ROOT, workers: int = DEFAULT_WORKERS,
+            chunk_size: int = DEFAULT_CHUNK_SIZE, qa_weights: QAWeights = FULL_SCALE_WEIGHTS,
+            snapshot_dir: Optional[str] = None, min_parallel: int = MIN_PARALLEL_ITEMS) -> Dict:
+    """Rebuild the full-scale results document from a run's stored raw responses"""
+    start = time.time()
+    results_dirs = find_results_dirs(results_root)
+    responses = {task: load_responses(results_dirs, task) for task in TASK_CONFIGS}
+    print("Stored responses: " + ", ".join(f"{task}={len(items)}" for task, items in responses.items()))
+
+    data = {task: load_mainframebench(config, snapshot_dir) for task, config in TASK_CONFIGS.items()}
+    executor = process_pool(sum(len(items) for items in responses.values()), workers, min_parallel)
+    try:
+        mcq_results = rescore_mcq(data['mcq'], responses['mcq'], executor, chunk_size,
+                                  dict(load_responses(results_dirs, RAW_BATCH_TASK)))
+        qa_results = rescore_qa(data['qa'], responses['qa'], executor, chunk_size, qa_weights)
+        bleu_results = rescore_code(data['code'], responses['code'], executor, chunk_size)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    duration = time.time() - start
+    final_results = build_final_results(TOTAL_TESTS, mcq_results, qa_results, bleu_results, duration)
+    final_results['evaluation_info']['rescored_from'] = results_dirs
+    final_results['evaluation_info']['qa_weights'] = qa_weights._asdict()
+    return final_results
+
+def parse_weights(spec: str) -> QAWeights:
+    """"overlap,length[,completeness_bonus]" on top of the full-scale defaults"""
+    values = [float(value) for value in spec.split(',')]
+    fields = ('overlap', 'length', 'completeness_bonus')[:len(values)]
+    return FULL_SCALE_WEIGHTS._replace(**dict(zip(fields, values)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score a finished run from its stored raw responses")
+    parser.add_argument('--results-root', default=RESULTS_ROOT,
+                        help="run directory; shard_*_of_* subdirectories are read when present")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="scoring processes")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="items per work unit")
+    parser.add_argument('--qa-weights', type=parse_weights, default=FULL_SCALE_WEIGHTS,
+                        help="overlap,length[,completeness_bonus] for QA quality")
+    parser.add_argument('--snapshot-dir', help="MainframeBench snapshot (default: MAINFRAMEBENCH_SNAPSHOT)")
+    parser.add_argument('--output', help="default: <results-root>/rescored_mainframebench_results.json")
+    args = parser.parse_args()
+
+    results = rescore(args.results_root, args.workers, args.chunk_size, args.qa_weights, args.snapshot_dir)
+    output = args.output or os.path.join(args.results_root, 'rescored_mainframebench_results.json')
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    perf = results['performance_summary']
+    print(f"Re-scored in {results['evaluation_info']['duration_hours'] * 3600:.1f}s with {args.workers} workers")
+    print(f"Overall Score: {perf['overall_score']:.3f}")
+    print(f"MCQ Accuracy: {perf['mcq_accuracy']:.3f} ({perf['tests_completed']['mcq']} tests)")
+    print(f"QA Quality: {perf['qa_quality']:.3f} ({perf['tests_completed']['qa']} tests)")
+    print(f"BLEU Score: {perf['bleu_score']:.4f} ({perf['tests_completed']['code']} tests)")
+    print(f"Results saved to: {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Content-addressed response cache for model queries
+Stores CLI responses in a single SQLite file keyed by a hash of the model,
+the CLI arguments and the sanitized prompt, with size and age eviction
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Sequence
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'Q_RESPONSE_CACHE', os.path.expanduser('~/.cache/cobol_eval/q_responses.sqlite3'))
+DEFAULT_MAX_AGE_DAYS = float(os.environ.get('Q_CACHE_MAX_AGE_DAYS', '30'))
+DEFAULT_MAX_MB = float(os.environ.get('Q_CACHE_MAX_MB', '512'))
+
+def cache_key(model: str, args: Sequence[str], prompt: str) -> str:
+    """Hash the full query identity into a stable hex key"""
+    payload = json.dumps([model, list(args), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+                 max_mb: Optional[float] = DEFAULT_MAX_MB):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_mb = max_mb
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Store a response, replacing any previous entry for key"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode('utf-8')), now, now)
+            )
+
+    def evict(self) -> int:
+        """Drop entries older than max_age_days, then least recently used ones above max_mb"""
+        removed = 0
+        with self.lock:
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self.conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,)).rowcount
+
+            if self.max_mb is not None:
+                budget = int(self.max_mb * 1024 * 1024)
+                total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > budget:
+                    excess = total - budget
+                    keys = []
+                    rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+                    for key, size in rows:
+                        keys.append((key,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    self.conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+                    removed += len(keys)
+        return removed
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_shared_cache = None
+
+def shared_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache, or None when Q_RESPONSE_CACHE is set to an empty string"""
+    global _shared_cache
+    if _shared_cache is None and DEFAULT_CACHE_PATH:
+        _shared_cache = ResponseCache()
+    return _shared_cache
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compressed raw response store
+Keeps every raw model response of a run, keyed by task and dataset index, in
+one SQLite file with zlib-compressed bodies so scoring code can be changed and
+rerun over a finished run (see rescore.py) without querying the model again
+"""
+import os
+import sqlite3
+import zlib
+from typing import Iterator, List, Optional, Tuple
+from result_sink import read_jsonl
+
+RAW_STORE_NAME = 'raw_responses.sqlite3'
+CODEC_RAW = 0   # UTF-8 as is; short answers such as "B" do not shrink under zlib
+CODEC_ZLIB = 1
+
+def encode_response(response: str) -> Tuple[int, bytes]:
+    raw = response.encode('utf-8')
+    packed = zlib.compress(raw, 9)
+    return (CODEC_ZLIB, packed) if len(packed) < len(raw) else (CODEC_RAW, raw)
+
+def decode_response(codec: int, data: bytes) -> str:
+    return (zlib.decompress(data) if codec == CODEC_ZLIB else data).decode('utf-8')
+
+class ResponseStore:
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.pending: List[Tuple[str, int, int, bytes]] = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+            task TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            codec INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (task, idx)
+        ) WITHOUT ROWID""")
+        self.conn.commit()
+
+    @classmethod
+    def for_results_dir(cls, results_dir: str) -> 'ResponseStore':
+        return cls(os.path.join(results_dir, RAW_STORE_NAME))
+
+    def put(self, task: str, index: int, response: str):
+        """Queue one response; a later put for the same item replaces it"""
+        self.pending.append((task, index) + encode_response(response))
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", self.pending)
+            self.pending = []
+
+    def get(self, task: str, index: int) -> Optional[str]:
+        self.flush()
+        row = self.conn.execute("SELECT codec, data FROM responses WHERE task = ? AND idx = ?",
+                                (task, index)).fetchone()
+        return decode_response(*row) if row else None
+
+    def iter_task(self, task: str) -> Iterator[Tuple[int, str]]:
+        """Yield (index, response) for one task in dataset order"""
+        self.flush()
+        for index, codec, data in self.conn.execute(
+                "SELECT idx, codec, data FROM responses WHERE task = ? ORDER BY idx", (task,)):
+            yield index, decode_response(codec, data)
+
+    def count(self, task: str) -> int:
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM responses WHERE task = ?", (task,)).fetchone()[0]
+
+    def clear(self, task: str) -> int:
+        """Delete a task's responses and those of its companion tasks (such as mcq_batch for mcq)"""
+        self.flush()
+        with self.conn:
+            return self.conn.execute("DELETE FROM responses WHERE task = ? OR task GLOB ?",
+                                     (task, f"{task}_*")).rowcount
+
+    def import_checkpoint(self, task: str, path: str) -> int:
+        """Back-fill from a {task}_items.jsonl checkpoint written before the store existed"""
+        imported = 0
+        for record in read_jsonl(path):
+            self.put(task, record['index'], record['response'])
+            imported += 1
+        self.flush()
+        return imported
+
+    def stats(self) -> dict:
+        self.flush()
+        rows, stored = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM responses").fetchone()
+        return {'responses': rows, 'stored_bytes': stored,
+                'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
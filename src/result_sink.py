@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Streaming JSONL result sink
+Appends one record per evaluated item to a JSON lines file, flushing in
+batches, and folds per-task summary metrics as records arrive so memory stays
+flat no matter how many items are evaluated
+"""
+import json
+import os
+from typing import Dict, Iterator, Optional, Sequence
+
+SUMMARY_FIELDS = ('is_correct', 'quality_score')
+
+class RunningSummary:
+    """Per-task count plus running totals of the metric fields in each record"""
+    def __init__(self, fields: Sequence[str] = SUMMARY_FIELDS):
+        self.fields = tuple(fields)
+        self.tasks: Dict[str, Dict] = {}
+
+    def add(self, record: Dict):
+        stats = self.tasks.setdefault(record.get('task', 'default'), {'count': 0, 'totals': {}})
+        stats['count'] += 1
+        for field in self.fields:
+            value = record.get(field)
+            if isinstance(value, (int, float)):
+                stats['totals'][field] = stats['totals'].get(field, 0) + value
+
+    def to_dict(self) -> Dict:
+        """Counts, totals and means for each task"""
+        return {
+            task: {
+                'count': stats['count'],
+                'totals': dict(stats['totals']),
+                'means': {field: total / stats['count'] for field, total in stats['totals'].items()}
+            }
+            for task, stats in self.tasks.items()
+        }
+
+class JsonlResultSink:
+    def __init__(self, path: str, flush_every: int = 50, append: bool = False, fsync: bool = False,
+                 fields: Sequence[str] = SUMMARY_FIELDS):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self.summary = RunningSummary(fields)
+        self.buffer = []
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: Dict):
+        """Queue one item record and fold it into the running summary"""
+        self.buffer.append(json.dumps(record, ensure_ascii=False))
+        self.summary.add(record)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to disk"""
+        if self.buffer:
+            self.file.write('\n'.join(self.buffer) + '\n')
+            self.buffer = []
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Stream records back from a JSONL file, stopping at a torn final line"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+def summarize_jsonl(path: str, task: Optional[str] = None, fields: Sequence[str] = SUMMARY_FIELDS) -> Dict:
+    """Derive the summary for a finished run from its record stream"""
+    summary = RunningSummary(fields)
+    if os.path.exists(path):
+        for record in read_jsonl(path):
+            summary.add(record)
+    tasks = summary.to_dict()
+    return tasks.get(task, {'count': 0, 'totals': {}, 'means': {}}) if task else tasks
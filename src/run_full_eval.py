@@ -7,100 +7,105 @@ Users assume all risks. Not intended for production use without proper validatio
 See DISCLAIMER.md for complete legal terms.
 """
 import json
-import subprocess
-import time
-import re
-from concurrent.futures import ThreadPoolExecutor
 import threading
+from model_backends import default_backend
+from query_engine import ConcurrentQueryEngine
+from concurrency_controller import shared_concurrency_controller
+from result_sink import JsonlResultSink, summarize_jsonl
+from dataset_snapshot import load_mainframebench
+from answer_extraction import extract_mcq_answer
+from progress import ProgressReporter
+
+MCQ_RESULTS_FILE = 'data/mcq_results.jsonl'
 
 class FullCOBOLEvaluator:
-    def __init__(self, max_workers=3):
-        self.max_workers = max_workers
+    def __init__(self, max_workers=3, backend=None):
+        controller = shared_concurrency_controller()
+        # With adaptive concurrency max_workers is only a floor; the controller finds the actual limit
+        self.max_workers = max(max_workers, controller.max_limit) if controller is not None else max_workers
         self.lock = threading.Lock()
+        self.backend = backend or default_backend(args=('q', 'chat', '--no-input-file'), prompt_via_stdin=False)
+        self.query_engine = ConcurrentQueryEngine(self.aquery_q_cli, self.max_workers)
         
     def query_q_cli(self, prompt, timeout=30):
         """Query Q CLI with timeout"""
         try:
-            result = subprocess.run(
-                ['q', 'chat', '--no-input-file', prompt],
-                capture_output=True, text=True, timeout=timeout
-            )
-            return result.stdout.strip() if result.returncode == 0 else ""
+            return self.backend.query_sync(prompt, timeout=timeout)
         except:
             return ""
     
-    def extract_mcq_answer(self, response):
-        """Extract MCQ answer"""
-        matches = re.findall(r'\b([ABCD])\b', response.upper())
-        return matches[0] if matches else ""
+    async def aquery_q_cli(self, prompt, timeout=30):
+        """Query Q CLI with timeout, for the concurrent query engine"""
+        try:
+            return await self.backend.query(prompt, timeout=timeout)
+        except Exception:
+            return ""
+    
+    def extract_mcq_answer(self, response, options=None):
+        """Extract MCQ answer (see answer_extraction)"""
+        return extract_mcq_answer(response, options)
     
-    def evaluate_mcq_batch(self, tests, start_idx=0, batch_size=100):
-        """Evaluate MCQ batch"""
-        results = []
+    def evaluate_mcq_batch(self, tests, sink, start_idx=0, batch_size=100, progress=None):
+        """Evaluate MCQ batch, streaming one record per question to the sink"""
         correct = 0
         
         end_idx = min(start_idx + batch_size, len(tests))
-        batch = tests[start_idx:end_idx]
+        batch = tests.select(range(start_idx, end_idx))
+        own_progress = progress is None
+        if own_progress:
+            progress = ProgressReporter('mcq', len(tests), initial=start_idx)
         
-        for i, test in enumerate(batch):
-            actual_idx = start_idx + i
-            print(f"MCQ {actual_idx + 1}/{len(tests)}")
-            
-            response = self.query_q_cli(test['prompt'])
-            predicted = self.extract_mcq_answer(response)
-            is_correct = predicted == test['correct']
+        # Up to max_workers questions in flight; responses come back in dataset order
+        for test, response in self.query_engine.run((test, test['prompt']) for test in batch):
+            predicted = self.extract_mcq_answer(response, test)
+            is_correct = predicted == test['answer']
             
             if is_correct:
                 correct += 1
                 
-            results.append({
+            sink.write({
+                'task': 'mcq',
                 'id': test['id'],
                 'predicted': predicted,
-                'correct': test['correct'],
+                'correct': test['answer'],
                 'is_correct': is_correct
             })
-            
-            time.sleep(0.5)  # Rate limiting
+            progress.update()
         
-        return results, correct
+        if own_progress:
+            progress.close()
+        return len(batch), correct
     
     def run_full_evaluation(self, batch_size=200):
         """Run evaluation on full dataset"""
         print("Starting full MainframeBench evaluation...")
         
-        # Load test files
-        with open('data/full_multiple_choice_question_tests.json') as f:
-            mcq_data = json.load(f)
+        # Memory-mapped snapshot with pre-rendered prompts (see dataset_snapshot.py)
+        mcq_tests = load_mainframebench('multiple_choice_question')
         
         results = {
             'evaluation_info': {
-                'total_tests': mcq_data['count'],
-                'mcq_count': mcq_data['count'],
+                'total_tests': len(mcq_tests),
+                'mcq_count': len(mcq_tests),
                 'batch_size': batch_size
             }
         }
         
         # Evaluate MCQ
-        print(f"\n=== MCQ Evaluation ({mcq_data['count']} questions) ===")
-        mcq_results = []
-        mcq_correct = 0
-        
-        for start in range(0, len(mcq_data['tests']), batch_size):
-            batch_results, batch_correct = self.evaluate_mcq_batch(
-                mcq_data['tests'], start, batch_size
-            )
-            mcq_results.extend(batch_results)
-            mcq_correct += batch_correct
-            
-            # Save intermediate results
-            with open(f'data/mcq_results_batch_{start}.json', 'w') as f:
-                json.dump(batch_results, f, indent=2)
+        print(f"\n=== MCQ Evaluation ({len(mcq_tests)} questions) ===")
+        with JsonlResultSink(MCQ_RESULTS_FILE, flush_every=batch_size) as sink, \
+                ProgressReporter('mcq', len(mcq_tests)) as progress:
+            for start in range(0, len(mcq_tests), batch_size):
+                self.evaluate_mcq_batch(mcq_tests, sink, start, batch_size, progress)
+                sink.flush()  # Save intermediate results
         
+        # Final figures come from the record stream, not from results held in memory
+        mcq_summary = summarize_jsonl(MCQ_RESULTS_FILE, 'mcq')
         results['mcq'] = {
-            'accuracy': mcq_correct / len(mcq_results),
-            'correct': mcq_correct,
-            'total': len(mcq_results),
-            'results': mcq_results
+            'accuracy': mcq_summary['means'].get('is_correct', 0),
+            'correct': mcq_summary['totals'].get('is_correct', 0),
+            'total': mcq_summary['count'],
+            'results_file': MCQ_RESULTS_FILE
         }
         
         # Save final results
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Deterministic dataset sharding for multi-pod evaluation
+Splits each MainframeBench task into balanced, interleaved slices so N pods
+(e.g. a Kubernetes Indexed Job) can evaluate disjoint items in parallel
+"""
+import os
+from typing import Iterator, List, Tuple
+
+class ShardSpec:
+    def __init__(self, index: int = 0, count: int = 1):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"invalid shard {index} of {count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def from_env(cls) -> 'ShardSpec':
+        """Read SHARD_INDEX (or the Indexed Job's JOB_COMPLETION_INDEX) and SHARD_COUNT"""
+        index = os.environ.get('SHARD_INDEX', os.environ.get('JOB_COMPLETION_INDEX', '0'))
+        return cls(int(index), int(os.environ.get('SHARD_COUNT', '1')))
+
+    @property
+    def name(self) -> str:
+        return f"shard_{self.index}_of_{self.count}"
+
+    def indices(self, total: int) -> List[int]:
+        """Global item indices owned by this shard
+
+        Items are dealt round-robin, so shard sizes differ by at most one and
+        each shard sees a representative mix of the dataset.
+        """
+        return list(range(self.index, total, self.count))
+
+    def iter_items(self, data) -> Iterator[Tuple[int, dict]]:
+        """Yield (global index, example) for this shard's slice of a dataset or list"""
+        if self.count == 1:
+            yield from enumerate(data)
+            return
+        indices = self.indices(len(data))
+        subset = data.select(indices) if hasattr(data, 'select') else (data[i] for i in indices)
+        yield from zip(indices, subset)
+
+    def size(self, total: int) -> int:
+        """Number of items this shard evaluates out of total"""
+        return len(range(self.index, total, self.count))
+
+    def __repr__(self):
+        return f"ShardSpec({self.index}, {self.count})"
@@ -8,6 +8,7 @@ See DISCLAIMER.md for complete legal terms.
 """
 from datasets import load_dataset
 import json
+from prompts import render_prompt
 
 def load_sample_questions():
     """Load sample questions from MainframeBench"""
@@ -48,14 +49,7 @@ def create_test_prompts():
                 "D": example['D']
             },
             "correct_answer": example['answer'],
-            "prompt": f"""Question: {example['question']}
-
-A) {example['A']}
-B) {example['B']}
-C) {example['C']}
-D) {example['D']}
-
-Please answer with just the letter (A, B, C, or D)."""
+            "prompt": render_prompt('manual_mcq', example)
         })
     
     # QA tests
@@ -64,7 +58,7 @@ Please answer with just the letter (A, B, C, or D)."""
             "id": i+1,
             "question": example['question'],
             "reference_answer": example['answer'],
-            "prompt": f"Question: {example['question']}\n\nPlease provide a clear and concise answer."
+            "prompt": render_prompt('manual_qa', example)
         })
     
     # Code summarization tests
@@ -73,11 +67,7 @@ Please answer with just the letter (A, B, C, or D)."""
             "id": i+1,
             "source_code": example['source'],
             "reference_summary": example['summary'],
-            "prompt": f"""Please summarize the following COBOL code:
-
-{example['source']}
-
-Provide a clear, brief summary of what this code does."""
+            "prompt": render_prompt('manual_code', example)
         })
     
     return test_data
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Stub Amazon Q CLI
+Offline stand-in for `q` with a simulated session start-up cost and model
+latency. `stub_q.py chat ...` answers one prompt from stdin and exits like
+`q chat`; `stub_q.py serve` stays up and answers the worker pool's JSON-lines
+protocol (see q_worker_pool.py) so the two modes can be compared
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+STARTUP_SECONDS = float(os.environ.get('STUB_Q_STARTUP_SECONDS', '0.5'))  # Process start, auth, session
+LATENCY_SECONDS = float(os.environ.get('STUB_Q_LATENCY_SECONDS', '0.05'))  # Per-prompt model time
+EXIT_AFTER = int(os.environ.get('STUB_Q_EXIT_AFTER', '0'))  # Serve mode: die after N prompts (0 = never)
+
+def answer(prompt: str) -> str:
+    """Deterministic reply: a letter per MCQ slot, otherwise a short summary"""
+    def letter(text: str) -> str:
+        return 'ABCD'[hashlib.sha256(text.encode('utf-8')).digest()[0] % 4]
+
+    slots = re.findall(r'Question (\d+): (.*)', prompt)
+    if slots:
+        return "\n".join(f"{number}: {letter(question)}" for number, question in slots)
+    if re.search(r'^A\) ', prompt, re.MULTILINE):
+        return letter(prompt)
+    return "Stub answer: " + " ".join(prompt.split()[:12])
+
+def serve():
+    time.sleep(STARTUP_SECONDS)
+    print(json.dumps({'ready': True}), flush=True)
+    served = 0
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request.get('ping'):
+            print(json.dumps({'id': request['id'], 'ok': True}), flush=True)
+            continue
+        if EXIT_AFTER and served >= EXIT_AFTER:
+            sys.exit(1)
+        time.sleep(LATENCY_SECONDS)
+        served += 1
+        print(json.dumps({'id': request['id'], 'ok': True, 'output': answer(request['prompt'])}), flush=True)
+
+def chat():
+    time.sleep(STARTUP_SECONDS)
+    prompt = sys.stdin.read()
+    time.sleep(LATENCY_SECONDS)
+    print(answer(prompt))
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'chat'
+    if command == 'serve':
+        serve()
+    elif command == 'chat':
+        chat()
+    else:
+        print(f"stub_q: unknown command {command!r}", file=sys.stderr)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
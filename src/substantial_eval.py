@@ -1,94 +1,90 @@
 #!/usr/bin/env python3
 import json
-import subprocess
-import time
-import re
+from model_backends import default_backend
+from result_sink import JsonlResultSink
+from dataset_snapshot import load_mainframebench
+from answer_extraction import extract_mcq_answer
 
-def query_q_cli(prompt):
+ITEMS_FILE = 'data/substantial_eval_items.jsonl'
+
+def query_q_cli(backend, prompt):
     try:
-        result = subprocess.run(['q', 'chat', '--no-input-file', prompt], 
-                              capture_output=True, text=True, timeout=30)
-        return result.stdout.strip() if result.returncode == 0 else ""
+        return backend.query_sync(prompt)
     except:
         return ""
 
-def extract_mcq_answer(response):
-    matches = re.findall(r'\b([ABCD])\b', response.upper())
-    return matches[0] if matches else ""
-
 def run_substantial_eval():
-    # Load datasets
-    with open('data/full_multiple_choice_question_tests.json') as f:
-        mcq_data = json.load(f)
-    with open('data/full_question_answering_tests.json') as f:
-        qa_data = json.load(f)
-    with open('data/full_COBOL_code_summarization_tests.json') as f:
-        code_data = json.load(f)
+    backend = default_backend(args=('q', 'chat', '--no-input-file'), timeout=30, prompt_via_stdin=False)
+    
+    # Load datasets (memory-mapped snapshots with pre-rendered prompts)
+    mcq_data = load_mainframebench('multiple_choice_question')
+    qa_data = load_mainframebench('question_answering')
+    code_data = load_mainframebench('COBOL_code_summarization')
     
     # Test substantial samples
     sample_size = 100  # 100 from each category
     
     print(f"Running substantial evaluation:")
-    print(f"- MCQ: {sample_size}/{mcq_data['count']}")
-    print(f"- QA: {sample_size}/{qa_data['count']}")
-    print(f"- Code: {sample_size}/{code_data['count']}")
+    print(f"- MCQ: {sample_size}/{len(mcq_data)}")
+    print(f"- QA: {sample_size}/{len(qa_data)}")
+    print(f"- Code: {sample_size}/{len(code_data)}")
     print(f"Total: {sample_size * 3} tests")
     
-    results = {'mcq': [], 'qa': [], 'code': []}
+    sink = JsonlResultSink(ITEMS_FILE, flush_every=25)
     
     # MCQ evaluation
     print("\n=== MCQ Evaluation ===")
     mcq_correct = 0
-    for i in range(sample_size):
-        test = mcq_data['tests'][i]
+    for i, test in enumerate(mcq_data.select(range(sample_size))):
         print(f"MCQ {i+1}/{sample_size}")
         
-        response = query_q_cli(test['prompt'])
-        predicted = extract_mcq_answer(response)
-        is_correct = predicted == test['correct']
+        response = query_q_cli(backend, test['prompt'])
+        predicted = extract_mcq_answer(response, test)
+        is_correct = predicted == test['answer']
         
         if is_correct:
             mcq_correct += 1
             
-        results['mcq'].append({
+        sink.write({
+            'task': 'mcq',
             'id': i,
             'question': test['question'][:100] + '...',
             'predicted': predicted,
-            'correct': test['correct'],
+            'correct': test['answer'],
             'is_correct': is_correct
         })
-        time.sleep(1)
     
     # QA evaluation
     print(f"\n=== QA Evaluation ===")
-    for i in range(sample_size):
-        test = qa_data['tests'][i]
+    for i, test in enumerate(qa_data.select(range(sample_size))):
         print(f"QA {i+1}/{sample_size}")
         
-        response = query_q_cli(test['prompt'])
-        results['qa'].append({
+        response = query_q_cli(backend, test['prompt'])
+        sink.write({
+            'task': 'qa',
             'id': i,
             'question': test['question'][:100] + '...',
             'predicted': response[:200] + '...' if len(response) > 200 else response,
-            'reference': test['reference'][:200] + '...'
+            'reference': test['answer'][:200] + '...'
         })
-        time.sleep(1)
     
     # Code evaluation
     print(f"\n=== Code Evaluation ===")
-    for i in range(sample_size):
-        test = code_data['tests'][i]
+    for i, test in enumerate(code_data.select(range(sample_size))):
         print(f"Code {i+1}/{sample_size}")
         
-        response = query_q_cli(test['prompt'])
-        results['code'].append({
+        response = query_q_cli(backend, test['prompt'])
+        sink.write({
+            'task': 'code',
             'id': i,
             'predicted': response[:200] + '...' if len(response) > 200 else response,
-            'reference': test['reference'][:200] + '...'
+            'reference': test['summary'][:200] + '...'
         })
-        time.sleep(1)
     
-    # Calculate final results
+    sink.close()
+    
+    # Calculate final results from the streamed summary
+    task_counts = {task: stats['count'] for task, stats in sink.summary.to_dict().items()}
     mcq_accuracy = mcq_correct / sample_size
     
     final_results = {
@@ -96,9 +92,10 @@ def run_substantial_eval():
             'sample_size_per_task': sample_size,
             'total_tests': sample_size * 3,
             'mcq_accuracy': mcq_accuracy,
-            'mcq_correct': mcq_correct
+            'mcq_correct': mcq_correct,
+            'task_counts': task_counts
         },
-        'detailed_results': results
+        'detailed_results_file': ITEMS_FILE
     }
     
     with open('data/substantial_eval_results.json', 'w') as f:
@@ -106,8 +103,8 @@ def run_substantial_eval():
     
     print(f"\n=== RESULTS ===")
     print(f"MCQ Accuracy: {mcq_accuracy:.2%} ({mcq_correct}/{sample_size})")
-    print(f"QA Tests: {len(results['qa'])}")
-    print(f"Code Tests: {len(results['code'])}")
+    print(f"QA Tests: {task_counts.get('qa', 0)}")
+    print(f"Code Tests: {task_counts.get('code', 0)}")
     print(f"Results saved to substantial_eval_results.json")
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test MCQ Answer Extraction
+Verifies the ranked strategies on the reply shapes models produce, including
+the cases the old first-letter scan misread
+"""
+import pytest
+from answer_extraction import NO_ANSWER, Extraction, extract_answer, legacy_extract
+
+OPTIONS = {'question': "Which verb copies data?", 'A': "MOVE", 'B': "MOVE CORRESPONDING",
+           'C': "PERFORM VARYING", 'D': "INSPECT", 'answer': 'B'}
+
+@pytest.mark.parametrize("response, expected", [
+    ("B", Extraction('B', 'leading')),
+    ("  (c).", Extraction('C', 'leading')),
+    ("**D**\n\nINSPECT counts characters.", Extraction('D', 'leading')),
+    ("A) MOVE copies a field", Extraction('A', 'leading')),
+    ("A) looks plausible, but the answer is C.", Extraction('C', 'explicit')),
+    ("Considering each option, the correct answer would be (d) since...", Extraction('D', 'explicit')),
+    ("Answer: **B**", Extraction('B', 'explicit')),
+    ("Option C is correct because PERFORM VARYING loops.", Extraction('C', 'explicit')),
+    ("MOVE CORRESPONDING copies the matching fields.", Extraction('B', 'option_text')),
+    ("A program would use B here.", Extraction('B', 'standalone')),
+    ("I am not sure.", NO_ANSWER),
+    ("", NO_ANSWER),
+])
+def test_strategies(response, expected):
+    assert extract_answer(response, OPTIONS) == expected
+
+def test_fixes_legacy_misreads():
+    response = "A) looks plausible, but the answer is C."
+    assert (legacy_extract(response), extract_answer(response).letter) == ('A', 'C')
+    # Lower-case articles were upper-cased into answers
+    assert (legacy_extract("a loop. D"), extract_answer("a loop. D").letter) == ('A', 'D')
+
+def test_option_text_needs_a_unique_quote():
+    assert extract_answer("Both MOVE and INSPECT touch data", OPTIONS) == NO_ANSWER
+    assert extract_answer("MOVE CORRESPONDING copies fields") == NO_ANSWER
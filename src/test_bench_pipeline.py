@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test Pipeline Benchmark
+Runs one scenario end to end against the stub Q CLI and checks the baseline
+comparison flags slowdowns but not timer noise
+"""
+import copy
+from bench_pipeline import find_regressions, percentiles, run_suite
+
+def test_bleu_scenario_reports_stages():
+    report = run_suite(['bleu'], items=4, latency=0.0, startup=0.0, max_in_flight=2)
+    result = report['scenarios']['bleu']
+
+    assert result['items'] == 4 and result['items_per_second'] > 0
+    assert result['stages']['query']['count'] == 4
+    assert result['stages']['corpus_bleu']['count'] == 1
+    assert result['peak_rss_mb'] > 0 and result['startup_seconds'] > 0
+
+def test_regressions_against_baseline():
+    baseline = {'scenarios': {'bleu': {
+        'items_per_second': 10.0, 'startup_seconds': 0.2, 'peak_rss_mb': 80.0,
+        'stages': {'query': percentiles([0.1, 0.2, 0.3]), 'extract': percentiles([0.0001, 0.0002])},
+    }}}
+    current = copy.deepcopy(baseline)
+    current['scenarios']['bleu']['stages']['extract'] = percentiles([0.0002, 0.0004])  # 2x, but sub-ms
+    assert find_regressions(current, baseline) == []
+
+    current['scenarios']['bleu']['items_per_second'] = 7.0
+    current['scenarios']['bleu']['stages']['query'] = percentiles([0.2, 0.4, 0.6])
+    regressions = find_regressions(current, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("bleu: throughput") and "query p95" in regressions[1]
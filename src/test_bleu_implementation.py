@@ -1,10 +1,34 @@
 #!/usr/bin/env python3
 """
 Test BLEU Implementation with Mock Data
-Verifies that BLEU scoring works correctly
+Verifies that BLEU scoring works correctly and that the built-in engine
+matches sacrebleu and the Hugging Face evaluate bleu metric
 """
-import json
+import random
+import time
+import pytest
+import sacrebleu
 from bleu_evaluator import SecureBLEUEvaluator
+from bleu_stats import BLEUStats
+
+MAINFRAMEBENCH_CODE_TESTS = 2523
+
+def random_corpus(seed: int, size: int, vocab_size: int = 200):
+    """Summary-like corpus mixing words, punctuation, numbers and entities"""
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)] + list(",.-()") + ["3.5", "x-1", "&amp;", "PERFORM", "MOVE"]
+    def sentence():
+        return ' '.join(rng.choices(vocab, k=rng.randint(0, 30)))
+    return [sentence() for _ in range(size)], [sentence() for _ in range(size)]
+
+@pytest.fixture(scope="module")
+def hf_bleu():
+    """Hugging Face bleu metric, skipped when it cannot be loaded (e.g. offline)"""
+    try:
+        from evaluate import load
+        return load("bleu")
+    except Exception as e:
+        pytest.skip(f"evaluate bleu metric unavailable: {e}")
 
 def test_bleu_calculation():
     """Test BLEU calculation with known data"""
@@ -97,6 +121,63 @@ def test_security_features():
     print("✅ Security Features Test PASSED")
     return True
 
+@pytest.mark.parametrize("seed,size", [(seed, 50) for seed in range(20)] + [(99, MAINFRAMEBENCH_CODE_TESTS)])
+def test_parity_with_sacrebleu(seed, size):
+    """Built-in engine equals sacrebleu.corpus_bleu exactly"""
+    predictions, references = random_corpus(seed, size)
+    expected = sacrebleu.corpus_bleu(predictions, [references])
+    results = SecureBLEUEvaluator(sample_size=0).calculate_bleu_score(predictions, references)
+    
+    assert results['bleu_sacre'] == expected.score / 100.0
+    assert results['translation_length'] == expected.sys_len
+    assert results['reference_length'] == expected.ref_len
+
+@pytest.mark.parametrize("seed,size", [(seed, 50) for seed in range(20)] + [(99, MAINFRAMEBENCH_CODE_TESTS)])
+def test_parity_with_evaluate(hf_bleu, seed, size):
+    """Built-in engine equals the Hugging Face evaluate bleu metric exactly"""
+    predictions, references = random_corpus(seed, size)
+    expected = hf_bleu.compute(predictions=predictions, references=[[ref] for ref in references])
+    results = SecureBLEUEvaluator(sample_size=0).calculate_bleu_score(predictions, references)
+    
+    assert results['bleu_hf'] == expected['bleu']
+    assert results['precisions'] == expected['precisions']
+    assert results['brevity_penalty'] == expected['brevity_penalty']
+    assert results['length_ratio'] == expected['length_ratio']
+
+def test_corpus_engine_matches_streaming_stats():
+    """Vectorized corpus statistics equal folding pairs one at a time"""
+    predictions, references = random_corpus(5, 300, vocab_size=20)
+    streamed = BLEUStats()
+    for prediction, reference in zip(predictions, references):
+        streamed.add(prediction, reference)
+    assert BLEUStats.from_corpus(predictions, references).to_list() == streamed.to_list()
+
+def benchmark_bleu_engines(size: int = MAINFRAMEBENCH_CODE_TESTS, repeats: int = 5):
+    """Time the built-in engine against the sacrebleu (+ evaluate) double computation"""
+    predictions, references = random_corpus(0, size, vocab_size=3000)
+    evaluator = SecureBLEUEvaluator(sample_size=0)
+    
+    def timed(fn):
+        fn()  # Warm tokenizer caches so every engine is timed the same way
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - start) / repeats
+    
+    fast = timed(lambda: evaluator.calculate_bleu_score(predictions, references))
+    baseline = timed(lambda: sacrebleu.corpus_bleu(predictions, [references]))
+    try:
+        from evaluate import load
+        hf_metric = load("bleu")
+        baseline += timed(lambda: hf_metric.compute(predictions=predictions,
+                                                    references=[[ref] for ref in references]))
+        label = "sacrebleu + evaluate"
+    except Exception:
+        label = "sacrebleu only (evaluate unavailable)"
+    
+    print(f"Built-in engine: {fast*1000:.1f} ms per corpus of {size}")
+    print(f"{label}: {baseline*1000:.1f} ms per corpus ({baseline/fast:.1f}x slower)")
+
 def main():
     """Run all tests"""
     print("COBOL EVALUATION FRAMEWORK - BLEU IMPLEMENTATION TEST")
@@ -108,6 +189,10 @@ def main():
     # Test security features
     security_test_passed = test_security_features()
     
+    print("\nBLEU Engine Benchmark")
+    print("=" * 50)
+    benchmark_bleu_engines()
+    
     print("\n" + "=" * 60)
     print("TEST SUMMARY")
     print("=" * 60)
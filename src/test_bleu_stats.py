@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test BLEU Sufficient Statistics
+Verifies that corpus BLEU reduced from summed statistics matches sacrebleu and
+is unchanged by how the corpus is split across shards
+"""
+import random
+import pytest
+import sacrebleu
+from bleu_stats import BLEUStats, STATS_WIDTH, reduce_stats, sentence_stats
+from sharding import ShardSpec
+
+WORDS = "the program computes employee payroll records file data input output , . - 3.5 x-1 &amp;".split()
+
+def random_corpus(seed, size):
+    rng = random.Random(seed)
+    def sentence():
+        return ' '.join(rng.choices(WORDS, k=rng.randint(0, 15)))
+    return [sentence() for _ in range(size)], [sentence() for _ in range(size)]
+
+def test_stats_match_sacrebleu():
+    for seed in range(50):
+        predictions, references = random_corpus(seed, 40)
+        expected = sacrebleu.corpus_bleu(predictions, [references]).score / 100.0
+        assert BLEUStats.from_corpus(predictions, references).score()['bleu_sacre'] == expected
+
+def test_shard_reduce_is_exact():
+    """Statistics summed over shards give the same scores as one pass"""
+    predictions, references = random_corpus(7, 103)
+    whole = BLEUStats.from_corpus(predictions, references)
+
+    parts = []
+    for shard in (ShardSpec(i, 4) for i in range(4)):
+        stats = BLEUStats()
+        for i in shard.indices(len(predictions)):
+            stats.add(predictions[i], references[i])
+        parts.append(stats.to_list())
+
+    merged = reduce_stats(parts)
+    assert merged.to_list() == whole.to_list()
+    assert merged.score() == whole.score()
+
+def test_sentence_stats_layout():
+    stats = sentence_stats("the program computes payroll", "the program computes employee payroll")
+    assert stats == [4, 5, 4, 2, 1, 0, 4, 3, 2, 1]
+    assert len(stats) == STATS_WIDTH
+
+def test_hf_formula_edge_cases():
+    perfect = BLEUStats.from_corpus(["the program computes payroll"], ["the program computes payroll"])
+    assert perfect.score()['bleu_hf'] == 1.0
+    assert BLEUStats().score()['bleu_hf'] == 0
+    with pytest.raises(ValueError):
+        BLEUStats([1, 2, 3])
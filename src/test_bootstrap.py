@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test Bootstrap Confidence Intervals
+Verifies resampled BLEU matches BLEUStats, intervals are reproducible and
+cover the estimate, and the paired test separates real differences from noise
+"""
+import random
+import numpy as np
+import pytest
+from bleu_stats import BLEUStats, corpus_sentence_stats
+from bootstrap import bleu_metric, compare_runs, confidence_interval, confidence_intervals, paired_comparison
+from result_sink import JsonlResultSink
+
+def summaries(seed, count):
+    rng = random.Random(seed)
+    words = ["MOVE", "PERFORM", "the", "record", "file", "loop", "VSAM", ".", "data"]
+    return [" ".join(rng.choices(words, k=rng.randint(1, 15))) for _ in range(count)]
+
+def test_vectorized_bleu_matches_bleu_stats():
+    rows = corpus_sentence_stats(summaries(1, 60), summaries(2, 60))
+    sums = np.vstack([rows[:k].sum(axis=0) for k in range(1, 61)] + [np.zeros(10, dtype=np.int64)])
+
+    expected = [BLEUStats(row).score()['bleu_hf'] for row in sums]
+    assert bleu_metric(sums, len(rows)).tolist() == pytest.approx(expected, rel=1e-12, abs=0)
+
+def test_interval_is_reproducible_and_covers_estimate():
+    rows = (np.random.default_rng(0).random((1931, 1)) < 0.786).astype(np.float64)
+
+    interval = confidence_interval('mcq_accuracy', rows, resamples=2000, seed=3)
+
+    assert interval == confidence_interval('mcq_accuracy', rows, resamples=2000, seed=3)
+    assert interval['ci_low'] < interval['estimate'] < interval['ci_high']
+    assert interval['ci_high'] - interval['ci_low'] == pytest.approx(2 * 1.96 * interval['std_error'], rel=0.1)
+    assert interval['published_baselines']['gpt35']['outside_ci']
+
+def test_paired_test_separates_signal_from_noise():
+    rng = np.random.default_rng(1)
+    scores = rng.random((2598, 1))
+
+    same = paired_comparison('qa_quality', scores, scores.copy(), resamples=500)
+    better = paired_comparison('qa_quality', scores + 0.02 + rng.normal(0, 0.01, scores.shape), scores,
+                               resamples=500)
+
+    assert (same['difference'], same['p_value']) == (0.0, 1.0)
+    assert better['p_value'] < 0.01 and better['ci_low'] > 0
+
+def test_runs_are_read_and_paired_from_checkpoints(tmp_path):
+    references = summaries(3, 40)
+    for name, seed, skip in (('a', 4, None), ('b', 5, 7)):
+        predictions = summaries(seed, 40)
+        with JsonlResultSink(str(tmp_path / name / 'code_items.jsonl')) as sink:
+            for i, (prediction, reference) in enumerate(zip(predictions, references)):
+                if i != skip:
+                    sink.write({'task': 'code', 'index': i, 'predicted_summary': prediction,
+                                'reference_summary': reference})
+        with JsonlResultSink(str(tmp_path / name / 'mcq_items.jsonl')) as sink:
+            for i in range(30):
+                sink.write({'task': 'mcq', 'index': i, 'is_correct': (i * seed) % 3 == 0})
+
+    intervals = confidence_intervals(str(tmp_path / 'a'), resamples=200)
+    comparison = compare_runs(str(tmp_path / 'a'), str(tmp_path / 'b'), resamples=200)
+
+    expected = BLEUStats.from_corpus(summaries(4, 40), references).score()['bleu_hf']
+    assert intervals['bleu_score']['estimate'] == expected
+    assert intervals['qa_quality'] == {'estimate': 0.0, 'items': 0}
+    assert comparison['bleu_score']['items'] == 39
+    assert (comparison['mcq_accuracy']['difference'], comparison['mcq_accuracy']['p_value']) == (0.0, 1.0)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test Adaptive Concurrency Controller
+Verifies the AIMD decisions and their metrics, and that the limit settles
+near the capacity of a service that slows down when overloaded
+"""
+import asyncio
+import pytest
+import metrics_server
+from concurrency_controller import AdaptiveConcurrencyController
+from metrics_server import EvaluationMetrics
+from q_client import AsyncQClient
+from query_engine import ConcurrentQueryEngine
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = EvaluationMetrics()
+    monkeypatch.setattr(metrics_server, '_shared_metrics', fresh)
+    return fresh
+
+def run_window(controller, latency, failures=0):
+    """Run calls with every slot taken until the controller makes its next decision"""
+    async def window():
+        decisions = sum(controller.decisions.values())
+        calls = 0
+        while sum(controller.decisions.values()) == decisions:
+            generations = [await controller.acquire() for _ in range(controller.limit)]
+            for generation in generations:
+                controller.release(generation, 'error' if calls < failures else 'ok', latency)
+                calls += 1
+    asyncio.run(window())
+
+def test_aimd_decisions(metrics):
+    controller = AdaptiveConcurrencyController(initial=2, min_limit=1, max_limit=3, window=2)
+
+    run_window(controller, 0.1)
+    assert controller.limit == 3 and controller.baseline == 0.1  # Healthy at the limit: +1
+    run_window(controller, 0.1)
+    assert controller.limit == 3 and controller.decisions['hold'] == 1  # Capped at max_limit
+    run_window(controller, 0.5)
+    assert controller.limit == 1  # p95 five times the baseline: halved
+    run_window(controller, 0.1, failures=1)
+    assert controller.limit == 1  # Half the calls failed, but never below min_limit
+    assert controller.decisions == {'increase': 1, 'decrease': 2, 'hold': 1}
+    assert controller.history[-1]['reason'].startswith('failure rate')
+
+    gauges = metrics.snapshot()['gauges']
+    assert gauges['concurrency_limit'] == 1 and gauges['concurrency_decisions_decrease'] == 2
+    assert 'eval_concurrency_limit 1' in metrics.to_prometheus()
+
+class OverloadedService(AsyncQClient):
+    """Fast up to `capacity` concurrent calls, ten times slower beyond it"""
+
+    def __init__(self, capacity, **kwargs):
+        super().__init__(args=('overloaded',), **kwargs)
+        self.capacity = capacity
+        self.active = 0
+
+    async def _exec(self, prompt, timeout):
+        self.active += 1
+        try:
+            await asyncio.sleep(0.005 if self.active <= self.capacity else 0.05)
+            return 0, "ok"
+        finally:
+            self.active -= 1
+
+def test_limit_settles_near_capacity(metrics):
+    controller = AdaptiveConcurrencyController(initial=1, min_limit=1, max_limit=12, window=10)
+    service = OverloadedService(capacity=4, concurrency=controller)
+    engine = ConcurrentQueryEngine(service.query, max_in_flight=12)
+
+    responses = [response for _, response in engine.run((i, f"prompt {i}") for i in range(800))]
+
+    assert responses == ["ok"] * 800
+    assert controller.decisions['increase'] >= 3 and controller.decisions['decrease'] >= 1
+    assert 2 <= controller.limit <= 6
+    assert max(entry['limit'] for entry in controller.history) <= 8
+    assert controller.in_flight == 0 and metrics.in_flight == 0
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test MainframeBench Snapshots
+Verifies that snapshots round-trip the dataset rows with pre-rendered prompts,
+are read memory-mapped without copying, and behave like the datasets API the
+evaluators rely on
+"""
+import pyarrow as pa
+from dataset_snapshot import SnapshotTable, load_mainframebench, snapshot_path, write_snapshot
+from sharding import ShardSpec
+
+MCQ_ROWS = [{'question': f"What does PERFORM {i} do?", 'A': 'Loop', 'B': 'Call', 'C': 'Move',
+             'D': 'Stop', 'answer': 'ABCD'[i % 4]} for i in range(10)]
+
+def test_snapshot_round_trip(tmp_path):
+    write_snapshot('multiple_choice_question', MCQ_ROWS, str(tmp_path))
+    data = load_mainframebench('multiple_choice_question', str(tmp_path))
+
+    assert isinstance(data, SnapshotTable)
+    assert len(data) == len(MCQ_ROWS)
+    rows = list(data)
+    assert [{k: row[k] for k in MCQ_ROWS[0]} for row in rows] == MCQ_ROWS
+    assert [row['id'] for row in rows] == list(range(10))
+    assert rows[3]['prompt'] == "What does PERFORM 3 do?\nA) Loop\nB) Call\nC) Move\nD) Stop\nAnswer:"
+    assert data[-1]['question'] == MCQ_ROWS[-1]['question']
+
+def test_snapshot_is_memory_mapped(tmp_path):
+    """Opening a snapshot does not copy its columns onto the heap"""
+    rows = [{'question': 'q' * 1000, 'answer': 'a' * 1000}] * 500
+    write_snapshot('question_answering', rows, str(tmp_path))
+
+    before = pa.total_allocated_bytes()
+    data = SnapshotTable.open(snapshot_path('question_answering', str(tmp_path)))
+    assert pa.total_allocated_bytes() - before < 100_000
+    assert data.column('question').nbytes > 500_000
+
+def test_select_and_sharding(tmp_path):
+    write_snapshot('multiple_choice_question', MCQ_ROWS, str(tmp_path))
+    data = load_mainframebench('multiple_choice_question', str(tmp_path))
+
+    assert [row['id'] for row in data.select(range(2, 5))] == [2, 3, 4]
+    assert list(data.select_columns(['id']).select(range(2, 4))) == [{'id': 2}, {'id': 3}]
+    assert [i for i, _ in ShardSpec(1, 3).iter_items(data)] == [1, 4, 7]
+    assert [row['id'] for _, row in ShardSpec(1, 3).iter_items(data)] == [1, 4, 7]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test Stage Timing Instrumentation
+Verifies histogram summaries, the disabled no-op path, and that a full-scale
+run reports every stage it passed through
+"""
+import json
+import dataset_snapshot
+import instrumentation
+from dataset_snapshot import write_snapshot
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from instrumentation import NOOP_TIMER, Histogram, Instrumentation
+from model_backends import MockBackend
+
+def test_histogram_summary():
+    histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+    for seconds in [0.005] * 90 + [0.05] * 9 + [2.0]:
+        histogram.observe(seconds)
+
+    summary = histogram.to_dict()
+
+    assert summary['count'] == 100 and summary['max_seconds'] == 2.0
+    assert summary['buckets'] == {'0.01': 90, '0.1': 99, '1.0': 99, '+Inf': 100}
+    assert 0 < summary['p50_seconds'] <= 0.01 < summary['p95_seconds'] <= 0.1
+    assert summary['p99_seconds'] <= 0.1 and histogram.quantile(1.0) == 2.0
+
+def test_disabled_is_a_no_op():
+    disabled = Instrumentation(enabled=False)
+    with disabled.stage('query') as timer:
+        disabled.record('query', 1.0)
+
+    assert timer is NOOP_TIMER
+    assert disabled.snapshot() == {}
+
+def test_full_scale_run_reports_stages(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, '_shared_instrumentation', Instrumentation(enabled=True))
+    snapshot_dir = str(tmp_path / 'snapshot')
+    write_snapshot('multiple_choice_question', [{'question': f"q{i}", 'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd',
+                                                 'answer': 'B'} for i in range(12)], snapshot_dir)
+    write_snapshot('question_answering', [{'question': f"q{i}", 'answer': "MOVE copies data"} for i in range(10)],
+                   snapshot_dir)
+    write_snapshot('COBOL_code_summarization', [{'source': f"DISPLAY {i}.", 'summary': "Displays a number"}
+                                                for i in range(8)], snapshot_dir)
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', snapshot_dir)
+
+    evaluator = FullScaleCOBOLEvaluator(backend=MockBackend(latency='fixed:0.001'))
+    evaluator.results_dir = evaluator.bleu_evaluator.checkpoint_dir = str(tmp_path / 'run')
+    timings = evaluator.run_full_scale_evaluation()['evaluation_info']['stage_timings']
+
+    assert timings['query']['count'] == 30 and timings['query']['p50_seconds'] >= 0.001
+    assert timings['dataset_load']['count'] == 3
+    assert (timings['extract']['count'], timings['score']['count']) == (12 + 8, 10 + 8)
+    assert timings['checkpoint_write']['count'] == 30
+
+    evaluator.save_checkpoint('qa', 10, 10, 10, 0.5)
+    with open(tmp_path / 'run' / 'qa_checkpoint_10.json') as f:
+        assert 'buckets' not in json.load(f)['stage_timings']['query']
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test Batched MCQ Mode
+Verifies batch answer parsing, prompt-size-aware packing, and that unparsed
+slots fall back to single-question calls without changing result order
+"""
+import re
+import threading
+import time
+from mcq_batch import BatchedMCQAnswerer, encode_batch_response, pack_batches, parse_batch_answers, slot_response
+from prompts import render_mcq_batch
+from query_engine import ConcurrentQueryEngine
+
+def make_examples(count, question_length=20):
+    return [{'question': f"Q{i} " + "x" * question_length, 'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd',
+             'answer': 'ABCD'[i % 4]} for i in range(count)]
+
+def test_parse_batch_answers():
+    assert parse_batch_answers("1: B\n2. D\nQuestion 3 - (A)\n4) C", 4) == {1: 'B', 2: 'D', 3: 'A', 4: 'C'}
+    assert parse_batch_answers("1: A program that loops\n2: C", 2) == {2: 'C'}
+    assert parse_batch_answers("1: B\n7: A", 2) == {1: 'B'}
+    assert parse_batch_answers("B\nD\nA", 3) == {1: 'B', 2: 'D', 3: 'A'}
+    assert parse_batch_answers("I am not sure", 3) == {}
+
+def test_pack_batches_respects_size_and_length():
+    examples = make_examples(10)
+    batches = list(pack_batches(enumerate(examples), batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+    long_examples = make_examples(6, question_length=700)
+    for batch in pack_batches(enumerate(long_examples), batch_size=6, max_prompt_chars=2000):
+        assert len(batch) == 1 or len(render_mcq_batch([e for _, e in batch])) <= 2000
+
+def test_batched_answers_with_fallback():
+    """Slots the model skipped are asked again one at a time, in order"""
+    examples = make_examples(10)
+    single_calls = []
+
+    def batch_query(prompt):
+        numbers = re.findall(r'Question (\d+): Q(\d+)', prompt)
+        # Answer every slot except those holding question 3 or 7
+        return "\n".join(f"{n}: {'ABCD'[int(q) % 4]}" for n, q in numbers if q not in ('3', '7'))
+
+    def single_query(prompt):
+        single_calls.append(prompt)
+        return "The answer is " + examples[int(re.search(r'Q(\d+)', prompt).group(1))]['answer']
+
+    batcher = BatchedMCQAnswerer(ConcurrentQueryEngine(batch_query, max_in_flight=2), single_query, batch_size=4)
+    answered = list(batcher.run(enumerate(examples)))
+
+    assert [key for key, _, _ in answered] == list(range(10))
+    assert [response[-1] for _, _, response in answered] == [e['answer'] for e in examples]
+    assert len(single_calls) == 2
+    assert batcher.stats() == {'batch_size': 4, 'model_calls': 5, 'batched_answers': 8, 'fallbacks': 2,
+                               'parse_rate': 0.8}
+
+def test_batched_replay_skips_stored_items():
+    examples = make_examples(6)
+    prompts = []
+
+    def batch_query(prompt):
+        prompts.append(prompt)
+        return "\n".join(f"{n}: A" for n in range(1, prompt.count("Question ") + 1))
+
+    batcher = BatchedMCQAnswerer(ConcurrentQueryEngine(batch_query), lambda prompt: "", batch_size=3)
+    answered = list(batcher.run(enumerate(examples), replay=lambda key: "C" if key < 4 else None))
+
+    assert [response for _, _, response in answered] == ["C", "C", "C", "C", "A", "A"]
+    assert len(prompts) == 1 and "Q4" in prompts[0] and "Q3" not in prompts[0]
+
+def test_sanitized_fields_and_raw_batch_response():
+    """Only the question fields are sanitized, and each batched answer gets the raw batch response"""
+    examples = [{'question': "What does (n) do?", 'A': "a;", 'B': 'b', 'C': 'c', 'D': 'd'}] * 2
+    prompts, kept = [], []
+
+    def batch_query(prompt):
+        prompts.append(prompt)
+        return "1: C\n2: (D)"
+
+    batcher = BatchedMCQAnswerer(ConcurrentQueryEngine(batch_query), lambda prompt: "", batch_size=2,
+                                 sanitize=lambda text: re.sub(r'[();]', '', text))
+    answered = list(batcher.run(enumerate(examples), on_batched=lambda *batch: kept.append(batch)))
+
+    assert "Answer each of the following 2" in prompts[0] and "Question 2: What does n do?\nA) a\n" in prompts[0]
+    assert [response for _, _, response in answered] == ['C', 'D']
+    assert kept == [(0, 1, 2, "1: C\n2: (D)"), (1, 2, 2, "1: C\n2: (D)")]
+    assert slot_response(encode_batch_response(*kept[1][1:])) == 'D'
+
+def test_fallbacks_run_concurrently_in_order():
+    """An unparseable batch's questions are asked again in parallel, within max_in_flight"""
+    examples = make_examples(8)
+    lock = threading.Lock()
+    active = [0, 0]  # current, peak
+
+    def single_query(prompt):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return examples[int(re.search(r'Q(\d+)', prompt).group(1))]['answer']
+
+    batcher = BatchedMCQAnswerer(ConcurrentQueryEngine(lambda prompt: "no idea", max_in_flight=4), single_query,
+                                 batch_size=8)
+    start = time.monotonic()
+    answered = list(batcher.run(enumerate(examples)))
+
+    assert [response for _, _, response in answered] == [e['answer'] for e in examples]
+    assert 1 < active[1] <= 4 and time.monotonic() - start < 8 * 0.05
+
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test Evaluation Metrics Endpoint
+Verifies query outcome counting through the client, the Prometheus and probe
+endpoints over HTTP, and per-task progress from a full-scale run
+"""
+import asyncio
+import time
+import urllib.error
+import urllib.request
+import pytest
+import dataset_snapshot
+import metrics_server
+from dataset_snapshot import write_snapshot
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from metrics_server import EvaluationMetrics, MetricsServer
+from model_backends import MockBackend
+from q_client import run_sync
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = EvaluationMetrics(stall_seconds=60)
+    monkeypatch.setattr(metrics_server, '_shared_metrics', fresh)
+    return fresh
+
+def fetch(server: MetricsServer, path: str):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}", timeout=5) as response:
+            return response.status, response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode('utf-8')
+
+def test_client_counts_query_outcomes(metrics):
+    backend = MockBackend(latency='fixed:0', failure_rate=0.5, seed=3)
+    for i in range(20):
+        run_sync(backend.query(f"prompt {i}"))
+    with pytest.raises(asyncio.TimeoutError):
+        run_sync(MockBackend(latency='fixed:1', timeout=0.01).query("slow"))
+
+    outcomes = metrics.snapshot()['queries']
+    assert outcomes['ok'] + outcomes['error'] == 20 and 0 < outcomes['error'] < 20
+    assert outcomes['timeout'] == 1 and metrics.in_flight == 0
+
+def test_endpoints_follow_progress(metrics):
+    server = MetricsServer(0, metrics, host='127.0.0.1').start()
+    try:
+        assert fetch(server, '/readyz')[0] == 503
+        assert fetch(server, '/healthz')[0] == 200  # Not started yet is not a stall
+        metrics.start_task('mcq', 10)
+        for _ in range(4):
+            metrics.item_completed('mcq')
+        metrics.cache_hit()
+        metrics.cache_miss()
+
+        status, body = fetch(server, '/metrics')
+        assert status == 200
+        assert 'eval_items_completed_total{task="mcq"} 4' in body
+        assert 'eval_items{task="mcq"} 10' in body
+        assert 'eval_cache_hit_ratio 0.5' in body
+        assert fetch(server, '/readyz')[0] == 200 and fetch(server, '/healthz')[0] == 200
+        assert metrics.eta_seconds() > 0
+
+        metrics.last_progress = time.monotonic() - 120
+        status, body = fetch(server, '/healthz')
+        assert status == 503 and 'no progress' in body
+        metrics.mark_finished()
+        assert fetch(server, '/healthz')[0] == 200
+        assert fetch(server, '/missing')[0] == 404
+    finally:
+        server.stop()
+
+def test_full_scale_run_reports_task_progress(metrics, tmp_path, monkeypatch):
+    snapshot_dir = str(tmp_path / 'snapshot')
+    write_snapshot('multiple_choice_question', [{'question': f"q{i}", 'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd',
+                                                 'answer': 'B'} for i in range(6)], snapshot_dir)
+    write_snapshot('question_answering', [{'question': f"q{i}", 'answer': "MOVE copies data"} for i in range(5)],
+                   snapshot_dir)
+    write_snapshot('COBOL_code_summarization', [{'source': f"DISPLAY {i}.", 'summary': "Displays a number"}
+                                                for i in range(4)], snapshot_dir)
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', snapshot_dir)
+
+    evaluator = FullScaleCOBOLEvaluator(backend=MockBackend())
+    evaluator.results_dir = evaluator.bleu_evaluator.checkpoint_dir = str(tmp_path / 'run')
+    evaluator.run_full_scale_evaluation()
+
+    snapshot = metrics.snapshot()
+    assert snapshot['tasks'] == {'mcq': {'completed': 6, 'total': 6}, 'qa': {'completed': 5, 'total': 5},
+                                 'code': {'completed': 4, 'total': 4}}
+    assert snapshot['queries']['ok'] == 15 and snapshot['in_flight'] == 0
+    assert snapshot['ready'] and snapshot['finished'] and snapshot['eta_seconds'] == 0.0
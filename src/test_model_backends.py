@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test Model Backends
+Verifies the mock backend's latency distributions, failure rate, accuracy and
+determinism, and that it drives the concurrent engine and response cache the
+same way the Q CLI backend does
+"""
+import asyncio
+import json
+import random
+import time
+import pytest
+import dataset_snapshot
+import model_backends
+import rate_limiter
+import response_cache
+from bleu_evaluator import SecureBLEUEvaluator
+from dataset_snapshot import write_snapshot
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from model_backends import LatencyDistribution, MockBackend
+from prompts import render_mcq_batch, render_prompt
+from rate_limiter import TokenBucketRateLimiter
+from query_engine import ConcurrentQueryEngine
+from response_cache import ResponseCache
+
+def mcq_items(count):
+    rng = random.Random(1)
+    return [({'question': f"What does statement {i} do?", 'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'},
+             rng.choice('ABCD')) for i in range(count)]
+
+def test_latency_distributions(tmp_path):
+    rng = random.Random(0)
+    assert LatencyDistribution('fixed:0.25').sample(rng) == 0.25
+    assert all(0.1 <= LatencyDistribution('uniform:0.1,0.2').sample(rng) <= 0.2 for _ in range(100))
+    samples = sorted(LatencyDistribution('lognormal:2.0,0.5').sample(rng) for _ in range(2001))
+    assert 1.8 < samples[1000] < 2.2
+
+    profile = tmp_path / 'latencies.json'
+    profile.write_text(json.dumps([1.5, 3.0]))
+    assert LatencyDistribution(f'empirical:{profile}').sample(rng) in (1.5, 3.0)
+
+    with pytest.raises(ValueError):
+        LatencyDistribution('gamma:1')
+
+def test_mock_accuracy_is_deterministic():
+    items = mcq_items(500)
+    prompts = [render_prompt('mcq', example) for example, _ in items]
+
+    def run(seed):
+        mock = MockBackend(accuracy=0.7, seed=seed)
+        mock.add_answers((prompt, answer) for prompt, (_, answer) in zip(prompts, items))
+        return [mock.query_sync(prompt) for prompt in prompts]
+
+    responses = run(seed=3)
+    accuracy = sum(response == answer for response, (_, answer) in zip(responses, items)) / len(items)
+    assert 0.62 < accuracy < 0.78
+    assert run(seed=3) == responses
+    assert run(seed=4) != responses
+
+def test_mock_failures_and_timeouts():
+    mock = MockBackend(failure_rate=0.2, seed=1)
+    responses = [mock.query_sync(f"prompt {i}") for i in range(500)]
+    assert 0.14 < responses.count("") / 500 < 0.26
+
+    slow = MockBackend(latency='fixed:5', timeout=0.2)
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        slow.query_sync("slow")
+    assert time.monotonic() - start < 2
+
+def test_load_test_engine_and_cache():
+    """Concurrency overlaps mock latency, and a repeat run is served from the cache"""
+    cache = ResponseCache(':memory:')
+    mock = MockBackend(latency='uniform:0.02,0.04', cache=cache)
+    jobs = [(i, f"prompt {i}") for i in range(100)]
+
+    start = time.monotonic()
+    first = list(ConcurrentQueryEngine(mock.query, max_in_flight=25).run(jobs))
+    assert time.monotonic() - start < 100 * 0.02 / 4
+
+    second = list(ConcurrentQueryEngine(mock.query, max_in_flight=25).run(jobs))
+    assert first == second and [key for key, _ in first] == list(range(100))
+    assert (mock.calls, cache.hits) == (100, 100)
+
+def test_evaluator_accepts_backend():
+    mock = MockBackend()
+    evaluator = SecureBLEUEvaluator(sample_size=1, backend=mock)
+    prompt = "Summarize this code"
+    mock.add_answers([(evaluator.sanitize_input(prompt), "Moves A to B")])
+
+    assert evaluator.query_amazon_q(prompt) == "Moves A to B"
+    assert mock.calls == 1
+
+def test_full_scale_run_with_env_configured_mock(tmp_path, monkeypatch):
+    """MODEL_BACKEND=mock scores a full-scale run at about MOCK_ACCURACY"""
+    items = mcq_items(200)
+    snapshot_dir = str(tmp_path / 'snapshot')
+    write_snapshot('multiple_choice_question', [dict(example, answer=answer) for example, answer in items],
+                   snapshot_dir)
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', snapshot_dir)
+    monkeypatch.setattr(model_backends, 'DEFAULT_BACKEND', 'mock')
+    monkeypatch.setenv('MOCK_ACCURACY', '0.7')
+    monkeypatch.setattr(response_cache, '_shared_cache', ResponseCache(':memory:'))
+    monkeypatch.setattr(rate_limiter, '_shared_limiter', TokenBucketRateLimiter(requests_per_second=1000, burst=100))
+
+    evaluator = FullScaleCOBOLEvaluator()
+    evaluator.results_dir = str(tmp_path / 'run')
+    results = evaluator.evaluate_mcq_full()
+
+    assert isinstance(evaluator.backend, MockBackend) and evaluator.backend.calls == 200
+    assert results['total'] == 200 and 0.6 < results['accuracy'] < 0.8
+
+    # Unregistered prompts still get an answer in the right shape after sanitizing
+    mock = MockBackend(seed=2)
+    single = mock.query_sync(evaluator.sanitize_input(render_prompt('mcq', items[0][0])))
+    batch = mock.query_sync(evaluator.sanitize_input(render_mcq_batch([example for example, _ in items[:3]])))
+    assert single in ('A', 'B', 'C', 'D')
+    assert [line.split(':')[0] for line in batch.splitlines()] == ['1', '2', '3']
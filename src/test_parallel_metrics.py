@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test Multiprocess Metric Computation
+Verifies pooled extraction and BLEU statistics equal the serial pass row for
+row and in order, and that small inputs stay serial
+"""
+import random
+from bleu_evaluator import SecureBLEUEvaluator
+from bleu_stats import BLEUStats, corpus_sentence_stats
+from parallel_metrics import extract_and_count, parallel_sentence_stats, process_pool
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    words = ["MOVE", "PERFORM", "the", "record", "file", "loop", "VSAM", ".", "data", "COMPUTE"]
+    text = lambda n: " ".join(rng.choices(words, k=n))
+    responses = [f"# Summary\n{text(rng.randint(0, 25))}\n```cobol\n{text(5)}\n```" for _ in range(count)]
+    references = [text(rng.randint(1, 20)) for _ in range(count)]
+    return responses, references
+
+def test_pooled_stats_match_serial():
+    responses, references = make_corpus(450)
+    predictions = [SecureBLEUEvaluator.extract_summary(r) for r in responses]
+
+    pooled = parallel_sentence_stats(predictions, references, workers=3, min_parallel=0)
+
+    assert pooled.tolist() == corpus_sentence_stats(predictions, references).tolist()
+
+def test_pooled_extraction_keeps_order():
+    responses, references = make_corpus(450, seed=1)
+
+    stats, predictions = extract_and_count(responses, references, SecureBLEUEvaluator.extract_summary,
+                                           workers=3, min_parallel=0)
+
+    assert predictions == [SecureBLEUEvaluator.extract_summary(r) for r in responses]
+    assert stats.tolist() == corpus_sentence_stats(predictions, references).tolist()
+
+def test_small_inputs_stay_serial():
+    assert process_pool(10, workers=4, min_parallel=1000) is None
+    assert process_pool(5000, workers=1) is None
+
+    evaluator = SecureBLEUEvaluator(sample_size=1, backend=object())
+    responses, references = make_corpus(20, seed=2)
+    bleu_stats, predictions = evaluator.score_responses(responses, references)
+    assert bleu_stats.to_list() == BLEUStats.from_corpus(predictions, references).to_list()
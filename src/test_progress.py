@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test Throttled Progress Reporting
+Verifies that JSON lines are throttled to the interval with rate and ETA,
+and that a terminal gets a tqdm bar instead
+"""
+import io
+import json
+import pytest
+import dataset_snapshot
+import full_scale_evaluator
+from dataset_snapshot import write_snapshot
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from model_backends import MockBackend
+from progress import ProgressReporter, resolve_mode
+
+class FakeTTY(io.StringIO):
+    def isatty(self):
+        return True
+
+def test_json_lines_are_throttled():
+    stream = io.StringIO()
+    with ProgressReporter('mcq', 1000, interval=3600, mode='json', stream=stream) as progress:
+        for _ in range(1000):
+            progress.update(accuracy=0.75)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1  # Only the final report inside the interval
+    assert lines[0]['event'] == 'done' and lines[0]['completed'] == lines[0]['total'] == 1000
+    assert lines[0]['accuracy'] == 0.75 and lines[0]['eta_seconds'] == 0.0 and lines[0]['rate_per_second'] > 0
+
+    stream = io.StringIO()
+    progress = ProgressReporter('qa', 10, interval=0, mode='json', stream=stream, initial=4)
+    progress.update()
+    report = json.loads(stream.getvalue())
+    assert (report['event'], report['completed'], report['percent']) == ('progress', 5, 50.0)
+    assert progress.eta_seconds(progress.started + 2) == pytest.approx(10.0)  # 1 item in 2s, 5 left
+
+def test_mode_follows_the_terminal():
+    assert resolve_mode('auto', io.StringIO()) == 'json'
+    assert resolve_mode('off', FakeTTY()) == 'off'
+    with pytest.raises(ValueError):
+        resolve_mode('verbose')
+
+    tty = FakeTTY()
+    pytest.importorskip('tqdm')
+    assert resolve_mode('auto', tty) == 'tqdm'
+    with ProgressReporter('code', 20, stream=tty, mode='auto') as progress:
+        for _ in range(20):
+            progress.update()
+        progress.write("Checkpoint 20")
+    output = tty.getvalue()
+    assert 'code' in output and '20/20' in output and 'Checkpoint 20' in output
+    assert '"event"' not in output
+
+def test_resume_counts_replayed_items_as_initial(tmp_path, monkeypatch):
+    """Replayed items start the reporter's count instead of passing through update()"""
+    rows = [{'question': f"Q{i}", 'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd', 'answer': 'A'} for i in range(10)]
+    write_snapshot('multiple_choice_question', rows, str(tmp_path / 'snapshot'))
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', str(tmp_path / 'snapshot'))
+    reporters = []
+
+    def reporter(*args, **kwargs):
+        reporters.append(ProgressReporter(*args, mode='json', stream=io.StringIO(), **kwargs))
+        return reporters[-1]
+    monkeypatch.setattr(full_scale_evaluator, 'ProgressReporter', reporter)
+
+    for resume, backend in ((False, MockBackend(failure_rate=0.3, seed=1)), (True, MockBackend())):
+        evaluator = FullScaleCOBOLEvaluator(resume=resume, backend=backend)
+        evaluator.results_dir = str(tmp_path / 'run')
+        evaluator.evaluate_mcq_full()
+
+    resumed = reporters[1]
+    assert 0 < resumed.initial < 10 and resumed.completed == 10
+    assert backend.calls == resumed.completed - resumed.initial  # Only the retried failures are counted
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test Prompt Rendering and Dedup
+Verifies central templates reproduce the evaluators' prompts, that the dedup
+index treats near-identical prompts as one, and that the query engine sends
+each duplicated prompt once and fans its answer back out in order
+"""
+import threading
+from prompts import PromptIndex, prompt_digest, render_jobs, render_prompt
+from query_engine import ConcurrentQueryEngine
+
+EXAMPLE = {'question': 'What does MOVE do?', 'A': 'Copies data', 'B': 'Loops', 'C': 'Calls', 'D': 'Stops',
+           'answer': 'A', 'source': 'MOVE A TO B.' * 200, 'summary': 'Copies A to B'}
+
+def test_templates_render_evaluator_prompts():
+    assert render_prompt('mcq', EXAMPLE) == (
+        "Question: What does MOVE do?\nA) Copies data\nB) Loops\nC) Calls\nD) Stops\n\n"
+        "Please answer with just the letter (A, B, C, or D).")
+    assert render_prompt('suite_qa', EXAMPLE) == 'What does MOVE do?'
+    code_prompt = render_prompt('code_summary', EXAMPLE)
+    assert EXAMPLE['source'][:1000] + "\n```" in code_prompt
+    assert EXAMPLE['source'][:1001] not in code_prompt
+
+def test_near_identical_prompts_share_digest():
+    assert prompt_digest("Question:  What does\tMOVE do? ") == prompt_digest("Question: What does MOVE do?")
+    assert prompt_digest("What does MOVE do?") != prompt_digest("What does PERFORM do?")
+
+    index = PromptIndex()
+    for prompt in ["a b", "a  b", "c", "a\nb"]:
+        index.add(prompt)
+    assert index.stats() == {'total_prompts': 4, 'unique_prompts': 2, 'duplicate_prompts': 2, 'dedup_rate': 0.5}
+
+def test_engine_sends_duplicates_once():
+    questions = [f"q{i % 7}" for i in range(40)]
+    calls = []
+    lock = threading.Lock()
+
+    def query(prompt):
+        with lock:
+            calls.append(prompt)
+        return prompt.upper()
+
+    jobs, index = render_jobs(lambda: ((i, {'question': q}) for i, q in enumerate(questions)), 'suite_qa')
+    results = list(ConcurrentQueryEngine(query, max_in_flight=3).run(jobs, dedup=index))
+
+    assert results == [(i, q.upper()) for i, q in enumerate(questions)]
+    assert sorted(calls) == sorted(set(questions))
+
+def test_replayed_first_occurrence_is_fanned_out():
+    """On resume, a duplicate of an already answered item is not queried again"""
+    jobs, index = render_jobs(lambda: ((i, {'question': q}) for i, q in enumerate(["x", "y", "x"])), 'suite_qa')
+    calls = []
+
+    def query(prompt):
+        calls.append(prompt)
+        return "fresh"
+
+    engine = ConcurrentQueryEngine(query, max_in_flight=1)
+    results = list(engine.run(jobs, replay=lambda key: "stored" if key == 0 else None, dedup=index))
+
+    assert results == [(0, "stored"), (1, "fresh"), (2, "stored")]
+    assert calls == ["y"]
+
+def test_jobs_are_rendered_lazily():
+    """Only digests are kept up front; each prompt is rendered when the engine pulls its job"""
+    pulled = []
+
+    def items():
+        for i, q in enumerate(["x", "y", "x"]):
+            pulled.append(i)
+            yield i, {'question': q}
+
+    jobs, index = render_jobs(items, 'suite_qa')
+    assert (index.total, index.unique, len(pulled)) == (3, 2, 3)
+    assert next(jobs) == (0, "x") and len(pulled) == 4
+
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test QA Quality Scoring
+Verifies the batch scorer is bit-for-bit equal to the per-item heuristic the
+evaluators use, including empty, whitespace-only and mixed-case inputs
+"""
+import random
+import pytest
+from complete_cobol_evaluator import CompleteCOBOLEvaluator
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from model_backends import MockBackend
+from qa_scoring import (COMPLETE_WEIGHTS, FULL_SCALE_WEIGHTS, QATokenStats, QAWeights, score_qa_batch,
+                        score_qa_item)
+
+EDGE_CASES = [
+    ("", "reference answer"),
+    ("response", ""),
+    ("   ", "reference answer"),
+    ("some answer", " \n\t "),
+    ("MOVE Copies DATA", "move copies data"),
+    ("İstanbul COBOL cobol", "i̇stanbul Cobol"),
+    ("word " * 40, "word"),
+    ("a b c", "a a a b b"),
+]
+
+def random_corpus(seed, count):
+    rng = random.Random(seed)
+    vocab = ["MOVE", "move", "PERFORM", "perform", "copybook", "JCL", "VSAM", "file", "record", "the",
+             "a", "DATA", "data", "division.", "section", "İ"]
+    def text(max_words):
+        return rng.choice([" ", "\n", "  "]).join(rng.choices(vocab, k=rng.randint(0, max_words)))
+    return [text(60) for _ in range(count)], [text(30) for _ in range(count)]
+
+@pytest.mark.parametrize("weights", [FULL_SCALE_WEIGHTS, COMPLETE_WEIGHTS,
+                                     QAWeights(overlap=0.55, length=0.25, completeness_bonus=0.2,
+                                               completeness_words=10, cap=0.9)])
+def test_batch_matches_per_item(weights):
+    responses, references = random_corpus(seed=7, count=500)
+    responses += [r for r, _ in EDGE_CASES]
+    references += [ref for _, ref in EDGE_CASES]
+
+    batch = score_qa_batch(responses, references, weights)
+
+    assert batch.tolist() == [score_qa_item(r, ref, weights) for r, ref in zip(responses, references)]
+
+def test_evaluators_use_their_weights():
+    backend = MockBackend()
+    full_scale = FullScaleCOBOLEvaluator(backend=backend)
+    complete = CompleteCOBOLEvaluator(sample_size=1, backend=backend)
+    response, reference = "MOVE copies data " * 10, "MOVE copies data between fields"
+
+    assert full_scale.assess_qa_quality(response, reference) == 0.6 * 0.6 + 1.0 * 0.3 + 0.1
+    assert complete.assess_qa_quality(response, reference) == 0.6 * 0.7 + 1.0 * 0.3
+
+def test_rescoring_reuses_tokenization():
+    responses, references = random_corpus(seed=3, count=50)
+    stats = QATokenStats(responses, references)
+
+    for weights in (FULL_SCALE_WEIGHTS, COMPLETE_WEIGHTS):
+        assert stats.scores(weights).tolist() == score_qa_batch(responses, references, weights).tolist()
+
+    with pytest.raises(ValueError):
+        QATokenStats(["one"], [])
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test Concurrent Query Engine
+Verifies ordering, in-flight bounds, parity with a serial run, the asyncio
+subprocess client, the token-bucket rate limiter and the response cache
+"""
+import asyncio
+import random
+import sys
+import threading
+import time
+from query_engine import ConcurrentQueryEngine
+from q_client import AsyncQClient, run_sync
+from rate_limiter import TokenBucketRateLimiter
+from response_cache import ResponseCache, cache_key
+
+# Stand-in for `q chat`: echoes stdin upper-cased
+ECHO_ARGS = (sys.executable, '-c', 'import sys; print(sys.stdin.read().upper())')
+
+def make_slow_query(max_seen: list):
+    """Return a fake query function that records peak concurrency"""
+    lock = threading.Lock()
+    in_flight = [0]
+
+    def query(prompt: str) -> str:
+        with lock:
+            in_flight[0] += 1
+            max_seen[0] = max(max_seen[0], in_flight[0])
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            in_flight[0] -= 1
+        return prompt.upper()
+
+    return query
+
+def test_results_in_dataset_order():
+    """Responses come back in input order despite random latencies"""
+    max_seen = [0]
+    engine = ConcurrentQueryEngine(make_slow_query(max_seen), max_in_flight=8)
+    jobs = ((i, f"prompt {i}") for i in range(200))
+
+    results = list(engine.run(jobs))
+
+    assert [key for key, _ in results] == list(range(200))
+    assert all(response == f"PROMPT {key}" for key, response in results)
+
+def test_in_flight_limit_respected():
+    """Never more than max_in_flight queries run at once"""
+    max_seen = [0]
+    engine = ConcurrentQueryEngine(make_slow_query(max_seen), max_in_flight=3)
+
+    list(engine.run((i, str(i)) for i in range(60)))
+
+    assert 1 <= max_seen[0] <= 3
+
+def test_matches_serial_run():
+    """Concurrent aggregates equal the serial ones exactly"""
+    answers = {str(i): random.choice('ABCD') for i in range(100)}
+    key = {str(i): random.choice('ABCD') for i in range(100)}
+
+    serial = sum(answers[p] == key[p] for p in answers)
+    engine = ConcurrentQueryEngine(lambda p: answers[p], max_in_flight=6)
+    concurrent = sum(response == key[p] for p, response in engine.run((p, p) for p in answers))
+
+    assert concurrent == serial
+
+def test_invalid_limit_rejected():
+    """A zero in-flight limit is a configuration error"""
+    try:
+        ConcurrentQueryEngine(str, max_in_flight=0)
+    except ValueError:
+        return
+    assert False, "expected ValueError"
+
+def test_async_client_round_trip():
+    """The subprocess client passes the prompt on stdin and returns stdout"""
+    client = AsyncQClient(args=ECHO_ARGS, timeout=10)
+
+    assert client.query_sync("select answer") == "SELECT ANSWER"
+
+def test_async_client_timeout_kills_process():
+    """A call past its timeout raises instead of hanging"""
+    client = AsyncQClient(args=(sys.executable, '-c', 'import time; time.sleep(30)'), timeout=0.5)
+    start = time.monotonic()
+
+    try:
+        client.query_sync("slow")
+    except asyncio.TimeoutError:
+        assert time.monotonic() - start < 10
+        return
+    assert False, "expected TimeoutError"
+
+def test_async_engine_keeps_order():
+    """Coroutine query functions run on the event loop and still yield in order"""
+    client = AsyncQClient(args=ECHO_ARGS, timeout=10)
+    engine = ConcurrentQueryEngine(client.query, max_in_flight=5)
+
+    results = list(engine.run((i, f"item {i}") for i in range(20)))
+
+    assert results == [(i, f"ITEM {i}") for i in range(20)]
+
+def test_rate_limiter_burst_then_rate():
+    """A full bucket serves the burst at once, then paces at requests_per_second"""
+    limiter = TokenBucketRateLimiter(requests_per_second=20, burst=5, concurrency=5)
+
+    async def take(n):
+        start = time.monotonic()
+        for _ in range(n):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert run_sync(take(5)) < 0.05
+    assert 0.2 <= run_sync(take(5)) < 1.0
+
+def test_rate_limiter_backs_off_on_failure():
+    """Non-zero exits grow the backoff and successes relax it"""
+    limiter = TokenBucketRateLimiter(requests_per_second=100, burst=1, backoff_base=0.2)
+    client = AsyncQClient(args=(sys.executable, '-c', 'import sys; sys.exit(3)'), rate_limiter=limiter)
+
+    assert client.query_sync("fails") == ""
+    assert limiter.backoff == 0.2
+    client.query_sync("fails again")
+    assert limiter.backoff == 0.4
+
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.backoff == 0.0
+
+def test_cache_serves_repeat_queries(tmp_path):
+    """A second identical query is answered from the cache without spawning the CLI"""
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite3'))
+    counter = tmp_path / 'calls'
+    script = f'import sys; open({str(counter)!r}, "a").write("x"); print(sys.stdin.read())'
+    client = AsyncQClient(args=(sys.executable, '-c', script), cache=cache)
+
+    assert client.query_sync("what is a copybook") == "what is a copybook"
+    assert client.query_sync("what is a copybook") == "what is a copybook"
+
+    assert counter.read_text() == "x"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_key_covers_model_args_and_prompt():
+    """Changing any part of the query identity changes the key"""
+    base = cache_key('amazon-q-cli', ['q', 'chat'], 'prompt')
+
+    assert base == cache_key('amazon-q-cli', ['q', 'chat'], 'prompt')
+    assert base != cache_key('other-model', ['q', 'chat'], 'prompt')
+    assert base != cache_key('amazon-q-cli', ['q', 'chat', '--'], 'prompt')
+    assert base != cache_key('amazon-q-cli', ['q', 'chat'], 'prompt!')
+
+def test_cache_eviction_by_age_and_size(tmp_path):
+    """Expired entries go first, then least recently used ones above the size budget"""
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite3'), max_age_days=None, max_mb=None)
+    for i in range(10):
+        cache.put(f'k{i}', 'x' * 1000)
+    cache.conn.execute("UPDATE responses SET created = 0 WHERE key = 'k0'")
+
+    cache.max_age_days = 1
+    assert cache.evict() == 1
+
+    cache.max_mb = 5000 / (1024 * 1024)
+    cache.get('k1')
+    cache.evict()
+    assert len(cache) == 5
+    assert cache.get('k1') is not None
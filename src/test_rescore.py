@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test Raw Response Store and Offline Re-scoring
+Runs a small full-scale evaluation against the mock backend, then verifies
+that re-scoring its stored raw responses reproduces every metric exactly and
+picks up scoring changes without querying the model again
+"""
+import random
+import pytest
+import dataset_snapshot
+from answer_extraction import Extraction
+from dataset_snapshot import write_snapshot
+from full_scale_evaluator import FullScaleCOBOLEvaluator
+from model_backends import MockBackend
+from prompts import render_prompt
+from rescore import rescore
+from response_store import CODEC_RAW, CODEC_ZLIB, ResponseStore, encode_response
+
+def make_rows(seed=0):
+    rng = random.Random(seed)
+    words = ["MOVE", "PERFORM", "copies", "the", "record", "file", "loop", "VSAM", "paragraph", "data"]
+    sentence = lambda n: " ".join(rng.choices(words, k=n))
+    mcq = [{'question': f"What does statement {i} do?", 'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd',
+            'answer': rng.choice('ABCD')} for i in range(40)]
+    qa = [{'question': f"Explain concept {i}", 'answer': sentence(rng.randint(3, 30))} for i in range(30)]
+    code = [{'source': f"PROCEDURE DIVISION. DISPLAY {i}.", 'summary': sentence(rng.randint(4, 12))}
+            for i in range(25)]
+    return mcq, qa, code
+
+@pytest.fixture
+def finished_run(tmp_path, monkeypatch):
+    """Evaluate every task with the mock backend, storing results under tmp_path/run"""
+    mcq, qa, code = make_rows()
+    snapshot_dir = str(tmp_path / 'snapshot')
+    for config, rows in (('multiple_choice_question', mcq), ('question_answering', qa),
+                         ('COBOL_code_summarization', code)):
+        write_snapshot(config, rows, snapshot_dir)
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', snapshot_dir)
+
+    backend = MockBackend(accuracy=0.6, seed=5)
+    evaluator = FullScaleCOBOLEvaluator(backend=backend)
+    results_dir = str(tmp_path / 'run')
+    evaluator.results_dir = results_dir
+    evaluator.bleu_evaluator.checkpoint_dir = results_dir
+    backend.add_answers((evaluator.sanitize_input(render_prompt('mcq', row)), row['answer']) for row in mcq)
+    backend.add_answers((evaluator.sanitize_input(render_prompt('qa', row)), row['answer']) for row in qa)
+    backend.add_answers((evaluator.bleu_evaluator.sanitize_input(render_prompt('code_summary', row)),
+                         row['summary']) for row in code)
+
+    live = {
+        'mcq': evaluator.evaluate_mcq_full(),
+        'qa': evaluator.evaluate_qa_full(),
+        'code': evaluator.bleu_evaluator.evaluate_code_summarization(),
+    }
+    return results_dir, snapshot_dir, live, backend
+
+def test_store_compresses_and_replaces(tmp_path):
+    assert encode_response("B")[0] == CODEC_RAW
+    assert encode_response("MOVE copies data. " * 50)[0] == CODEC_ZLIB
+
+    store = ResponseStore(str(tmp_path / 'raw.sqlite3'), flush_every=3)
+    for i in range(10):
+        store.put('qa', i, f"answer {i} " * i)
+    store.put('qa', 4, "replaced")
+    store.put('mcq', 0, "C")
+
+    assert store.get('qa', 4) == "replaced"
+    assert list(store.iter_task('qa'))[:3] == [(0, ""), (1, "answer 1 "), (2, "answer 2 answer 2 ")]
+    assert (store.count('qa'), store.count('mcq'), store.get('code', 0)) == (10, 1, None)
+    store.close()
+
+def test_rescore_reproduces_live_run(finished_run):
+    results_dir, snapshot_dir, live, backend = finished_run
+    calls = backend.calls
+
+    rescored = rescore(results_dir, workers=2, chunk_size=7, snapshot_dir=snapshot_dir,
+                       min_parallel=0)['task_results']
+
+    assert rescored['mcq_results']['correct'] == live['mcq']['correct']
+    assert rescored['mcq_results']['sample_results'] == live['mcq']['sample_results']
+    assert rescored['mcq_results']['extraction_strategies'] == live['mcq']['extraction_strategies']
+    assert rescored['qa_results']['average_quality_score'] == live['qa']['average_quality_score']
+    assert rescored['code_summarization_results']['bleu_stats'] == live['code']['bleu_stats']
+    assert rescored['code_summarization_results']['detailed_results'] == live['code']['detailed_results']
+    assert backend.calls == calls
+
+def test_rescore_applies_scoring_changes(finished_run, monkeypatch):
+    results_dir, snapshot_dir, live, _ = finished_run
+    monkeypatch.setattr('rescore.extract_answer', lambda response, options=None: Extraction('A', 'explicit'))
+
+    rescored = rescore(results_dir, workers=1, snapshot_dir=snapshot_dir)['task_results']['mcq_results']
+
+    expected = sum(sample['correct'] == 'A' for sample in live['mcq']['sample_results'])
+    assert sum(sample['is_correct'] for sample in rescored['sample_results']) == expected
+    assert rescored['total'] == live['mcq']['total']
+
+def test_rescore_imports_old_checkpoints(finished_run, tmp_path):
+    """Runs recorded before the raw store existed are read from their checkpoints"""
+    results_dir, snapshot_dir, live, _ = finished_run
+    (tmp_path / 'run' / 'raw_responses.sqlite3').unlink()
+
+    rescored = rescore(results_dir, workers=1, snapshot_dir=snapshot_dir)['task_results']
+
+    assert rescored['mcq_results']['correct'] == live['mcq']['correct']
+    assert rescored['code_summarization_results']['bleu_stats'] == live['code']['bleu_stats']
+
+def test_rescore_rereads_batched_answers(tmp_path, monkeypatch):
+    """Batched MCQ items are re-scored from their raw batch responses"""
+    mcq = make_rows()[0]
+    snapshot_dir = str(tmp_path / 'snapshot')
+    for config, rows in (('multiple_choice_question', mcq), ('question_answering', []),
+                         ('COBOL_code_summarization', [])):
+        write_snapshot(config, rows, snapshot_dir)
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', snapshot_dir)
+
+    evaluator = FullScaleCOBOLEvaluator(mcq_batch_size=4, backend=MockBackend(seed=5))
+    evaluator.results_dir = str(tmp_path / 'run')
+    live = evaluator.evaluate_mcq_full()
+    assert live['mcq_batching']['batched_answers'] == 40
+
+    rescored = rescore(evaluator.results_dir, workers=1, snapshot_dir=snapshot_dir)['task_results']['mcq_results']
+    assert rescored['correct'] == live['correct']
+
+    monkeypatch.setattr('mcq_batch.parse_batch_answers', lambda response, count: {})
+    rescored = rescore(evaluator.results_dir, workers=1, snapshot_dir=snapshot_dir)['task_results']['mcq_results']
+    assert rescored['correct'] == 0  # Stored letters are not used once the parser reads nothing
+
+
+def test_fresh_run_clears_older_raw_responses(tmp_path, monkeypatch):
+    """A run without resume into the same directory does not rescore the previous run's items"""
+    mcq = make_rows()[0]
+    snapshot_dir = str(tmp_path / 'snapshot')
+    monkeypatch.setattr(dataset_snapshot, 'SNAPSHOT_DIR', snapshot_dir)
+    results_dir = str(tmp_path / 'run')
+    for rows, batch_size in ((mcq, 4), (mcq[:20], 1)):
+        for config, config_rows in (('multiple_choice_question', rows), ('question_answering', []),
+                                    ('COBOL_code_summarization', [])):
+            write_snapshot(config, config_rows, snapshot_dir)
+        evaluator = FullScaleCOBOLEvaluator(mcq_batch_size=batch_size, backend=MockBackend(seed=batch_size))
+        evaluator.results_dir = results_dir
+        live = evaluator.evaluate_mcq_full()
+
+    rescored = rescore(results_dir, workers=1, snapshot_dir=snapshot_dir)['task_results']['mcq_results']
+    assert (rescored['total'], rescored['correct']) == (20, live['correct'])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test Persistent Q Worker Pool
+Uses the offline stub CLI to verify worker reuse, recycling after N requests,
+replacement of crashed or timed-out workers, health checks, and that per-item
+cost drops from process start-up to model latency
+"""
+import asyncio
+import os
+import sys
+import time
+import pytest
+from q_client import AsyncQClient, run_sync
+from q_worker_pool import QWorkerPool
+from stub_q import answer
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_q.py')
+SERVE_ARGS = (sys.executable, STUB, 'serve')
+
+@pytest.fixture(autouse=True)
+def fast_stub(monkeypatch):
+    monkeypatch.setenv('STUB_Q_STARTUP_SECONDS', '0')
+    monkeypatch.setenv('STUB_Q_LATENCY_SECONDS', '0')
+
+def query_all(pool, prompts):
+    async def run():
+        return await asyncio.gather(*(pool.query(prompt) for prompt in prompts))
+    return run_sync(run())
+
+def test_workers_are_reused():
+    pool = QWorkerPool(SERVE_ARGS, size=2, timeout=10)
+    prompts = [f"What is COBOL {i}?" for i in range(20)]
+
+    results = query_all(pool, prompts)
+
+    assert results == [(0, answer(prompt)) for prompt in prompts]
+    assert pool.started == 2
+    run_sync(pool.close())
+
+def test_workers_recycled_after_max_requests():
+    pool = QWorkerPool(SERVE_ARGS, size=1, max_requests=3, timeout=10)
+
+    for i in range(7):
+        assert run_sync(pool.query(f"prompt {i}"))[0] == 0
+
+    assert (pool.started, pool.recycled) == (3, 2)
+    run_sync(pool.close())
+
+def test_crashed_worker_is_replaced(monkeypatch):
+    monkeypatch.setenv('STUB_Q_EXIT_AFTER', '2')
+    pool = QWorkerPool(SERVE_ARGS, size=1, timeout=10)
+
+    results = [run_sync(pool.query(f"prompt {i}")) for i in range(4)]
+
+    assert [code for code, _ in results] == [0, 0, 1, 0]
+    assert (pool.started, pool.failures) == (2, 1)
+    run_sync(pool.close())
+
+def test_timeout_replaces_worker(monkeypatch):
+    monkeypatch.setenv('STUB_Q_LATENCY_SECONDS', '30')
+    pool = QWorkerPool(SERVE_ARGS, size=1, timeout=0.5)
+    start = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        run_sync(pool.query("slow"))
+
+    assert time.monotonic() - start < 10
+    assert pool.failures == 1
+    run_sync(pool.close())
+
+def test_idle_workers_pinged_before_use():
+    pool = QWorkerPool(SERVE_ARGS, size=1, timeout=10, health_check_seconds=0)
+
+    for i in range(3):
+        assert run_sync(pool.query(f"prompt {i}"))[0] == 0
+
+    assert (pool.started, pool.failures) == (1, 0)
+    run_sync(pool.close())
+
+def test_pool_pays_startup_once(monkeypatch):
+    """Through AsyncQClient, a pooled worker answers N prompts for one start-up cost"""
+    monkeypatch.setenv('STUB_Q_STARTUP_SECONDS', '0.3')
+    monkeypatch.setenv('STUB_Q_LATENCY_SECONDS', '0.01')
+    pool = QWorkerPool(SERVE_ARGS, size=1, timeout=10)
+    client = AsyncQClient(args=(sys.executable, STUB, 'chat'), pool=pool)
+    start = time.monotonic()
+
+    responses = [client.query_sync(f"Question: q{i}\nA) a\nB) b\nC) c\nD) d") for i in range(8)]
+
+    assert all(response in 'ABCD' for response in responses)
+    assert time.monotonic() - start < 8 * 0.3
+    assert pool.started == 1
+    run_sync(pool.close())